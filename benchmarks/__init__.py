@@ -0,0 +1,6 @@
+"""
+Benchmarks for the Smart Home Application
+
+Run each benchmark from the project directory as a module, e.g.
+    python -m benchmarks.hierarchical
+"""
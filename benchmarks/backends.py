@@ -0,0 +1,97 @@
+"""
+Classifier Backend Comparison
+
+Parses the labelled utterance set with the zero-shot pipeline and the
+precomputed label-embedding backend side by side, reporting per-command
+latency, accuracy and agreement between the two, and how many commands each
+accepts and rejects at config.CLASSIFICATION_THRESHOLD (the embedding
+backend's temperature is fitted on calibration.py, not on these utterances).
+
+    python -m benchmarks.backends
+"""
+
+import statistics
+import time
+
+import config
+from classifiers import BACKENDS
+from command_parser import CommandParser
+from benchmarks.utterances import LABELLED_UTTERANCES
+
+
+def run_backend(backend):
+    """
+    Load a parser with the given backend and time each labelled utterance.
+
+    Args:
+        backend (str): One of classifiers.BACKENDS
+
+    Returns:
+        dict: Predictions, per-command latencies in milliseconds, accuracy, accept rate,
+              accuracy of the accepted commands, load time and embedding temperature
+    """
+    config.CLASSIFIER_BACKEND = backend
+    start = time.perf_counter()
+    parser = CommandParser()
+    parser.wait_until_ready()
+    load_seconds = time.perf_counter() - start
+    # Measure the model alone: no fast-path shortcuts and no cached classifications
+    parser.fast_path_enabled = False
+    parser.cache = None
+
+    predictions = []
+    accepted = []
+    latencies = []
+    for utterance, _, _ in LABELLED_UTTERANCES:
+        start = time.perf_counter()
+        parsed = parser.parse_command(utterance)
+        latencies.append(1000 * (time.perf_counter() - start))
+        predictions.append((parsed.get("device"), parsed.get("action")))
+        # Commands scoring below CLASSIFICATION_THRESHOLD come back as an error
+        accepted.append("error" not in parsed)
+
+    correct = [prediction == (device, action)
+               for prediction, (_, device, action) in zip(predictions, LABELLED_UTTERANCES)]
+    accepted_correct = sum(1 for is_correct, is_accepted in zip(correct, accepted) if is_correct and is_accepted)
+    return {
+        "predictions": predictions,
+        "latencies": latencies,
+        "accuracy": sum(correct) / len(LABELLED_UTTERANCES),
+        "accept_rate": sum(accepted) / len(LABELLED_UTTERANCES),
+        "accepted_accuracy": accepted_correct / sum(accepted) if any(accepted) else None,
+        "load_seconds": load_seconds,
+        "temperature": getattr(parser.classifier, "temperature", None),
+    }
+
+
+def main():
+    """Run both backends and print a comparison table."""
+    configured_backend = config.CLASSIFIER_BACKEND
+    try:
+        results = {backend: run_backend(backend) for backend in BACKENDS}
+    finally:
+        config.CLASSIFIER_BACKEND = configured_backend
+
+    print(f"\nLabelled utterances: {len(LABELLED_UTTERANCES)}, "
+          f"threshold: {config.CLASSIFICATION_THRESHOLD}")
+    print(f"{'backend':<12}{'load s':>8}{'p50 ms':>9}{'p95 ms':>9}{'accuracy':>10}"
+          f"{'accepted':>10}{'rejected':>10}{'acc. ok':>9}")
+    for backend, stats in results.items():
+        latencies = sorted(stats["latencies"])
+        p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+        accepted_accuracy = stats["accepted_accuracy"]
+        accepted_accuracy = f"{accepted_accuracy:.1%}" if accepted_accuracy is not None else "n/a"
+        print(f"{backend:<12}{stats['load_seconds']:>8.1f}{statistics.median(latencies):>9.1f}"
+              f"{p95:>9.1f}{stats['accuracy']:>10.1%}{stats['accept_rate']:>10.1%}"
+              f"{1 - stats['accept_rate']:>10.1%}{accepted_accuracy:>9}")
+        if stats["temperature"] is not None:
+            print(f"{'':<12}fitted temperature {stats['temperature']:.4f}")
+    print("(accepted: scored at or above the threshold; acc. ok: accepted and correct, of those accepted)")
+
+    first, second = (results[backend]["predictions"] for backend in BACKENDS)
+    agreement = sum(1 for a, b in zip(first, second) if a == b)
+    print(f"Agreement between backends: {agreement / len(LABELLED_UTTERANCES):.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Confidence Cascade Benchmark
+
+Parses the labelled utterance set with the main classifier alone, then with
+a cheap first stage in front of it at several thresholds, and reports the
+escalation rate, accuracy and end-to-end latency per command.
+
+By default both stages are deterministic stand-ins (benchmarks/stub_classifier.py)
+with emulated model costs: the first stage one pass per command like an
+embedding model, the final stage one pass per label like mDeBERTa zero-shot.
+With --real-model the embedding backend (EMBEDDING_MODEL_NAME) fronts the
+zero-shot MODEL_NAME, if both are cached locally.
+
+    python -m benchmarks.cascade [--thresholds 0.6 0.8 0.9 0.95] [--real-model]
+"""
+
+import argparse
+import sys
+import time
+
+from benchmarks.stub_classifier import KeywordClassifier
+from benchmarks.suite import model_is_cached
+from benchmarks.utterances import LABELLED_UTTERANCES
+from classifiers import BACKEND_EMBEDDING, BACKEND_ZERO_SHOT, import_runtime, load_classifier
+from command_parser import CommandParser
+
+# Import shared constants
+import config
+
+
+def run(final, cascade, iterations: int) -> dict:
+    """
+    Parse every labelled utterance with the model route only (no fast path or cache).
+
+    Returns:
+        dict: ms per command, accuracy and escalation rate (None without a cascade)
+    """
+    parser = CommandParser(classifier=final, cascade=cascade)
+    parser.fast_path_enabled = False
+    parser.cache = None
+    correct = 0
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for utterance, device, action in LABELLED_UTTERANCES:
+            parsed = parser.parse_command(utterance)
+            correct += (parsed.get("device"), parsed.get("action")) == (device, action)
+    elapsed = time.perf_counter() - start
+
+    commands = iterations * len(LABELLED_UTTERANCES)
+    escalation = None
+    if cascade:
+        first = parser.cascade[0]
+        escalation = (first["classified"] - first["accepted"]) / first["classified"] if first["classified"] else 0.0
+    return {"ms_per_command": 1000 * elapsed / commands, "accuracy": correct / commands, "escalation": escalation}
+
+
+def main():
+    """Compare the main classifier alone with cascades at each threshold."""
+    parser = argparse.ArgumentParser(description="Benchmark the parser's confidence cascade.")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.6, 0.8, 0.9, 0.95])
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--first-ms", type=float, default=4.0,
+                        help="stand-in first stage: emulated ms per command")
+    parser.add_argument("--final-ms-per-label", type=float, default=2.0,
+                        help="stand-in final stage: emulated ms per (command, label) pair")
+    parser.add_argument("--real-model", action="store_true",
+                        help="use EMBEDDING_MODEL_NAME and MODEL_NAME instead of stand-ins, if cached locally")
+    args = parser.parse_args()
+
+    if args.real_model:
+        missing = [name for name in (config.EMBEDDING_MODEL_NAME, config.MODEL_NAME) if not model_is_cached(name)]
+        if missing:
+            print(f"--real-model: {', '.join(missing)} not cached locally.", file=sys.stderr)
+            sys.exit(1)
+        import_runtime()
+        labels = CommandParser(classifier=KeywordClassifier()).all_possible_labels
+        first = load_classifier(BACKEND_EMBEDDING, labels)
+        first.model_name = config.EMBEDDING_MODEL_NAME
+        final = load_classifier(BACKEND_ZERO_SHOT, labels)
+    else:
+        first = KeywordClassifier(temperature=0.15, seconds_per_pass=args.first_ms / 1000,
+                                  model_name="keyword-stub-small")
+        final = KeywordClassifier(seconds_per_pass=args.final_ms_per_label / 1000, per_label=True,
+                                  model_name="keyword-stub-nli")
+
+    baseline = run(final, None, args.iterations)
+    print(f"Labelled utterances: {len(LABELLED_UTTERANCES)} x {args.iterations}, "
+          f"CLASSIFICATION_THRESHOLD {config.CLASSIFICATION_THRESHOLD}")
+    print(f"{'setup':<24}{'escalated':>11}{'accuracy':>10}{'ms/cmd':>10}{'latency':>10}")
+    print(f"{'final stage only':<24}{'-':>11}{baseline['accuracy']:>10.1%}{baseline['ms_per_command']:>10.2f}"
+          f"{'-':>10}")
+    for threshold in args.thresholds:
+        stats = run(final, [(first, threshold)], args.iterations)
+        change = stats["ms_per_command"] / baseline["ms_per_command"] - 1
+        print(f"{f'cascade @ {threshold:g}':<24}{stats['escalation']:>11.1%}{stats['accuracy']:>10.1%}"
+              f"{stats['ms_per_command']:>10.2f}{change:>+10.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Hierarchical vs Flat Classification Benchmark
+
+Parses the labelled utterance set in both parser modes and reports the
+NLI forward passes per command, accuracy, agreement and wall time.
+
+    python -m benchmarks.hierarchical
+"""
+
+import time
+
+from command_parser import CommandParser
+from benchmarks.utterances import LABELLED_UTTERANCES
+
+
+def run_mode(parser, mode):
+    """
+    Parse every labelled utterance in the given mode.
+
+    Args:
+        parser (CommandParser): Parser with the model loaded
+        mode (str): "flat" or "hierarchical"
+
+    Returns:
+        dict: Predictions, forward passes per command, accuracy and elapsed seconds
+    """
+    parser.mode = mode
+    parser.forward_passes = 0
+    predictions = []
+
+    start = time.perf_counter()
+    for utterance, _, _ in LABELLED_UTTERANCES:
+        parsed = parser.parse_command(utterance)
+        predictions.append((parsed.get("device"), parsed.get("action")))
+    elapsed = time.perf_counter() - start
+
+    correct = sum(1 for prediction, (_, device, action) in zip(predictions, LABELLED_UTTERANCES)
+                  if prediction == (device, action))
+    return {
+        "predictions": predictions,
+        "passes_per_command": parser.forward_passes / len(LABELLED_UTTERANCES),
+        "accuracy": correct / len(LABELLED_UTTERANCES),
+        "seconds": elapsed,
+    }
+
+
+def main():
+    """Run the benchmark and print a comparison table."""
+    parser = CommandParser()
+    parser.wait_until_ready()
+    # Measure the model alone: no fast-path shortcuts and no cached classifications
+    parser.fast_path_enabled = False
+    parser.cache = None
+    flat = run_mode(parser, "flat")
+    hierarchical = run_mode(parser, "hierarchical")
+
+    agreement = sum(1 for a, b in zip(flat["predictions"], hierarchical["predictions"]) if a == b)
+
+    print(f"\nLabelled utterances: {len(LABELLED_UTTERANCES)}")
+    print(f"{'mode':<14}{'passes/cmd':>12}{'accuracy':>10}{'ms/cmd':>10}")
+    for mode, stats in (("flat", flat), ("hierarchical", hierarchical)):
+        ms_per_command = 1000 * stats["seconds"] / len(LABELLED_UTTERANCES)
+        print(f"{mode:<14}{stats['passes_per_command']:>12.2f}{stats['accuracy']:>10.1%}{ms_per_command:>10.1f}")
+    print(f"Agreement between modes: {agreement / len(LABELLED_UTTERANCES):.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+State History Benchmark
+
+Simulates a day of minute-level changes across thousands of devices: each
+minute a random fraction of fans and thermostats change state and the
+changed slots are recorded into a StateHistory. Reports recording
+throughput, buffer memory (fixed by the ring capacity, however long the
+simulation runs) and query latency for durations, averages and series.
+
+    python -m benchmarks.history [--devices 5000] [--minutes 1440] [--change-rate 0.05]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from history import StateHistory
+from state_store import DeviceStateStore, KIND_CODES
+
+# Import shared constants
+import config
+
+
+def build_store(devices: int) -> DeviceStateStore:
+    """A store with half fans and half thermostats."""
+    store = DeviceStateStore(capacity=devices)
+    store.allocate_many(KIND_CODES[config.DEVICE_FAN], devices // 2)
+    store.allocate_many(KIND_CODES[config.DEVICE_THERMOSTAT], devices - devices // 2,
+                        temperature=config.THERMOSTAT_DEFAULT_TEMP)
+    return store
+
+
+def main():
+    """Run the simulation, then time queries over the recorded day."""
+    parser = argparse.ArgumentParser(description="Benchmark state history recording and range queries.")
+    parser.add_argument("--devices", type=int, default=5000)
+    parser.add_argument("--minutes", type=int, default=1440)
+    parser.add_argument("--change-rate", type=float, default=0.05, help="fraction of devices changed per minute")
+    parser.add_argument("--capacity", type=int, default=config.HISTORY_CAPACITY_PER_DEVICE)
+    args = parser.parse_args()
+
+    store = build_store(args.devices)
+    fans = np.arange(args.devices // 2)
+    thermostats = np.arange(args.devices // 2, args.devices)
+    now = [0.0]
+    history = StateHistory(store, capacity=args.capacity, clock=lambda: now[0])
+    rng = np.random.default_rng(0)
+
+    changes = int(args.devices * args.change_rate)
+    recorded = 0
+    start = time.perf_counter()
+    for minute in range(1, args.minutes + 1):
+        now[0] = 60.0 * minute
+        changed = rng.choice(args.devices, size=changes, replace=False)
+        changed_fans = changed[changed < len(fans)]
+        changed_thermostats = changed[changed >= len(fans)]
+        store.speed[changed_fans] = rng.integers(0, 4, size=len(changed_fans))
+        store.power[changed_fans] = store.speed[changed_fans] > 0
+        store.temperature[changed_thermostats] = rng.uniform(
+            config.THERMOSTAT_MIN_TEMP, config.THERMOSTAT_MAX_TEMP, size=len(changed_thermostats))
+        recorded += history.record(changed)
+    record_seconds = time.perf_counter() - start
+
+    def timed(call, repeats=20):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            call()
+        return 1000 * (time.perf_counter() - start) / repeats
+
+    print(f"Devices: {args.devices}, minutes: {args.minutes}, capacity {args.capacity} transitions/device")
+    print(f"Recorded {recorded} transitions at {recorded / record_seconds:,.0f}/s "
+          f"({1e6 * record_seconds / args.minutes:.0f} us per minute tick)")
+    print(f"Buffer memory: {history.nbytes / 2**20:.1f} MiB "
+          f"(max retained per device: {int(np.minimum(history.writes, args.capacity).max())})")
+    print(f"durations(fan, day):            {timed(lambda: history.durations(int(fans[0]), 0)):8.3f} ms")
+    print(f"average(thermostat, day):       {timed(lambda: history.average(int(thermostats[0]), 0)):8.3f} ms")
+    print(f"series(thermostat, hourly):     "
+          f"{timed(lambda: history.series(int(thermostats[0]), 0, interval=3600)):8.3f} ms")
+    print(f"average_many({len(thermostats)} thermostats): "
+          f"{timed(lambda: history.average_many(thermostats, 0), repeats=3):8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Inference Pool Scaling Benchmark
+
+Loads the classifier once, then forks pools of increasing size and reports
+commands per second and per-worker memory for each, showing how throughput
+scales with core count while the weights stay shared.
+
+    python -m benchmarks.inference_pool --repeat 4
+"""
+
+import argparse
+import os
+import time
+
+import config
+from classifiers import import_runtime, load_classifier
+from command_parser import CommandParser
+from inference_pool import InferencePool
+from benchmarks.stub_classifier import KeywordClassifier
+from benchmarks.utterances import LABELLED_UTTERANCES
+
+
+def main():
+    """Run the scaling benchmark and print one row per pool size."""
+    parser = argparse.ArgumentParser(description="Measure inference pool throughput by worker count.")
+    parser.add_argument("--repeat", type=int, default=4, help="copies of the labelled set per run")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    # Only the label set is needed from the parser: give it the stand-in classifier so it
+    # loads no model of its own, which the workers would otherwise inherit and report
+    config.INFERENCE_WORKERS = 1
+    labels = CommandParser(classifier=KeywordClassifier()).all_possible_labels
+    import_runtime()
+    classifier = load_classifier(config.CLASSIFIER_BACKEND, labels)
+
+    texts = [utterance for utterance, _, _ in LABELLED_UTTERANCES] * args.repeat
+    worker_counts = sorted({1, 2, 4, 8, 16, args.max_workers} & set(range(1, args.max_workers + 1)))
+
+    print(f"\nCommands per run: {len(texts)}, cores: {os.cpu_count()}")
+    print(f"{'workers':>8}{'cmd/s':>10}{'RSS MiB/worker':>16}{'PSS MiB/worker':>16}")
+    for workers in worker_counts:
+        pool = InferencePool(classifier, workers)
+        try:
+            pool(texts[:workers], labels, batch_size=config.PARSER_BATCH_SIZE)  # warm-up
+            start = time.perf_counter()
+            pool(texts, labels, batch_size=config.PARSER_BATCH_SIZE)
+            elapsed = time.perf_counter() - start
+            memory = pool.memory_report()
+        finally:
+            pool.close()
+
+        rss = [worker["rss_kb"] for worker in memory if worker["rss_kb"] is not None]
+        pss = [worker["pss_kb"] for worker in memory if worker["pss_kb"] is not None]
+        rss_mib = f"{sum(rss) / len(rss) / 1024:.0f}" if rss else "n/a"
+        pss_mib = f"{sum(pss) / len(pss) / 1024:.0f}" if pss else "n/a"
+        print(f"{workers:>8}{len(texts) / elapsed:>10.1f}{rss_mib:>16}{pss_mib:>16}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+CPU-Optimized Model Verification
+
+Loads the classifier backend at full precision and in the CPU-optimized
+int8 mode, parses the labelled utterance set with both and reports top-label
+agreement, accuracy, latency and model memory, so the optimized mode can be
+checked before it is enabled in config.py.
+
+    python -m benchmarks.quantization
+"""
+
+import io
+import statistics
+import time
+
+import config
+from classifiers import import_runtime, load_classifier
+from command_parser import CommandParser
+from benchmarks.stub_classifier import KeywordClassifier
+from benchmarks.utterances import LABELLED_UTTERANCES
+
+
+def model_megabytes(classifier):
+    """Serialized size of the classifier's model weights in MiB, or None if it has no model."""
+    import torch
+
+    inner = getattr(classifier, "classifier", classifier)
+    model = getattr(inner, "model", None)
+    if model is None:
+        return None
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell() / (1024 * 1024)
+
+
+def run(classifier, labels):
+    """Classify every labelled utterance, returning top labels and latencies in ms."""
+    top_labels = []
+    latencies = []
+    for utterance, _, _ in LABELLED_UTTERANCES:
+        start = time.perf_counter()
+        result = classifier(utterance, labels, multi_label=False)
+        latencies.append(1000 * (time.perf_counter() - start))
+        top_labels.append(result["labels"][0])
+    return top_labels, latencies
+
+
+def accuracy(parser, top_labels):
+    """Fraction of utterances whose top label maps to the expected device and action."""
+    correct = 0
+    for (utterance, device, action), label in zip(LABELLED_UTTERANCES, top_labels):
+        parsed = parser._interpret(utterance, {"labels": [label], "scores": [1.0]})
+        correct += (parsed.get("device"), parsed.get("action")) == (device, action)
+    return correct / len(LABELLED_UTTERANCES)
+
+
+def main():
+    """Compare the full-precision and optimized classifiers and print a report."""
+    # Only the label set and label mapping are needed from the parser: give it the
+    # stand-in classifier so it loads no model of its own next to the two measured ones
+    config.INFERENCE_WORKERS = 1
+    parser = CommandParser(classifier=KeywordClassifier())
+    labels = parser.all_possible_labels
+    import_runtime()
+
+    results = {}
+    for name, optimized in (("full", False), ("int8", True)):
+        start = time.perf_counter()
+        classifier = load_classifier(config.CLASSIFIER_BACKEND, labels, optimized)
+        load_seconds = time.perf_counter() - start
+        classifier(config.WARMUP_UTTERANCE, labels, multi_label=False)
+        top_labels, latencies = run(classifier, labels)
+        results[name] = {
+            "labels": top_labels,
+            "latencies": latencies,
+            "load_seconds": load_seconds,
+            "megabytes": model_megabytes(classifier),
+        }
+
+    full, optimized = results["full"], results["int8"]
+    agreement = sum(1 for a, b in zip(full["labels"], optimized["labels"]) if a == b)
+
+    print(f"\nBackend: {config.CLASSIFIER_BACKEND}, labelled utterances: {len(LABELLED_UTTERANCES)}")
+    print(f"{'model':<8}{'load s':>8}{'p50 ms':>9}{'mean ms':>9}{'MiB':>8}{'accuracy':>10}")
+    for name, stats in results.items():
+        megabytes = f"{stats['megabytes']:.1f}" if stats["megabytes"] is not None else "n/a"
+        print(f"{name:<8}{stats['load_seconds']:>8.1f}{statistics.median(stats['latencies']):>9.1f}"
+              f"{statistics.mean(stats['latencies']):>9.1f}{megabytes:>8}"
+              f"{accuracy(parser, stats['labels']):>10.1%}")
+    print(f"Top-label agreement: {agreement / len(LABELLED_UTTERANCES):.1%}")
+    speedup = statistics.mean(full["latencies"]) / statistics.mean(optimized["latencies"])
+    print(f"Latency speed-up: {speedup:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
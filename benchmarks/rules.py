@@ -0,0 +1,107 @@
+"""
+Rules Engine Benchmark
+
+Loads 100k rules (threshold rules on thermostats, on/off rules on lights)
+into a RuleEngine and measures the cost of evaluating state changes:
+single-device changes, one group change touching every thermostat, and, for
+contrast, a vectorized scan that checks every rule on each change instead of
+using the (attribute, slot) index.
+
+    python -m benchmarks.rules [--rules 100000] [--devices 10000] [--events 100000]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from rules import RuleEngine, ABOVE, BELOW, EQUALS
+from state_store import DeviceStateStore, KIND_CODES
+
+# Import shared constants
+import config
+
+
+def main():
+    """Load the rules, replay random changes and print per-event costs."""
+    parser = argparse.ArgumentParser(description="Benchmark indexed rule evaluation.")
+    parser.add_argument("--rules", type=int, default=100000)
+    parser.add_argument("--devices", type=int, default=10000, help="thermostats, plus as many lights")
+    parser.add_argument("--events", type=int, default=100000)
+    args = parser.parse_args()
+
+    store = DeviceStateStore(capacity=2 * args.devices)
+    thermostats = store.allocate_many(KIND_CODES[config.DEVICE_THERMOSTAT], args.devices,
+                                      temperature=config.THERMOSTAT_DEFAULT_TEMP)
+    lights = store.allocate_many(KIND_CODES[config.DEVICE_LIGHT], args.devices)
+    fired = [0]
+
+    def execute(rule):
+        fired[0] += 1
+
+    engine = RuleEngine(store, execute, max_firings=10 * args.rules)
+    rng = np.random.default_rng(0)
+
+    # 80% threshold rules on thermostats, 20% on/off rules on lights
+    threshold_rules = int(args.rules * 0.8)
+    rule_slots = thermostats[rng.integers(0, len(thermostats), size=threshold_rules)]
+    rule_thresholds = rng.integers(config.THERMOSTAT_MIN_TEMP, config.THERMOSTAT_MAX_TEMP + 1,
+                                   size=threshold_rules).astype(np.float64)
+    rule_above = rng.random(threshold_rules) < 0.5
+    start = time.perf_counter()
+    for slot, threshold, above in zip(rule_slots.tolist(), rule_thresholds.tolist(), rule_above.tolist()):
+        engine.add([slot], "temperature", ABOVE if above else BELOW, threshold, [])
+    light_slots = lights[rng.integers(0, len(lights), size=args.rules - threshold_rules)]
+    for slot, value in zip(light_slots.tolist(), rng.integers(0, 2, size=len(light_slots)).tolist()):
+        engine.add([slot], "power", EQUALS, value, [])
+    load_seconds = time.perf_counter() - start
+
+    # Single-device changes through the index
+    initial = store.temperature.copy()
+    slots = thermostats[rng.integers(0, len(thermostats), size=args.events)]
+    temperatures = rng.uniform(config.THERMOSTAT_MIN_TEMP, config.THERMOSTAT_MAX_TEMP, size=args.events)
+    scan_events = min(args.events, 2000)
+    start = time.perf_counter()
+    for event, (slot, temperature) in enumerate(zip(slots.tolist(), temperatures.tolist())):
+        if event == scan_events:
+            indexed_fired_in_scan = fired[0]
+        store.temperature[slot] = temperature
+        engine.on_mutation(None, (slot,))
+    indexed_seconds = time.perf_counter() - start
+    indexed_fired = fired[0]
+    if args.events == scan_events:
+        indexed_fired_in_scan = indexed_fired
+
+    # One group change touching every thermostat
+    fired[0] = 0
+    store.temperature[thermostats] = config.THERMOSTAT_MIN_TEMP
+    start = time.perf_counter()
+    engine.on_mutation(None, thermostats)
+    group_seconds = time.perf_counter() - start
+
+    # Contrast: replay the first events checking every threshold rule on each change
+    store.temperature[:] = initial
+    previous = initial.copy()
+    start = time.perf_counter()
+    scan_fired = 0
+    for slot, temperature in zip(slots[:scan_events].tolist(), temperatures[:scan_events].tolist()):
+        store.temperature[slot] = temperature
+        old, new = previous[rule_slots], store.temperature[rule_slots]
+        crossed = np.where(rule_above, (new > rule_thresholds) & (old <= rule_thresholds),
+                           (new < rule_thresholds) & (old >= rule_thresholds))
+        scan_fired += int(crossed.sum())
+        previous[slot] = temperature
+    scan_seconds = time.perf_counter() - start
+
+    print(f"Rules: {len(engine)} on {args.devices} thermostats and {args.devices} lights "
+          f"(loaded in {load_seconds:.2f}s)")
+    print(f"indexed, single change:   {1e6 * indexed_seconds / args.events:8.2f} us/event "
+          f"({indexed_fired / args.events:.2f} rules fired per event)")
+    print(f"indexed, group change:    {1000 * group_seconds:8.2f} ms for {len(thermostats)} thermostats "
+          f"({fired[0]} rules fired)")
+    print(f"full scan, single change: {1e6 * scan_seconds / scan_events:8.2f} us/event "
+          f"({scan_fired} rules fired over {scan_events} events; the index fired {indexed_fired_in_scan})")
+
+
+if __name__ == "__main__":
+    main()
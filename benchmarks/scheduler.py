@@ -0,0 +1,85 @@
+"""
+Scheduler Benchmark
+
+Loads growing numbers of schedules at random times of day (a mix of one-off,
+daily, weekday and single-day recurrences) into a Scheduler driven by a
+simulated clock, then advances the clock a week in one-minute steps.
+Reports insertion and firing cost per schedule, which should grow only
+logarithmically with the number loaded, and cancellation cost.
+
+    python -m benchmarks.scheduler [--schedules 1000 10000 100000] [--days 7]
+"""
+
+import argparse
+import time
+from datetime import datetime
+
+import numpy as np
+
+from scheduler import Scheduler, RECURRENCES
+
+# Import shared constants
+import config
+
+RECURRENCE_MIX = [None, RECURRENCES["day"], RECURRENCES["weekday"], RECURRENCES["weekend"], RECURRENCES["monday"]]
+COMMAND = [{"device": config.DEVICE_LIGHT, "action": "turn_off", "parameters": {}}]
+
+
+def run(schedules: int, days: int) -> dict:
+    """Insert, fire for `days` simulated days, then cancel half of what is left."""
+    now = [datetime(2026, 1, 5).timestamp()]  # a Monday
+    fired = [0]
+
+    def execute(schedule):
+        fired[0] += 1
+
+    scheduler = Scheduler(execute, clock=lambda: now[0])
+    rng = np.random.default_rng(0)
+    hours = rng.integers(0, 24, size=schedules).tolist()
+    minutes = rng.integers(0, 60, size=schedules).tolist()
+    recurrences = rng.integers(0, len(RECURRENCE_MIX), size=schedules).tolist()
+
+    start = time.perf_counter()
+    for hour, minute, recurrence in zip(hours, minutes, recurrences):
+        scheduler.add(COMMAND, hour, minute, RECURRENCE_MIX[recurrence])
+    insert_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    end = now[0] + days * 86400
+    while now[0] < end:
+        now[0] += 60
+        scheduler.run_due()
+    run_seconds = time.perf_counter() - start
+
+    remaining = [schedule.id for schedule in scheduler.pending()]
+    start = time.perf_counter()
+    for schedule_id in remaining[::2]:
+        scheduler.cancel(schedule_id)
+    cancel_seconds = time.perf_counter() - start
+
+    return {
+        "insert_us": 1e6 * insert_seconds / schedules,
+        "fired": fired[0],
+        "fire_us": 1e6 * run_seconds / max(fired[0], 1),
+        "cancel_us": 1e6 * cancel_seconds / max(len(remaining[::2]), 1),
+        "live": len(scheduler),
+    }
+
+
+def main():
+    """Run the benchmark for each schedule count and print a table."""
+    parser = argparse.ArgumentParser(description="Benchmark schedule insertion, firing and cancellation.")
+    parser.add_argument("--schedules", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--days", type=int, default=7, help="simulated days to run, in one-minute steps")
+    args = parser.parse_args()
+
+    print(f"Simulated {args.days} days in one-minute steps")
+    print(f"{'schedules':>10}{'insert us':>11}{'fired':>10}{'us/fire':>10}{'cancel us':>11}{'live':>9}")
+    for schedules in args.schedules:
+        stats = run(schedules, args.days)
+        print(f"{schedules:>10}{stats['insert_us']:>11.2f}{stats['fired']:>10}{stats['fire_us']:>10.2f}"
+              f"{stats['cancel_us']:>11.2f}{stats['live']:>9}")
+
+
+if __name__ == "__main__":
+    main()
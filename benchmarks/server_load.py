@@ -0,0 +1,70 @@
+"""
+Command Server Load Test
+
+Opens concurrent connections to a running server.py, sends commands from
+the labelled utterance set and reports latency percentiles and throughput.
+
+    python server.py &
+    python -m benchmarks.server_load --clients 16 --requests 50
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from client import parse_address
+from benchmarks.utterances import LABELLED_UTTERANCES
+
+# Import shared constants
+import config
+
+
+async def run_client(address, requests, offset, latencies):
+    """Send requests sequentially over one connection, recording each round trip."""
+    transport, location = parse_address(address)
+    if transport == "unix":
+        reader, writer = await asyncio.open_unix_connection(location)
+    else:
+        reader, writer = await asyncio.open_connection(*location)
+
+    for i in range(requests):
+        utterance = LABELLED_UTTERANCES[(offset + i) % len(LABELLED_UTTERANCES)][0]
+        start = time.perf_counter()
+        writer.write(json.dumps({"command": utterance}).encode("utf-8") + b"\n")
+        await writer.drain()
+        await reader.readline()
+        latencies.append(1000 * (time.perf_counter() - start))
+
+    writer.close()
+    await writer.wait_closed()
+
+
+async def run_load(address, clients, requests):
+    """Run all clients concurrently and return (latencies in ms, elapsed seconds)."""
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(run_client(address, requests, i * requests, latencies) for i in range(clients)))
+    return latencies, time.perf_counter() - start
+
+
+def main():
+    """Run the load test and print the latency distribution."""
+    parser = argparse.ArgumentParser(description="Load-test a running command server.")
+    parser.add_argument("--address", default=config.SERVER_ADDRESS)
+    parser.add_argument("--clients", type=int, default=16, help="concurrent connections")
+    parser.add_argument("--requests", type=int, default=50, help="requests per connection")
+    args = parser.parse_args()
+
+    latencies, elapsed = asyncio.run(run_load(args.address, args.clients, args.requests))
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))]
+
+    print(f"\nRequests: {len(latencies)} from {args.clients} clients in {elapsed:.2f}s")
+    print(f"Throughput: {len(latencies) / elapsed:.1f} commands/s")
+    print(f"Latency p50: {statistics.median(latencies):.1f} ms, p99: {p99:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
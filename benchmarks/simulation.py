@@ -0,0 +1,73 @@
+"""
+Thermal Simulation Benchmark
+
+Steps ThermalSimulation over growing numbers of rooms (one thermostat per
+room, a fan in every other room) with randomized building parameters and
+reports steps per second, room-steps per second and how much faster than
+real time the simulation runs, with and without threshold crossing events.
+
+    python -m benchmarks.simulation [--rooms 1000 10000 100000] [--steps 1000]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from simulation import ThermalSimulation
+from state_store import DeviceStateStore, KIND_CODES
+
+# Import shared constants
+import config
+
+
+def build_store(rooms: int, rng) -> DeviceStateStore:
+    """One thermostat per room (random setpoints) and a fan at random speed in every other room."""
+    store = DeviceStateStore(capacity=rooms + rooms // 2)
+    room_codes = np.arange(1, rooms + 1)
+    store.allocate_many(KIND_CODES[config.DEVICE_THERMOSTAT], rooms, room=room_codes,
+                        temperature=rng.uniform(config.THERMOSTAT_MIN_TEMP, config.THERMOSTAT_MAX_TEMP, size=rooms))
+    fans = store.allocate_many(KIND_CODES[config.DEVICE_FAN], rooms // 2, room=room_codes[::2][:rooms // 2])
+    store.speed[fans] = rng.integers(0, 4, size=len(fans))
+    store.power[fans] = store.speed[fans] > 0
+    return store
+
+
+def run(rooms: int, steps: int, thresholds) -> dict:
+    """Time `steps` steps over `rooms` rooms."""
+    rng = np.random.default_rng(0)
+    store = build_store(rooms, rng)
+    crossings = [0]
+    simulation = ThermalSimulation(
+        store, outdoor=rng.uniform(-5, 15, size=rooms), loss_rate=config.SIM_HEAT_LOSS_RATE * rng.uniform(0.5, 2, rooms),
+        initial=rng.uniform(12, 26, size=rooms), thresholds=thresholds,
+        on_cross=lambda events: crossings.__setitem__(0, crossings[0] + len(events)))
+    start = time.perf_counter()
+    simulation.step(steps)
+    seconds = time.perf_counter() - start
+    return {
+        "steps_per_sec": steps / seconds,
+        "room_steps_per_sec": steps * rooms / seconds,
+        "realtime_factor": steps * simulation.step_seconds / seconds,
+        "crossings": crossings[0],
+    }
+
+
+def main():
+    """Run the benchmark for each room count and print a table."""
+    parser = argparse.ArgumentParser(description="Benchmark the vectorized thermal simulation.")
+    parser.add_argument("--rooms", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--steps", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{args.steps} steps of {config.SIM_STEP_SECONDS}s")
+    print(f"{'rooms':>8}{'events':>8}{'steps/s':>10}{'room-steps/s':>15}{'x realtime':>13}{'crossings':>11}")
+    for rooms in args.rooms:
+        for thresholds in ((), (20.0, 26.0)):
+            stats = run(rooms, args.steps, thresholds)
+            print(f"{rooms:>8}{'on' if thresholds else 'off':>8}{stats['steps_per_sec']:>10.0f}"
+                  f"{stats['room_steps_per_sec']:>15.3g}{stats['realtime_factor']:>13.3g}{stats['crossings']:>11}")
+
+
+if __name__ == "__main__":
+    main()
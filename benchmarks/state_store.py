@@ -0,0 +1,112 @@
+"""
+Columnar State Store Benchmark
+
+Measures memory per device and the time of site-wide group updates
+("turn off everything", "set all thermostats to 20") on the columnar
+state store at increasing device counts. For the smaller sizes it also
+builds full registries of device handles and times the equivalent
+per-object Python loop.
+
+    python -m benchmarks.state_store --sizes 10000 100000 1000000
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from devices import Light, Fan, Thermostat
+from registry import DeviceRegistry
+from state_store import DeviceStateStore, KIND_CODES
+
+ROOMS = 100
+
+
+def timed(function, *args):
+    """Run function once and return elapsed milliseconds."""
+    start = time.perf_counter()
+    function(*args)
+    return 1000 * (time.perf_counter() - start)
+
+
+def bench_store(count):
+    """Provision `count` devices directly in a store and time vectorized group updates."""
+    store = DeviceStateStore()
+    per_kind = count // 3
+    rooms = np.arange(per_kind) % ROOMS + 1
+    for kind in KIND_CODES.values():
+        store.allocate_many(kind, per_kind, room=rooms, temperature=22.0)
+    size = store.size
+
+    lights = store.indices(KIND_CODES[Light.DEVICE_TYPE])
+    fans = store.indices(KIND_CODES[Fan.DEVICE_TYPE])
+    thermostats = store.indices(KIND_CODES[Thermostat.DEVICE_TYPE])
+    Light.bulk_turn_on(store, lights)
+    Fan.bulk_turn_on(store, fans)
+
+    def turn_off_everything():
+        Light.bulk_turn_off(store, store.indices(KIND_CODES[Light.DEVICE_TYPE]))
+        Fan.bulk_turn_off(store, store.indices(KIND_CODES[Fan.DEVICE_TYPE]))
+
+    return {
+        "devices": size,
+        "bytes_per_device": store.nbytes / size,
+        "off_ms": timed(turn_off_everything),
+        "set_ms": timed(Thermostat.bulk_set_temperature, store, thermostats, 20),
+        "adjust_ms": timed(Thermostat.bulk_increase_temperature, store, thermostats, 15),
+    }
+
+
+def bench_handles(count):
+    """Build a registry of `count` device handles; measure its memory and a per-object update loop."""
+    tracemalloc.start()
+    registry = DeviceRegistry()
+    per_kind = count // 3
+    for i in range(per_kind):
+        room = f"Room {i % ROOMS}"
+        registry.add(Light(name=f"Light {i}", room=room))
+        registry.add(Fan(name=f"Fan {i}", room=room))
+        registry.add(Thermostat(name=f"Thermostat {i}", room=room))
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    def loop_turn_off():
+        for device in registry.by_type(Light.DEVICE_TYPE) + registry.by_type(Fan.DEVICE_TYPE):
+            device.turn_off()
+
+    def loop_set_temperature():
+        for device in registry.by_type(Thermostat.DEVICE_TYPE):
+            device.set_temperature(20)
+
+    return {
+        "bytes_per_device": allocated / len(registry),
+        "off_ms": timed(loop_turn_off),
+        "set_ms": timed(loop_set_temperature),
+    }
+
+
+def main():
+    """Run the benchmark for each size and print a table."""
+    parser = argparse.ArgumentParser(description="Benchmark the columnar device state store.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--max-handles", type=int, default=100_000,
+                        help="largest size for which full registries of handles are built")
+    args = parser.parse_args()
+
+    print(f"\n{'devices':>10}{'B/device':>10}{'all off ms':>12}{'set 20 ms':>11}{'+15 ms':>9}"
+          f"{'handle B/dev':>14}{'loop off ms':>13}{'loop set ms':>13}")
+    for count in args.sizes:
+        store = bench_store(count)
+        row = (f"{store['devices']:>10}{store['bytes_per_device']:>10.1f}{store['off_ms']:>12.2f}"
+               f"{store['set_ms']:>11.2f}{store['adjust_ms']:>9.2f}")
+        if count <= args.max_handles:
+            handles = bench_handles(count)
+            row += f"{handles['bytes_per_device']:>14.0f}{handles['off_ms']:>13.1f}{handles['set_ms']:>13.1f}"
+        else:
+            row += f"{'-':>14}{'-':>13}{'-':>13}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
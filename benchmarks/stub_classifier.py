@@ -0,0 +1,89 @@
+"""
+Deterministic Stand-in Classifier
+
+A keyword-overlap classifier with the zero-shot pipeline's calling
+convention, so the parser and controller can be benchmarked offline with no
+model download. Scores depend only on the input text and labels, which keeps
+benchmark runs reproducible; the absolute latencies measure this project's
+own code, not a model. For cascade benchmarks, a per-pass delay can emulate
+a model's cost: one pass per input like an embedding model, or one per
+label like an NLI zero-shot model.
+"""
+
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+_WORD_PATTERN = re.compile(r"[a-z]+")
+
+# Words in commands that mean the same as a label word
+_SYNONYMS = {
+    "lights": "light", "lamp": "light", "fans": "fan",
+    "temperature": "thermostat", "heat": "thermostat", "heating": "thermostat", "degrees": "thermostat",
+    "warmer": "increase", "raise": "increase", "up": "increase",
+    "cooler": "decrease", "colder": "decrease", "lower": "decrease", "down": "decrease",
+    "everything": "all", "devices": "all", "state": "status",
+}
+
+
+def _words(text: str) -> set:
+    """Lowercase words of text with synonyms mapped onto label vocabulary."""
+    return {_SYNONYMS.get(word, word) for word in _WORD_PATTERN.findall(text.lower())}
+
+
+class KeywordClassifier:
+    """Scores labels by word overlap with the input, as a softmax over candidate labels."""
+
+    model_name = "keyword-stub"
+    # One "pass" per input, like the embedding backend
+    passes_per_input = 1
+
+    def __init__(self, temperature: float = 0.1, seconds_per_pass: float = 0.0, per_label: bool = False,
+                 model_name: Optional[str] = None):
+        """
+        Args:
+            temperature (float): Softmax temperature applied to overlap ratios
+            seconds_per_pass (float): Emulated model time per forward pass
+            per_label (bool): Emulate an NLI model: one pass per (input, label) pair
+            model_name (str): Name reported to the parser (default: "keyword-stub")
+        """
+        self.temperature = temperature
+        self.seconds_per_pass = seconds_per_pass
+        if per_label:
+            # The parser then counts one pass per label
+            self.passes_per_input = None
+        if model_name:
+            self.model_name = model_name
+        self._label_words: Dict[str, set] = {}
+
+    def __call__(self, sequences, candidate_labels: List[str], multi_label: bool = False,
+                 batch_size: Optional[int] = None):
+        """
+        Classify sequences against candidate labels.
+
+        Returns:
+            dict or list: Pipeline-shaped result(s) with labels sorted by score
+        """
+        single = isinstance(sequences, str)
+        texts = [sequences] if single else list(sequences)
+        if self.seconds_per_pass:
+            time.sleep(self.seconds_per_pass * len(texts) * (self.passes_per_input or len(candidate_labels)))
+        label_words = [self._label_words.setdefault(label, _words(label)) for label in candidate_labels]
+
+        results: List[Dict[str, Any]] = []
+        for text in texts:
+            words = _words(text)
+            overlap = np.array([len(words & label) / len(label) for label in label_words])
+            logits = (overlap - overlap.max()) / self.temperature
+            probabilities = np.exp(logits)
+            probabilities /= probabilities.sum()
+            # Stable sort keeps ties in label order, so results are deterministic
+            order = np.argsort(-probabilities, kind="stable")
+            results.append({
+                "sequence": text,
+                "labels": [candidate_labels[j] for j in order],
+                "scores": probabilities[order].tolist(),
+            })
+        return results[0] if single else results
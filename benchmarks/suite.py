@@ -0,0 +1,227 @@
+"""
+Parser and Controller Benchmark Suite
+
+Times the hot paths (CommandParser.parse_command / parse_commands,
+SmartHomeController.process_command / execute_command, device operations)
+and startup, using the deterministic KeywordClassifier so it runs offline.
+With --real-model the parser and controller benchmarks are repeated with
+the configured model, if it is already in the local cache.
+
+Every benchmark reports a latency distribution (microseconds) and
+throughput. Results can be written as JSON, saved as a baseline, and
+compared against a saved baseline; the exit status is 1 when a benchmark's
+median latency regressed by more than the tolerance.
+
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --save-baseline baseline.json
+    python -m benchmarks.suite --baseline baseline.json --tolerance 0.2
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, Iterable, List
+
+import numpy as np
+
+from benchmarks.stub_classifier import KeywordClassifier
+from benchmarks.utterances import LABELLED_UTTERANCES
+from controller import SmartHomeController
+from devices import Light, Fan, Thermostat
+
+# Import shared constants
+import config
+
+UTTERANCES = [utterance for utterance, _, _ in LABELLED_UTTERANCES]
+
+
+def latency_stats(samples: List[float], items_per_sample: int = 1) -> Dict[str, float]:
+    """
+    Summarize per-call durations.
+
+    Args:
+        samples (list): Seconds per call
+        items_per_sample (int): Items handled by each call, for throughput
+
+    Returns:
+        dict: count, mean/p50/p90/p99/max in microseconds, and items per second
+    """
+    micros = np.array(samples) * 1e6
+    return {
+        "count": len(samples),
+        "mean_us": float(micros.mean()),
+        "p50_us": float(np.percentile(micros, 50)),
+        "p90_us": float(np.percentile(micros, 90)),
+        "p99_us": float(np.percentile(micros, 99)),
+        "max_us": float(micros.max()),
+        "ops_per_sec": len(samples) * items_per_sample / max(float(np.sum(samples)), 1e-12),
+    }
+
+
+def measure(call: Callable, inputs: Iterable, iterations: int) -> List[float]:
+    """Time call(item) for every item, iterations times over."""
+    inputs = list(inputs)
+    samples = []
+    for _ in range(iterations):
+        for item in inputs:
+            start = time.perf_counter()
+            call(item)
+            samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_parser(controller, iterations: int, prefix: str = "") -> Dict[str, Dict]:
+    """Parser benchmarks: as configured, model route only, and batched."""
+    parser = controller.command_parser
+    results = {f"{prefix}parse_command": latency_stats(measure(parser.parse_command, UTTERANCES, iterations))}
+
+    fast_path_enabled, cache = parser.fast_path_enabled, parser.cache
+    parser.fast_path_enabled, parser.cache = False, None
+    try:
+        results[f"{prefix}parse_command.model_route"] = latency_stats(
+            measure(parser.parse_command, UTTERANCES, iterations))
+        results[f"{prefix}parse_commands.batch"] = latency_stats(
+            measure(parser.parse_commands, [UTTERANCES], iterations), items_per_sample=len(UTTERANCES))
+    finally:
+        parser.fast_path_enabled, parser.cache = fast_path_enabled, cache
+    return results
+
+
+def bench_controller(controller, iterations: int, prefix: str = "") -> Dict[str, Dict]:
+    """End-to-end command processing, and execution of already parsed commands."""
+    parsed = [parsed for parsed in (controller.command_parser.parse_command(u) for u in UTTERANCES)
+              if "error" not in parsed]
+    return {
+        f"{prefix}process_command": latency_stats(measure(controller.process_command, UTTERANCES, iterations)),
+        f"{prefix}execute_command": latency_stats(measure(controller.execute_command, parsed, iterations)),
+    }
+
+
+def bench_devices(iterations: int) -> Dict[str, Dict]:
+    """Single-device operations from devices.py."""
+    light, fan, thermostat = Light(), Fan(), Thermostat()
+    repeats = range(100)
+    return {
+        "device.light_turn_on": latency_stats(measure(lambda _: light.turn_on(), repeats, iterations)),
+        "device.fan_set_speed": latency_stats(
+            measure(lambda i: fan.set_speed(Fan.SPEEDS[1 + i % 3]), repeats, iterations)),
+        "device.thermostat_set_temperature": latency_stats(
+            measure(lambda i: thermostat.set_temperature(18 + i % 12), repeats, iterations)),
+        "device.get_status": latency_stats(
+            measure(lambda _: (light.get_status(), fan.get_status(), thermostat.get_status()), repeats, iterations),
+            items_per_sample=3),
+    }
+
+
+def bench_startup(repeats: int) -> Dict[str, Dict]:
+    """Controller construction with the stand-in classifier, and cold module import in a fresh interpreter."""
+    construct = measure(lambda _: SmartHomeController(classifier=KeywordClassifier()), range(repeats), 1)
+
+    imports = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "import controller"], check=True,
+                       cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        imports.append(time.perf_counter() - start)
+    return {
+        "startup.controller": latency_stats(construct),
+        "startup.import_controller": latency_stats(imports),
+    }
+
+
+def model_is_cached(model_name: str) -> bool:
+    """True when the model is a local directory or already in the Hugging Face cache."""
+    if os.path.isdir(model_name):
+        return True
+    try:
+        from huggingface_hub import try_to_load_from_cache
+    except ImportError:
+        return False
+    return isinstance(try_to_load_from_cache(model_name, "config.json"), str)
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    """
+    Find benchmarks whose median latency grew by more than tolerance over the baseline.
+
+    Returns:
+        list: One description per regression
+    """
+    regressions = []
+    for name, stats in results.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]["p50_us"], stats["p50_us"]
+        if after > before * (1 + tolerance):
+            regressions.append(f"{name}: p50 {before:.1f}us -> {after:.1f}us (+{after / before - 1:.0%})")
+    return regressions
+
+
+def main():
+    """Run the suite, print a table and optionally write or compare JSON results."""
+    parser = argparse.ArgumentParser(description="Benchmark the parser and controller hot paths.")
+    parser.add_argument("--iterations", type=int, default=20, help="passes over each input set")
+    parser.add_argument("--startup-repeats", type=int, default=3)
+    parser.add_argument("--real-model", action="store_true",
+                        help="also benchmark the configured model, if it is cached locally")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--save-baseline", metavar="PATH", help="write results as the new baseline")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed relative p50 increase before a benchmark counts as regressed")
+    args = parser.parse_args()
+
+    controller = SmartHomeController(classifier=KeywordClassifier())
+    results = {}
+    results.update(bench_parser(controller, args.iterations))
+    results.update(bench_controller(controller, args.iterations))
+    results.update(bench_devices(args.iterations))
+    results.update(bench_startup(args.startup_repeats))
+
+    if args.real_model:
+        if model_is_cached(config.MODEL_NAME):
+            real = SmartHomeController()
+            real.command_parser.wait_until_ready()
+            results.update(bench_parser(real, args.iterations, prefix="model."))
+            results.update(bench_controller(real, args.iterations, prefix="model."))
+        else:
+            print(f"Skipping --real-model: {config.MODEL_NAME} is not cached locally.", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+            "utterances": len(UTTERANCES),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+    print(f"{'benchmark':<40}{'p50 us':>10}{'p99 us':>10}{'ops/s':>12}")
+    for name, stats in results.items():
+        print(f"{name:<40}{stats['p50_us']:>10.1f}{stats['p99_us']:>10.1f}{stats['ops_per_sec']:>12.0f}")
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"\nNo regressions against {args.baseline} (tolerance {args.tolerance:.0%}).")
+
+
+if __name__ == "__main__":
+    main()
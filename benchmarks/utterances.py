@@ -0,0 +1,44 @@
+"""
+Labelled Utterance Set
+
+Commands with the device and action the parser is expected to produce,
+shared by the benchmarks to measure accuracy.
+"""
+
+# (utterance, expected device, expected action)
+LABELLED_UTTERANCES = [
+    ("Turn on the light", "light", "turn_on"),
+    ("Switch the living room light on", "light", "turn_on"),
+    ("Lights on please", "light", "turn_on"),
+    ("Turn off the light", "light", "turn_off"),
+    ("Switch off the lamp", "light", "turn_off"),
+    ("Kill the lights", "light", "turn_off"),
+    ("Is the light on?", "light", "status"),
+    ("What's the light status?", "light", "status"),
+    ("Turn on the fan", "fan", "turn_on"),
+    ("Start the fan", "fan", "turn_on"),
+    ("Turn off the fan", "fan", "turn_off"),
+    ("Stop the fan", "fan", "turn_off"),
+    ("Set the fan speed to low", "fan", "set_speed"),
+    ("Put the fan on low", "fan", "set_speed"),
+    ("Set the fan to medium", "fan", "set_speed"),
+    ("Fan speed medium please", "fan", "set_speed"),
+    ("Set the fan speed to high", "fan", "set_speed"),
+    ("Run the fan at full blast", "fan", "set_speed"),
+    ("What's the fan status?", "fan", "status"),
+    ("How fast is the fan spinning?", "fan", "status"),
+    ("Set the temperature to 22", "thermostat", "set_temperature"),
+    ("Set the thermostat to 25 degrees", "thermostat", "set_temperature"),
+    ("Change the temperature to 19°C", "thermostat", "set_temperature"),
+    ("Make it warmer", "thermostat", "increase_temperature"),
+    ("Increase the temperature by 2 degrees", "thermostat", "increase_temperature"),
+    ("Turn up the heat", "thermostat", "increase_temperature"),
+    ("Make it cooler", "thermostat", "decrease_temperature"),
+    ("Decrease the temperature by 3", "thermostat", "decrease_temperature"),
+    ("Turn the heating down", "thermostat", "decrease_temperature"),
+    ("What is the current temperature?", "thermostat", "status"),
+    ("How warm is it set to?", "thermostat", "status"),
+    ("What is the status of all devices?", "all", "status"),
+    ("Give me a status report for everything", "all", "status"),
+    ("Show me all devices", "all", "status"),
+]
@@ -0,0 +1,62 @@
+"""
+Calibration Commands
+
+Commands labelled with the parser's action label they should classify as,
+used to fit the embedding backend's softmax temperature so its scores are
+calibrated probabilities and config.CLASSIFICATION_THRESHOLD means the same
+for it as for the zero-shot pipeline. Every action label is covered, and the
+phrasings differ from the benchmarks' labelled utterances, so the benchmarks
+measure the fitted temperature on commands it was not fitted on.
+"""
+
+# Import shared constants
+import config
+
+_LIGHT, _FAN, _THERMOSTAT = config.DEVICE_LIGHT, config.DEVICE_FAN, config.DEVICE_THERMOSTAT
+
+# (command, expected action label)
+CALIBRATION_COMMANDS = [
+    ("Please switch on the light", f"turn on {_LIGHT}"),
+    ("Light on", f"turn on {_LIGHT}"),
+    ("Can you turn the lamp on", f"turn on {_LIGHT}"),
+    ("I need some light in here", f"turn on {_LIGHT}"),
+    ("Turn the light off", f"turn off {_LIGHT}"),
+    ("Lights off", f"turn off {_LIGHT}"),
+    ("Switch the lamp off please", f"turn off {_LIGHT}"),
+    ("Is the lamp still on?", f"get {_LIGHT} status"),
+    ("Check the light", f"get {_LIGHT} status"),
+    ("Tell me whether the light is on", f"get {_LIGHT} status"),
+    ("Switch on the fan", f"turn on {_FAN}"),
+    ("Fan on please", f"turn on {_FAN}"),
+    ("Get the fan going", f"turn on {_FAN}"),
+    ("Switch the fan off", f"turn off {_FAN}"),
+    ("Fan off", f"turn off {_FAN}"),
+    ("Shut down the fan", f"turn off {_FAN}"),
+    ("Fan on low speed", f"set {_FAN} speed low"),
+    ("Slow the fan down to low", f"set {_FAN} speed low"),
+    ("Medium fan speed", f"set {_FAN} speed medium"),
+    ("Put the fan on medium", f"set {_FAN} speed medium"),
+    ("Fan to high", f"set {_FAN} speed high"),
+    ("Put the fan on maximum", f"set {_FAN} speed high"),
+    ("Is the fan running?", f"get {_FAN} status"),
+    ("Check the fan", f"get {_FAN} status"),
+    ("What speed is the fan on?", f"get {_FAN} status"),
+    ("Thermostat to 21", f"set {_THERMOSTAT} temperature"),
+    ("Set the heating to 23 degrees", f"set {_THERMOSTAT} temperature"),
+    ("I want it at 20 degrees", f"set {_THERMOSTAT} temperature"),
+    ("Raise the temperature", f"increase {_THERMOSTAT} temperature"),
+    ("Heat it up a bit", f"increase {_THERMOSTAT} temperature"),
+    ("It's too cold in here", f"increase {_THERMOSTAT} temperature"),
+    ("Lower the temperature", f"decrease {_THERMOSTAT} temperature"),
+    ("Cool it down by 2 degrees", f"decrease {_THERMOSTAT} temperature"),
+    ("It's too hot in here", f"decrease {_THERMOSTAT} temperature"),
+    ("What's the thermostat set to?", f"get {_THERMOSTAT} status"),
+    ("Check the thermostat", f"get {_THERMOSTAT} status"),
+    ("How hot is it in here?", f"get {_THERMOSTAT} status"),
+    ("Status of every device", "get status of all devices"),
+    ("List all the devices", "get status of all devices"),
+    ("How is everything doing?", "get status of all devices"),
+    ("Turn everything off", "turn off all devices"),
+    ("Switch off all the devices", "turn off all devices"),
+    ("Shut everything down", "turn off all devices"),
+]
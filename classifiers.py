@@ -0,0 +1,386 @@
+"""
+Classifier Backends for the Command Parser
+
+Every backend is a callable with the zero-shot pipeline's calling convention:
+classifier(sequences, candidate_labels, multi_label=False, batch_size=None)
+returns {'sequence', 'labels', 'scores'} with labels sorted by score, or a list
+of those when given a list of sequences. The parser depends only on that shape.
+"""
+
+import hashlib
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Import shared constants
+import config
+from calibration import CALIBRATION_COMMANDS
+from metrics import METRICS
+
+BACKEND_ZERO_SHOT = "zero-shot"
+BACKEND_EMBEDDING = "embedding"
+BACKENDS = [BACKEND_ZERO_SHOT, BACKEND_EMBEDDING]
+
+
+def backend_model_name(backend: str) -> str:
+    """Return the model a backend loads, as configured in config.py."""
+    if backend == BACKEND_EMBEDDING:
+        return config.EMBEDDING_MODEL_NAME
+    return config.MODEL_NAME
+
+
+def import_runtime():
+    """
+    Import the ML runtime (torch, transformers).
+
+    These imports take seconds, so they are deferred until a model is
+    actually loaded instead of happening when this module is imported.
+    """
+    import torch  # noqa: F401
+    import transformers  # noqa: F401
+
+
+def configure_cpu_threads():
+    """Set torch's intra-op thread count from config.TORCH_NUM_THREADS (default: all cores)."""
+    import torch
+    torch.set_num_threads(config.TORCH_NUM_THREADS or os.cpu_count() or 1)
+
+
+def model_revision(model_name: str, model_config) -> Optional[str]:
+    """
+    Identify the exact weights a model name resolves to.
+
+    Hub models are identified by the commit hash of the downloaded snapshot;
+    local directories by the names, sizes and modification times of their
+    files.
+
+    Returns:
+        str: Revision id, or None when it cannot be determined
+    """
+    commit_hash = getattr(model_config, "_commit_hash", None)
+    if commit_hash:
+        return commit_hash
+    if os.path.isdir(model_name):
+        digest = hashlib.sha256()
+        for entry in sorted(os.scandir(model_name), key=lambda entry: entry.name):
+            if entry.is_file():
+                stat = entry.stat()
+                digest.update(f"{entry.name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+        return "local-" + digest.hexdigest()[:16]
+    return None
+
+
+def load_quantized_model(model_name: str, model_class):
+    """
+    Load a model with its linear layers dynamically quantized to int8.
+
+    Quantizing takes a while, so the quantized weights are saved under
+    config.OPTIMIZED_MODEL_DIR and later runs load them directly. Only plain
+    tensors are stored, loaded with weights_only=True, so nothing in the
+    cache directory is executed: the module is built from the model's
+    config, quantized again (which is fast on an untrained module) and the
+    saved weights are loaded into it. Artifact names include the model
+    revision, so an updated model on the Hub gets a new artifact, and the
+    torch version, since quantized packed weights are not portable across
+    versions.
+
+    Args:
+        model_name (str): Hugging Face model name or path
+        model_class: transformers Auto class used to load the full-precision model
+
+    Returns:
+        torch.nn.Module: Quantized model in eval mode
+    """
+    import torch
+    from transformers import AutoConfig
+
+    model_config = AutoConfig.from_pretrained(model_name)
+    revision = model_revision(model_name, model_config)
+    cache_dir = os.path.abspath(os.path.expanduser(config.OPTIMIZED_MODEL_DIR))
+    safe_name = re.sub(r"[^\w.-]+", "_", model_name.strip("/"))
+    path = os.path.join(cache_dir, f"{safe_name}-{revision}-{model_class.__name__}"
+                                   f"-int8-torch{torch.__version__}.pt")
+
+    if revision is not None and os.path.exists(path):
+        model = model_class.from_config(model_config).eval()
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        _load_plain_state(model, torch.load(path, weights_only=True))
+        return model
+
+    model = model_class.from_pretrained(model_name).eval()
+    model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    if revision is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Write then rename, so an interrupted save never leaves a truncated artifact behind
+        torch.save(_plain_state(model), path + ".tmp")
+        os.replace(path + ".tmp", path)
+    return model
+
+
+# State dict key suffix of a dynamically quantized layer's (int8 weight, bias) pair
+_PACKED_PARAMS = "_packed_params._packed_params"
+
+
+def _plain_state(model) -> Dict[str, Any]:
+    """
+    A quantized model's state_dict as plain tensors only.
+
+    Each int8 weight is stored as its integer values, scale and zero point,
+    and the dtype entries are left out: pickling quantized tensors and
+    dtypes looks names up across every imported module, which can import
+    optional transformers submodules and fail.
+    """
+    import torch
+
+    state = {}
+    for key, value in model.state_dict().items():
+        if key.endswith(_PACKED_PARAMS):
+            prefix = key[:-len(_PACKED_PARAMS)]
+            weight, bias = value
+            state[prefix + "weight_int8"] = weight.int_repr()
+            state[prefix + "weight_scale"] = torch.tensor(weight.q_scale(), dtype=torch.float64)
+            state[prefix + "weight_zero_point"] = torch.tensor(weight.q_zero_point())
+            if bias is not None:
+                state[prefix + "bias"] = bias.detach()
+        elif isinstance(value, torch.Tensor):
+            state[key] = value
+    return state
+
+
+def _load_plain_state(model, state: Dict[str, Any]):
+    """Load a state saved by _plain_state into a freshly quantized model of the same architecture."""
+    import torch
+
+    full_state = model.state_dict()
+    for key, value in full_state.items():
+        if key.endswith(_PACKED_PARAMS):
+            prefix = key[:-len(_PACKED_PARAMS)]
+            weight = torch._make_per_tensor_quantized_tensor(state[prefix + "weight_int8"],
+                                                             float(state[prefix + "weight_scale"]),
+                                                             int(state[prefix + "weight_zero_point"]))
+            full_state[key] = (weight, state.get(prefix + "bias"))
+        elif isinstance(value, torch.Tensor):
+            full_state[key] = state[key]
+    model.load_state_dict(full_state)
+
+
+class InferenceModeClassifier:
+    """Runs a classifier under torch.inference_mode(), which skips autograd bookkeeping entirely."""
+
+    def __init__(self, classifier):
+        self.classifier = classifier
+
+    def __call__(self, *args, **kwargs):
+        import torch
+        with torch.inference_mode():
+            return self.classifier(*args, **kwargs)
+
+
+def load_classifier(backend: str, labels: List[str], optimized: Optional[bool] = None,
+                    model_name: Optional[str] = None):
+    """
+    Load the classifier for a backend.
+
+    Args:
+        backend (str): One of BACKENDS
+        labels (list): Labels the parser will score, precomputed where the backend supports it
+        optimized (bool): Use the CPU-optimized int8 model (default: config.CPU_OPTIMIZED)
+        model_name (str): Model to load (default: the backend's model from config.py)
+
+    Returns:
+        callable: Classifier with the zero-shot pipeline's calling convention
+    """
+    if optimized is None:
+        optimized = config.CPU_OPTIMIZED
+    if optimized:
+        configure_cpu_threads()
+    model_name = model_name or backend_model_name(backend)
+
+    if backend == BACKEND_ZERO_SHOT:
+        from transformers import pipeline
+        if not optimized:
+            return pipeline("zero-shot-classification", model=model_name)
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+        model = load_quantized_model(model_name, AutoModelForSequenceClassification)
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        return InferenceModeClassifier(pipeline("zero-shot-classification", model=model, tokenizer=tokenizer))
+    if backend == BACKEND_EMBEDDING:
+        return EmbeddingClassifier(model_name, labels, config.EMBEDDING_TEMPERATURE, optimized)
+    raise ValueError(f"Unknown classifier backend '{backend}'. Choose from: {', '.join(BACKENDS)}")
+
+
+def fit_temperature(similarities: np.ndarray, targets: np.ndarray,
+                    bounds: tuple = (1e-3, 1.0), iterations: int = 60) -> float:
+    """
+    Softmax temperature minimising the negative log-likelihood of the expected labels.
+
+    The likelihood is convex in 1 / temperature, so a golden-section search
+    over log(temperature) finds the minimum.
+
+    Args:
+        similarities (np.ndarray): Scores of shape (commands, labels), e.g. cosine similarities
+        targets (np.ndarray): Index of each command's expected label
+        bounds (tuple): Smallest and largest temperature considered
+        iterations (int): Search steps; each narrows the interval by about 38%
+
+    Returns:
+        float: The fitted temperature
+    """
+    rows = np.arange(len(targets))
+
+    def nll(log_temperature):
+        logits = similarities / np.exp(log_temperature)
+        logits = logits - logits.max(axis=1, keepdims=True)
+        return float(np.mean(np.log(np.exp(logits).sum(axis=1)) - logits[rows, targets]))
+
+    ratio = (np.sqrt(5) - 1) / 2
+    low, high = np.log(bounds[0]), np.log(bounds[1])
+    a, b = high - ratio * (high - low), low + ratio * (high - low)
+    nll_a, nll_b = nll(a), nll(b)
+    for _ in range(iterations):
+        if nll_a <= nll_b:
+            high, b, nll_b = b, a, nll_a
+            a = high - ratio * (high - low)
+            nll_a = nll(a)
+        else:
+            low, a, nll_a = a, b, nll_b
+            b = low + ratio * (high - low)
+            nll_b = nll(b)
+    return float(np.exp((low + high) / 2))
+
+
+class EmbeddingClassifier:
+    """
+    Scores commands by cosine similarity to precomputed label embeddings.
+
+    The label set is encoded once into a normalized NumPy matrix, so each
+    command costs a single encoder pass plus one matrix product, instead of
+    one NLI pass per label. Similarities are turned into a softmax over the
+    candidate labels with a temperature, so scores sum to 1 across labels like
+    the zero-shot pipeline's. Unless one is configured, the temperature is fitted
+    on labelled commands (calibration.CALIBRATION_COMMANDS) when the model
+    loads, so scores are calibrated probabilities and
+    config.CLASSIFICATION_THRESHOLD can be applied to them.
+    """
+
+    # Encoder passes per input, regardless of the number of labels
+    passes_per_input = 1
+
+    def __init__(self, model_name: str, labels: List[str], temperature: Optional[float] = None,
+                 optimized: bool = False):
+        """
+        Load the sentence encoder and embed the label set.
+
+        Args:
+            model_name (str): Hugging Face encoder model
+            labels (list): Labels to precompute
+            temperature (float): Softmax temperature applied to cosine similarities
+                                 (default: fitted on calibration.CALIBRATION_COMMANDS)
+            optimized (bool): Load the encoder with int8 dynamic quantization
+        """
+        from transformers import AutoModel, AutoTokenizer
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        if optimized:
+            self.model = load_quantized_model(model_name, AutoModel)
+        else:
+            self.model = AutoModel.from_pretrained(model_name)
+        self.model.eval()
+        self.temperature = temperature
+        self.label_rows: Dict[str, int] = {}
+        self.label_matrix = np.empty((0, self.model.config.hidden_size), dtype=np.float32)
+        self._label_indices(labels)
+        if temperature is None:
+            self.calibrate(CALIBRATION_COMMANDS)
+
+    def calibrate(self, commands: List[tuple]) -> float:
+        """
+        Fit the softmax temperature to labelled commands (see fit_temperature).
+
+        Args:
+            commands (list): (command, expected label) pairs; the distinct expected
+                             labels are the candidate labels
+
+        Returns:
+            float: The fitted temperature, which the classifier uses from now on
+        """
+        labels = list(dict.fromkeys(label for _, label in commands))
+        label_matrix = self.label_matrix[self._label_indices(labels)]
+        similarities = self.encode([command for command, _ in commands]) @ label_matrix.T
+        targets = np.array([labels.index(label) for _, label in commands])
+        self.temperature = fit_temperature(similarities, targets)
+        return self.temperature
+
+    def encode(self, texts: List[str], batch_size: Optional[int] = None) -> np.ndarray:
+        """
+        Embed texts as L2-normalized mean-pooled encoder outputs.
+
+        Args:
+            texts (list): Texts to embed
+            batch_size (int): Texts per forward pass (default: all at once)
+
+        Returns:
+            np.ndarray: Array of shape (len(texts), hidden_size)
+        """
+        import torch
+
+        batch_size = batch_size or len(texts)
+        chunks = []
+        for start in range(0, len(texts), batch_size):
+            with METRICS.stage("tokenize"):
+                encoded = self.tokenizer(texts[start:start + batch_size], padding=True,
+                                         truncation=True, return_tensors="pt")
+            with METRICS.stage("model_forward"), torch.inference_mode():
+                hidden = self.model(**encoded).last_hidden_state
+            mask = encoded["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+            chunks.append(pooled.numpy().astype(np.float32))
+
+        embeddings = np.concatenate(chunks)
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True).clip(min=1e-12)
+        return embeddings
+
+    def _label_indices(self, labels: List[str]) -> np.ndarray:
+        """Row indices of labels in the label matrix, embedding any not seen before."""
+        new_labels = [label for label in dict.fromkeys(labels) if label not in self.label_rows]
+        if new_labels:
+            for label in new_labels:
+                self.label_rows[label] = len(self.label_rows)
+            self.label_matrix = np.vstack([self.label_matrix, self.encode(new_labels)])
+        return np.array([self.label_rows[label] for label in labels])
+
+    def __call__(self, sequences, candidate_labels: List[str], multi_label: bool = False,
+                 batch_size: Optional[int] = None):
+        """
+        Classify sequences against candidate labels.
+
+        Args:
+            sequences (str or list): Text or texts to classify
+            candidate_labels (list): Labels to score
+            multi_label (bool): Accepted for pipeline compatibility; scores are always a softmax
+            batch_size (int): Texts per encoder pass
+
+        Returns:
+            dict or list: Pipeline-shaped result(s) with labels sorted by score
+        """
+        single = isinstance(sequences, str)
+        texts = [sequences] if single else list(sequences)
+
+        label_matrix = self.label_matrix[self._label_indices(candidate_labels)]
+        logits = self.encode(texts, batch_size) @ label_matrix.T / self.temperature
+        logits -= logits.max(axis=1, keepdims=True)
+        probabilities = np.exp(logits)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        order = np.argsort(-probabilities, axis=1)
+
+        results: List[Dict[str, Any]] = [
+            {
+                "sequence": text,
+                "labels": [candidate_labels[j] for j in row_order],
+                "scores": probabilities[i, row_order].tolist(),
+            }
+            for i, (text, row_order) in enumerate(zip(texts, order))
+        ]
+        return results[0] if single else results
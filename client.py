@@ -0,0 +1,75 @@
+"""
+Smart Home Command Client
+
+A thin client for server.py. It exposes the same process_command call as
+SmartHomeController, so the CLI can drive a remote controller unchanged.
+"""
+
+import json
+import socket
+
+
+def parse_address(address):
+    """
+    Split a server address into its transport and location.
+
+    Args:
+        address (str): "HOST:PORT" for TCP or "unix:/path" for a Unix socket
+
+    Returns:
+        tuple: ("unix", path) or ("tcp", (host, port))
+    """
+    if address.startswith("unix:"):
+        return "unix", address[len("unix:"):]
+    host, _, port = address.rpartition(":")
+    return "tcp", (host or "127.0.0.1", int(port))
+
+
+class SmartHomeClient:
+    """Sends commands to a running command server over its JSON-lines protocol."""
+
+    def __init__(self, address):
+        """
+        Connect to a command server.
+
+        Args:
+            address (str): "HOST:PORT" or "unix:/path"
+        """
+        transport, location = parse_address(address)
+        if transport == "unix":
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.connect(location)
+        self.stream = self.sock.makefile("rwb")
+
+    def _request(self, request):
+        """Send one request and return the decoded reply."""
+        self.stream.write(json.dumps(request).encode("utf-8") + b"\n")
+        self.stream.flush()
+        line = self.stream.readline()
+        if not line:
+            raise ConnectionError("Server closed the connection.")
+        return json.loads(line)
+
+    def process_command(self, user_input):
+        """
+        Process a natural language command on the server.
+
+        Args:
+            user_input (str): The natural language command
+
+        Returns:
+            str: Response message to the user
+        """
+        reply = self._request({"command": user_input})
+        return reply.get("response", reply.get("error"))
+
+    def startup_report(self):
+        """Return the server's model startup timings."""
+        return self._request({"op": "startup_report"}).get("response")
+
+    def close(self):
+        """Close the connection."""
+        self.stream.close()
+        self.sock.close()
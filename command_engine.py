@@ -0,0 +1,265 @@
+"""
+Command Engine
+
+Executes parsed commands through a dispatch table keyed on (device type,
+action). The table is compiled once from the ACTIONS declared by each device
+class, so executing a command is one dictionary lookup plus parameter
+binding, whatever the number of device types. Device classes added later
+register their actions with register_device_class; actions that are not tied
+to a device type (such as "all devices" commands) use register_action.
+
+Mutation listeners (add_mutation_listener) are told which state store slots
+every successful state-changing command touched, e.g. to journal them.
+"""
+
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from devices import Param
+from metrics import METRICS
+from registry import DEVICE_CLASSES, register_device_class
+
+# Device type used by commands that address every device
+ALL_DEVICES = "all"
+
+
+class _Entry:
+    """Compiled dispatch table entry."""
+
+    __slots__ = ("handler", "bulk_handler", "params", "query", "targeted")
+
+    def __init__(self, handler, bulk_handler, params, query, targeted):
+        self.handler = handler
+        self.bulk_handler = bulk_handler
+        self.params = params
+        self.query = query
+        self.targeted = targeted
+
+
+class CommandEngine:
+    """
+    Table-driven executor for parsed commands.
+
+    Targeted entries resolve the command's target to state store slots: one
+    device runs the action's method on its handle, a group runs the bulk
+    class method once over all slots.
+    """
+
+    def __init__(self, registry, status_page_size: int):
+        """
+        Compile the dispatch table for every registered device class.
+
+        Args:
+            registry (DeviceRegistry): Devices commands are executed on
+            status_page_size (int): Devices listed when a status query matches a group
+        """
+        self.registry = registry
+        self.status_page_size = status_page_size
+        self._table: Dict[Tuple[str, str], _Entry] = {}
+        self._mutation_listeners: List[Callable] = []
+        for device_class in list(DEVICE_CLASSES.values()):
+            self.add_device_class(device_class)
+
+    def add_device_class(self, device_class) -> None:
+        """Compile the actions a device class declares into the dispatch table."""
+        for action, declaration in device_class.ACTIONS.items():
+            self._table[(device_class.DEVICE_TYPE, action)] = _Entry(
+                handler=getattr(device_class, declaration.method),
+                bulk_handler=getattr(device_class, declaration.bulk, None),
+                params=declaration.params,
+                query=declaration.query,
+                targeted=True,
+            )
+
+    def register_device_class(self, device_class) -> None:
+        """
+        Register a plug-in device class and its actions.
+
+        The class becomes available to inventories and the state store, and
+        its ACTIONS are added to this engine's dispatch table.
+
+        Args:
+            device_class: DeviceHandle subclass declaring DEVICE_TYPE and ACTIONS
+        """
+        register_device_class(device_class)
+        self.add_device_class(device_class)
+
+    def register_action(self, device_type: str, action: str, handler: Callable,
+                        params: Sequence[Param] = (), query: bool = False) -> None:
+        """
+        Register an action that is not run on a resolved target.
+
+        Args:
+            device_type (str): Device type of the parsed command (e.g. ALL_DEVICES)
+            action (str): Action name
+            handler (callable): Called with the bound parameters, returns the response
+            params (sequence): Parameter schema, in the handler's argument order
+            query (bool): The action only reads state
+        """
+        self._table[(device_type, action)] = _Entry(handler, None, tuple(params), query, targeted=False)
+
+    def add_mutation_listener(self, listener: Callable) -> None:
+        """
+        Call listener(parsed_command, indices) after each successful state change.
+
+        indices holds the state store slots the command touched; commands that
+        are not run on a resolved target report every occupied slot. Queries
+        are not reported, and the clauses of an atomic command are reported
+        only once all of them have succeeded.
+
+        Args:
+            listener (callable): Receives the parsed command and an index array
+        """
+        self._mutation_listeners.append(listener)
+
+    def _notify(self, parsed_command: Dict, indices) -> None:
+        """Report a state change to the mutation listeners."""
+        for listener in self._mutation_listeners:
+            listener(parsed_command, indices)
+
+    def supports(self, device_type: str, action: str) -> bool:
+        """True when the engine has an entry for the (device type, action) pair."""
+        return (device_type, action) in self._table
+
+    def execute(self, parsed_command: Dict) -> str:
+        """
+        Execute one parsed command.
+
+        Args:
+            parsed_command (dict): The parsed command structure, or a parser error
+
+        Returns:
+            str: Response message to the user
+        """
+        with METRICS.stage("execute"):
+            succeeded, response, touched = self._execute(parsed_command)
+        if touched is not None:
+            self._notify(parsed_command, touched)
+        return response
+
+    def _execute(self, parsed_command: Dict) -> Tuple[bool, str, Optional[np.ndarray]]:
+        """
+        Execute one parsed command.
+
+        Returns:
+            tuple: (succeeded, response, slots changed or None if nothing changed)
+        """
+        if "error" in parsed_command:
+            return False, parsed_command["error"], None
+
+        device_type = parsed_command["device"]
+        action = parsed_command["action"]
+        entry = self._table.get((device_type, action))
+        if entry is None:
+            if device_type in DEVICE_CLASSES:
+                METRICS.increment("errors_total", type="unsupported_action")
+                return False, f"Action '{action}' not supported for {device_type}.", None
+            METRICS.increment("errors_total", type="device_not_found")
+            return False, f"Device '{device_type}' not found.", None
+
+        parameters = parsed_command.get("parameters") or {}
+        try:
+            args = [param.bind(parameters) for param in entry.params]
+        except (TypeError, ValueError) as e:
+            METRICS.increment("errors_total", type="invalid_parameter")
+            return False, str(e), None
+
+        try:
+            if not entry.targeted:
+                response = entry.handler(*args)
+                return True, response, None if entry.query else self.registry.store.indices()
+
+            target = parsed_command.get("target") or {}
+            indices = self.registry.select_indices(device_type, target)
+            if len(indices) == 0:
+                METRICS.increment("errors_total", type="device_not_found")
+                if target.get("unresolved"):
+                    return False, f"Device '{target['unresolved']} {device_type}' not found.", None
+                return False, f"Device '{device_type}' not found.", None
+            if len(indices) == 1:
+                response = entry.handler(self.registry.by_index(int(indices[0])), *args)
+            else:
+                succeeded, response = self._execute_on_group(entry, indices, device_type, action, args)
+                if not succeeded:
+                    return False, response, None
+            return True, response, None if entry.query else indices
+        except Exception as e:
+            METRICS.increment("errors_total", type=type(e).__name__)
+            return False, f"Error executing command: {str(e)}", None
+
+    def execute_batch(self, parsed_commands: Sequence[Dict]) -> List[str]:
+        """
+        Execute parsed commands in order.
+
+        Args:
+            parsed_commands (sequence): Parsed command structures or parser errors
+
+        Returns:
+            list: Response message for each command, in order
+        """
+        execute = self.execute
+        return [execute(parsed_command) for parsed_command in parsed_commands]
+
+    def execute_atomic(self, parsed_commands: Sequence[Dict]) -> List[str]:
+        """
+        Execute the clauses of one compound command all-or-nothing.
+
+        Nothing runs if any clause failed to parse. Otherwise the state store
+        is snapshotted first and restored if a clause fails, so a compound
+        command never leaves devices half-updated.
+
+        Args:
+            parsed_commands (sequence): Parsed clauses, in spoken order
+
+        Returns:
+            list: Response for each clause that ran, or the failure that cancelled the command
+        """
+        for parsed_command in parsed_commands:
+            if "error" in parsed_command:
+                return [parsed_command["error"], "No changes were made."]
+
+        store = self.registry.store
+        snapshot = store.snapshot()
+        responses = []
+        changes = []
+        for parsed_command in parsed_commands:
+            with METRICS.stage("execute"):
+                succeeded, response, touched = self._execute(parsed_command)
+            if not succeeded:
+                store.restore(snapshot)
+                return [response, "No changes were made."]
+            responses.append(response)
+            if touched is not None:
+                changes.append((parsed_command, touched))
+        for parsed_command, touched in changes:
+            self._notify(parsed_command, touched)
+        return responses
+
+    def _execute_on_group(self, entry: _Entry, indices, device_type: str, action: str,
+                          args: List) -> Tuple[bool, str]:
+        """
+        Execute one action on many devices.
+
+        Queries list the first page of results. Other actions run the bulk
+        class method as a single vectorized update, or call the action on
+        each device when the class has no bulk method.
+
+        Returns:
+            tuple: (succeeded, response message)
+        """
+        if entry.query:
+            shown = [entry.handler(self.registry.by_index(int(index)), *args)
+                     for index in indices[:self.status_page_size]]
+            if len(indices) > len(shown):
+                shown.append(f"... and {len(indices) - len(shown)} more.")
+            return True, "\n".join(shown)
+
+        if entry.bulk_handler is not None:
+            error: Optional[str] = entry.bulk_handler(self.registry.store, indices, *args)
+            if error:
+                return False, error
+        else:
+            for index in indices:
+                entry.handler(self.registry.by_index(int(index)), *args)
+        return True, f"Applied '{action}' to {len(indices)} {device_type} devices."
@@ -6,13 +6,261 @@ for controlling simulated smart home devices.
 """
 
 from typing import Dict, Any, List, Optional
+from collections import OrderedDict
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
 
-# Added for Hugging Face integration
-from transformers import pipeline
 import re
 
 # Import shared constants
 import config
+from fast_path import FastPathMatcher, DEVICE_WORDS
+from classifiers import import_runtime, load_classifier, backend_model_name, BACKEND_EMBEDDING
+from inference_pool import InferencePool
+from metrics import METRICS, SCORE_BUCKETS
+
+logger = logging.getLogger(__name__)
+
+# Parameter extraction patterns, shared by the model and fast-path routes
+TEMPERATURE_PATTERN = re.compile(r'(\d+)(?:\s*°?C|\s*degrees)?')
+AMOUNT_PATTERN = re.compile(r'by\s+(\d+)(?:\s*°?C|\s*degrees)?')
+PAGE_PATTERN = re.compile(r'page\s+(\d+)', re.IGNORECASE)
+# Words that widen a command from the default device to every matching device
+GROUP_TARGET_PATTERN = re.compile(r'\b(?:all|every|each|both|lights|fans|thermostats)\b', re.IGNORECASE)
+# Words that may sit next to a device word without naming a room or device ("turn on the main light")
+_TARGET_FILLER_WORDS = frozenset(
+    [word for words in DEVICE_WORDS.values() for word in words]
+    + "here there the a an my our your his her their this that these those it its all every each both turn "
+      "switch set make put get show check tell increase decrease raise lower reduce dim start stop on off up down to of by at for please can "
+      "could would will you me is are was s what whats how status speed level current main room house home "
+      "indoor and then also now again in minute minutes hour hours".split())
+_DEVICE_WORD_SET = frozenset(word for words in DEVICE_WORDS.values() for word in words)
+# Articles, possessives and quantifiers that introduce a room or name ("the garage light")
+_TARGET_DETERMINERS = frozenset("the a an my our your his her their this that these those all every each both".split())
+_WORD_PATTERN = re.compile(r'[a-z]+')
+
+# Compound utterances split at commas, semicolons and joining words ("and", "then", "also")
+CLAUSE_SPLIT_PATTERN = re.compile(r'\s*[,;]\s*(?:(?:and|then|also)\s+)*|\s+(?:and\s+then|and|then|also)\s+',
+                                  re.IGNORECASE)
+# A fragment without any of these words is not a command of its own ("the light and the fan").
+# "on" and "off" alone do not count, so "is the light on and the fan off" stays one question
+_CLAUSE_ACTION_PATTERN = re.compile(
+    r'\b(?:turn|switch|set|make|put|increase|decrease|raise|lower|reduce|start|stop|'
+    r'warmer|cooler|colder|hotter|what|whats|how|is|are|status|check|show)\b', re.IGNORECASE)
+
+# Normalization patterns for classification cache keys
+_NUMBER_PATTERN = re.compile(r'\d+(?:[.,]\d+)?')
+_PUNCTUATION_PATTERN = re.compile(r'[^\w\s]')
+
+
+def normalize_utterance(user_input: str) -> str:
+    """
+    Reduce a command to the form used as its classification cache key.
+
+    Lowercases, replaces numeric literals with a placeholder and collapses
+    punctuation and whitespace, so "Set to 21!" and "set to 24" share a key.
+    """
+    text = _NUMBER_PATTERN.sub(" NUM ", user_input.lower())
+    text = _PUNCTUATION_PATTERN.sub(" ", text)
+    return " ".join(text.split())
+
+
+def split_clauses(user_input: str) -> List[str]:
+    """
+    Split a compound utterance into its command clauses, in order.
+
+    "turn on the light and set the fan to high, then make it warmer" becomes
+    three clauses. Fragments that carry no action word are joined back onto
+    the previous clause, so "turn off the light and the fan" stays whole.
+
+    Args:
+        user_input (str): The natural language command from the user
+
+    Returns:
+        list: Clauses with surrounding whitespace and punctuation stripped
+    """
+    boundaries = [0]
+    for match in CLAUSE_SPLIT_PATTERN.finditer(user_input):
+        boundaries.extend([match.start(), match.end()])
+    boundaries.append(len(user_input))
+
+    spans: List[List[int]] = []
+    for start, end in zip(boundaries[::2], boundaries[1::2]):
+        fragment = user_input[start:end].strip(" \t.!?")
+        if not fragment:
+            continue
+        if spans and not _CLAUSE_ACTION_PATTERN.search(fragment):
+            # Extend the previous clause over the joining word
+            spans[-1][1] = end
+        else:
+            spans.append([start, end])
+    return [user_input[start:end].strip(" \t.!?") for start, end in spans]
+
+
+def unresolved_qualifier(text: str) -> Optional[str]:
+    """
+    Words that look like a room or device name qualifying a device word.
+
+    Only the forms a room or name takes count: words between a determiner
+    and the first device word ("garage" in "turn on the garage light"), and
+    words after "in" and a determiner ("in the garage"). Other words before
+    a device word ("I need some light", "give me more light") are phrasing,
+    not a name, and leave the command on the default device.
+
+    Returns:
+        str: The qualifier, or None when the text names no room or device
+    """
+    words = _WORD_PATTERN.findall(text.lower())
+    qualifier = []
+    for position, word in enumerate(words):
+        if word in _DEVICE_WORD_SET:
+            start = position
+            while start > 0 and words[start - 1] not in _TARGET_FILLER_WORDS:
+                start -= 1
+            if start < position and start > 0 and words[start - 1] in _TARGET_DETERMINERS:
+                qualifier.extend(words[start:position])
+            break
+    for position, word in enumerate(words[:-1]):
+        if word == "in" and words[position + 1] in _TARGET_DETERMINERS:
+            for following in words[position + 2:]:
+                if following in _TARGET_FILLER_WORDS:
+                    break
+                qualifier.append(following)
+    return " ".join(qualifier) or None
+
+
+def resolve_target(registry, text: str) -> Dict[str, Any]:
+    """
+    Work out which devices a command or rule subject refers to.
+
+    Names and rooms are looked up in the registry's indexes, trying each
+    short phrase of the text rather than scanning the devices. When the text
+    qualifies a device word with words that are neither a registered name nor
+    a room ("the garage light"), the target is marked unresolved so it selects
+    no device instead of the type's default one.
+
+    Args:
+        registry (DeviceRegistry): Devices to resolve against, or None
+        text (str): The natural language command or subject
+
+    Returns:
+        dict: {'name', 'room', 'all', 'unresolved'} target selector for DeviceRegistry.select
+    """
+    target = {"name": None, "room": None, "all": bool(GROUP_TARGET_PATTERN.search(text)), "unresolved": None}
+    if registry is not None:
+        target["name"] = registry.match_name(text)
+        if target["name"] is None:
+            target["room"] = registry.match_room(text)
+        if target["name"] is None and target["room"] is None:
+            target["unresolved"] = unresolved_qualifier(text)
+    return target
+
+
+class ClassificationCache:
+    """
+    Bounded LRU cache of top classifications keyed on normalized utterances.
+
+    Only the top label and score are stored; parameters are always extracted
+    from the actual input, so phrasings that differ only in their numbers can
+    share an entry. Keys are prefixed with a fingerprint of the model name,
+    parser mode and label set, so changing any of them invalidates old entries.
+    An optional SQLite file persists entries across restarts.
+    """
+
+    def __init__(self, fingerprint: str, max_size: int, path: Optional[str] = None):
+        """
+        Create the cache, opening the persistent store if a path is given.
+
+        Args:
+            fingerprint (str): Identifies the model and label set the entries belong to
+            max_size (int): Maximum number of entries kept in memory
+            path (str): Optional SQLite file for persistence across restarts
+        """
+        self.fingerprint = fingerprint
+        self.max_size = max_size
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # Serializes use of the SQLite connection, separately from the in-memory entries
+        self._db_lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS classifications (key TEXT PRIMARY KEY, label TEXT, score REAL)"
+            )
+            self._db.commit()
+
+    def _key(self, user_input: str) -> str:
+        return f"{self.fingerprint}:{normalize_utterance(user_input)}"
+
+    def get(self, user_input: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up the cached classification for a command.
+
+        Returns:
+            dict: Classification with 'labels' and 'scores', or None on a miss
+        """
+        key = self._key(user_input)
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+        if entry is None and self._db is not None:
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT label, score FROM classifications WHERE key = ?", (key,)
+                ).fetchone()
+            if row is not None:
+                entry = tuple(row)
+                with self._lock:
+                    self._remember(key, entry)
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return {"labels": [entry[0]], "scores": [entry[1]]}
+
+    def put(self, user_input: str, classification: Dict[str, Any]):
+        """Store the top label and score of a classification."""
+        self.put_many([(user_input, classification)])
+
+    def put_many(self, items: List[tuple]):
+        """
+        Store the top label and score of several classifications.
+
+        The persistent store gets them in one executemany and one commit,
+        made outside the in-memory lock so lookups are not held up by disk writes.
+
+        Args:
+            items (list): (user_input, classification) pairs
+        """
+        rows = [(self._key(user_input), classification['labels'][0], float(classification['scores'][0]))
+                for user_input, classification in items]
+        if not rows:
+            return
+        with self._lock:
+            for key, label, score in rows:
+                self._remember(key, (label, score))
+        if self._db is not None:
+            with self._db_lock:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO classifications (key, label, score) VALUES (?, ?, ?)", rows
+                )
+                self._db.commit()
+
+    def _remember(self, key: str, entry: tuple):
+        """Insert into the in-memory LRU, evicting the least recently used entry when full."""
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
 
 class CommandParser:
     """
@@ -20,13 +268,28 @@ class CommandParser:
     to parse natural language commands for smart home devices.
     """
 
-    def __init__(self):
+    def __init__(self, registry=None, classifier=None, cascade=None):
         """
         Initialize the command parser with devices, actions, and the classification pipeline.
-        Raises RuntimeError if the Hugging Face model cannot be loaded.
+
+        Args:
+            registry (DeviceRegistry): Devices whose names and rooms can be targeted;
+                                       without one, commands always target the default device
+            classifier (callable): Ready classifier with the pipeline's calling convention
+                                   (e.g. a stand-in for benchmarks); no model is loaded then
+            cascade (list): (classifier, threshold) pairs tried in order before the main
+                            classifier, instead of the stages in config.CASCADE_STAGES
+
+        With config.BACKGROUND_MODEL_LOADING the model loads and warms up on a
+        background thread, and the first command that needs it waits for it.
+        Otherwise loading happens here and RuntimeError is raised if it fails.
+        With config.INFERENCE_WORKERS > 1 loading always happens here, since the
+        inference workers must be forked from the main thread; construct the
+        parser before starting any other thread then.
         """
         # Use constants for device types
         self.supported_devices = config.SUPPORTED_DEVICES
+        self.registry = registry
 
         # Define action labels (could move to config if they become numerous)
         # Using f-strings with device constants for consistency
@@ -42,18 +305,183 @@ class CommandParser:
                 f"decrease {config.DEVICE_THERMOSTAT} temperature", f"get {config.DEVICE_THERMOSTAT} status"
             ]
         }
+        self.all_devices_label = "get status of all devices"
+        self.all_devices_off_label = "turn off all devices"
+        self.all_device_actions = [self.all_devices_label, self.all_devices_off_label]
         self.all_possible_labels = [action for actions in self.device_actions.values() for action in actions]
-        self.all_possible_labels.append("get status of all devices")
-        self.classifier = None # Initialize classifier attribute
+        self.all_possible_labels.extend(self.all_device_actions)
+
+        # Device labels for the first stage of hierarchical classification
+        self.device_labels = {
+            config.DEVICE_LIGHT: config.DEVICE_LIGHT,
+            config.DEVICE_FAN: config.DEVICE_FAN,
+            config.DEVICE_THERMOSTAT: f"{config.DEVICE_THERMOSTAT} temperature",
+            "all": "all devices"
+        }
+        self._mode = config.PARSER_MODE
+        self.backend = config.CLASSIFIER_BACKEND
+        self.model_name = backend_model_name(self.backend)
+        if classifier is not None:
+            self.backend = "injected"
+            self.model_name = getattr(classifier, "model_name", type(classifier).__name__)
+        self.optimized = config.CPU_OPTIMIZED
+        # Confidence cascade stages before the main classifier: {'name', 'threshold', 'classifier',
+        # 'classified', 'accepted'}; configured stages get their classifier when the models load
+        if cascade is not None:
+            stages = [(getattr(stage, "model_name", type(stage).__name__), threshold, stage)
+                      for stage, threshold in cascade]
+        elif classifier is not None:
+            stages = []
+        else:
+            stages = [(stage.get("model") or backend_model_name(stage.get("backend", BACKEND_EMBEDDING)),
+                       stage["threshold"], None) for stage in config.CASCADE_STAGES]
+        self.cascade = [{"name": name, "threshold": threshold, "classifier": stage, "classified": 0, "accepted": 0}
+                        for name, threshold, stage in stages]
+        # Commands that escalated through every cascade stage to the main classifier
+        self.cascade_escalated = 0
+        # Number of model forward passes so far (one per (utterance, hypothesis) pair for zero-shot)
+        self.forward_passes = 0
+        # Deterministic grammar consulted before the model
+        self.fast_path = FastPathMatcher(self.device_actions, self.all_devices_label, self.all_devices_off_label)
+        self.fast_path_enabled = config.FAST_PATH_ENABLED
+        # Classification cache, disabled when its size is 0
+        self.cache = None
+        if config.CLASSIFICATION_CACHE_SIZE > 0:
+            self.cache = ClassificationCache(self._cache_fingerprint(),
+                                             config.CLASSIFICATION_CACHE_SIZE,
+                                             config.CLASSIFICATION_CACHE_PATH)
+        self._classifier = None # Initialize classifier attribute
+        self._ready = threading.Event()
+        self.load_error = None
+        # Startup phase -> seconds, filled in as loading progresses
+        self.timings: Dict[str, float] = {}
+
+        if classifier is not None:
+            self._load_model(classifier)
+        elif config.BACKGROUND_MODEL_LOADING and config.INFERENCE_WORKERS <= 1:
+            threading.Thread(target=self._load_model, name="model-loader", daemon=True).start()
+        else:
+            self._load_model()
+            if self.load_error is not None:
+                raise RuntimeError(f"Failed to load Hugging Face model: {self.load_error}")
+
+    def _load_model(self, classifier=None):
+        """
+        Import the ML runtime, load the classifier backend and run a warm-up inference.
 
-        # Load the zero-shot classification pipeline using model name from config
+        Args:
+            classifier (callable): Already loaded classifier; only the warm-up runs
+        """
+        start = time.perf_counter()
         try:
-            print("Loading Hugging Face model...")
-            self.classifier = pipeline("zero-shot-classification", model=config.MODEL_NAME)
-            print("Model loaded successfully.")
+            if classifier is None:
+                logger.info("Loading Hugging Face model...")
+                import_runtime()
+            loaded = time.perf_counter()
+            self.timings["import"] = loaded - start
+
+            if classifier is None:
+                classifier = load_classifier(self.backend,
+                                             self.all_possible_labels + list(self.device_labels.values()),
+                                             self.optimized)
+            for stage, stage_config in zip(self.cascade, config.CASCADE_STAGES):
+                if stage["classifier"] is None:
+                    stage["classifier"] = load_classifier(stage_config.get("backend", BACKEND_EMBEDDING),
+                                                          self.all_possible_labels, self.optimized,
+                                                          model_name=stage_config.get("model"))
+            if config.INFERENCE_WORKERS > 1:
+                # Fork workers only now, so they inherit the loaded weights (on the main thread,
+                # see __init__)
+                classifier = InferencePool(classifier, config.INFERENCE_WORKERS,
+                                           config.INFERENCE_THREADS_PER_WORKER)
+            self.timings["load"] = time.perf_counter() - loaded
+
+            # The first inference pays one-off allocation costs; pay them before a user does
+            # (one utterance per pool worker, so every worker is warmed up)
+            warmup_start = time.perf_counter()
+            classifier([config.WARMUP_UTTERANCE] * getattr(classifier, "workers", 1),
+                       self.all_possible_labels, multi_label=False)
+            for stage in self.cascade:
+                stage["classifier"]([config.WARMUP_UTTERANCE], self.all_possible_labels, multi_label=False)
+            self.timings["first_inference"] = time.perf_counter() - warmup_start
+
+            self._classifier = classifier
+            logger.info("Model loaded successfully.")
         except Exception as e:
-            print(f"Fatal Error: Could not load Hugging Face model: {e}")
-            raise RuntimeError(f"Failed to load Hugging Face model: {e}")
+            logger.error("Could not load Hugging Face model: %s", e)
+            self.load_error = e
+        finally:
+            self.timings["total"] = time.perf_counter() - start
+            self._ready.set()
+
+    def close(self):
+        """Stop the inference worker processes, if any."""
+        if isinstance(self._classifier, InferencePool):
+            self._classifier.close()
+
+    @property
+    def classifier(self):
+        """The loaded classifier, waiting for background loading to finish; None if loading failed."""
+        self._ready.wait()
+        return self._classifier
+
+    @property
+    def is_ready(self) -> bool:
+        """Whether model loading has finished, successfully or not."""
+        return self._ready.is_set()
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until model loading finishes.
+
+        Args:
+            timeout (float): Maximum seconds to wait, or None to wait indefinitely
+
+        Returns:
+            bool: True if loading finished within the timeout
+        """
+        return self._ready.wait(timeout)
+
+    def startup_report(self) -> str:
+        """Describe how long each startup phase took."""
+        if not self.is_ready:
+            return "Model is still loading."
+        if self.load_error is not None:
+            return f"Model failed to load: {self.load_error}"
+        report = (f"Startup timings: import {self.timings['import']:.2f}s, "
+                  f"weight load {self.timings['load']:.2f}s, "
+                  f"first inference {self.timings['first_inference']:.2f}s "
+                  f"(total {self.timings['total']:.2f}s)")
+        if isinstance(self._classifier, InferencePool):
+            for worker in self._classifier.memory_report():
+                report += (f"\nInference worker {worker['pid']}: "
+                           f"RSS {worker['rss_kb']} KiB, PSS {worker['pss_kb']} KiB")
+        if self.fast_path_enabled:
+            report += "\n" + self.fast_path_report()
+        if self.cascade:
+            report += "\n" + self.cascade_report()
+        return report
+
+    def fast_path_report(self) -> str:
+        """Describe how many commands the fast-path grammar resolved without the model."""
+        if not self.fast_path_enabled:
+            return "Fast path is disabled."
+        fast_path = self.fast_path
+        return (f"Fast path: resolved {fast_path.hits} of {fast_path.hits + fast_path.misses} commands "
+                f"({fast_path.hit_rate:.1%})")
+
+    def cascade_report(self) -> str:
+        """Describe how many commands each cascade stage accepted and how many escalated."""
+        if not self.cascade:
+            return "Confidence cascade is disabled."
+        lines = []
+        for stage in self.cascade:
+            escalated = stage["classified"] - stage["accepted"]
+            rate = f"{escalated / stage['classified']:.1%}" if stage["classified"] else "n/a"
+            lines.append(f"{stage['name']} (threshold {stage['threshold']:g}): accepted {stage['accepted']} "
+                         f"of {stage['classified']}, escalated {escalated} ({rate})")
+        lines.append(f"{self.model_name} (final): classified {self.cascade_escalated}")
+        return "Confidence cascade:\n" + "\n".join(lines)
 
     def parse_command(self, user_input: str) -> Dict[str, Any]:
         """
@@ -65,79 +493,450 @@ class CommandParser:
         Returns:
             dict: Structured command with device, action, and parameters, or an error dictionary.
         """
+        # Common phrasings resolve without the model
+        fast_result = self._try_fast_path(user_input)
+        if fast_result is not None:
+            return fast_result
+
         if not self.classifier:
              # This case should ideally not be reached if __init__ raises an error
+             METRICS.increment("errors_total", type="model_not_loaded")
              return {"error": "Command parser model is not loaded."}
 
         try:
             # Perform classification
-            classification = self.classifier(user_input, self.all_possible_labels, multi_label=False)
-
-            # Get the highest probability label
-            best_label = classification['labels'][0]
-            best_score = classification['scores'][0]
-
-            print(f"HF Classification: Label='{best_label}', Score={best_score:.4f}")
-
-            # Confidence threshold from config
-            CONFIDENCE_THRESHOLD = config.CLASSIFICATION_THRESHOLD
-            if best_score < CONFIDENCE_THRESHOLD:
-                 print(f"Confidence score {best_score:.4f} below threshold {CONFIDENCE_THRESHOLD}.")
-                 return {"error": f"Could not confidently understand the command (Score: {best_score:.2f}). Please rephrase."}
-
-            result = {
-                "device": None,
-                "action": None,
-                "parameters": {},
-                "is_query": False
-            }
-
-            # Map the best label back to device and action
-            if best_label == "get status of all devices":
-                result["device"] = "all"
-                result["action"] = "status"
-                result["is_query"] = True
-            else:
-                # Find which device this action belongs to
-                for device, actions in self.device_actions.items():
-                    if best_label in actions:
-                        result["device"] = device
-                        # Extract action type from the label
-                        parts = best_label.split()
-                        if parts[0] == "get":
-                            result["action"] = "status"
-                            result["is_query"] = True
-                        elif parts[0] == "turn":
-                            result["action"] = f"turn_{parts[1]}"
-                        elif parts[0] == "set":
-                            if "speed" in best_label:
-                                result["action"] = "set_speed"
-                                result["parameters"]["speed_level"] = parts[-1].upper()
-                            elif "temperature" in best_label:
-                                result["action"] = "set_temperature"
-                                # Use regex to extract temperature from original input
-                                temp_match = re.search(r'(\d+)(?:\s*°?C|\s*degrees)?', user_input)
-                                if temp_match:
-                                    result["parameters"]["temp"] = float(temp_match.group(1))
-                                else:
-                                     # If keyword matched but value didn't, ask for value
-                                     return {"error": f"Please specify the temperature value (e.g., 'set temperature to 22')."}
-                        elif parts[0] in ["increase", "decrease"]:
-                            result["action"] = f"{parts[0]}_temperature"
-                            # Use regex to extract amount from original input if specified
-                            # Use constant for default amount check if needed, though controller handles default
-                            amount_match = re.search(r'by\s+(\d+)(?:\s*°?C|\s*degrees)?', user_input)
-                            if amount_match:
-                                result["parameters"]["amount"] = float(amount_match.group(1))
-                        break # Stop searching once device/action is found
-
-            # Error if mapping fails (shouldn't happen with current logic)
-            if result["device"] is None or result["action"] is None:
-                 print(f"Internal Error: Could not map label '{best_label}' to a device/action.")
-                 return {"error": f"Internal error processing action: {best_label}"}
-
-            return result
+            with METRICS.stage("classify"):
+                classification = self._classify([user_input])[0]
+            return self._interpret(user_input, classification)
 
         except Exception as e:
-            print(f"Error during Hugging Face parsing: {e}")
+            logger.exception("Error during Hugging Face parsing")
+            METRICS.increment("errors_total", type=type(e).__name__)
             return {"error": f"An error occurred during command parsing: {e}"}
+
+    def parse_commands(self, user_inputs: List[str], batch_size: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Parse many natural language commands in batched inference passes.
+
+        The zero-shot pipeline expands each input into one (utterance, hypothesis)
+        pair per label; passing the inputs as a list lets it pack those pairs from
+        many utterances into each forward pass instead of running them command by command.
+
+        Args:
+            user_inputs (list): The natural language commands to parse
+            batch_size (int): Number of (utterance, hypothesis) pairs per forward pass
+                              (default: config.PARSER_BATCH_SIZE)
+
+        Returns:
+            list: One structured command or error dictionary per input, in input order.
+        """
+        batch_size = batch_size or config.PARSER_BATCH_SIZE
+        results: List[Optional[Dict[str, Any]]] = [None] * len(user_inputs)
+
+        # Empty inputs cannot be classified; report them without sending them to the model.
+        # Fast-path matches are resolved here and never reach the model either.
+        pending = []
+        for index, user_input in enumerate(user_inputs):
+            if not (isinstance(user_input, str) and user_input.strip()):
+                METRICS.increment("errors_total", type="empty_command")
+                results[index] = {"error": "Empty command. Please enter a command."}
+                continue
+            fast_result = self._try_fast_path(user_input)
+            if fast_result is not None:
+                results[index] = fast_result
+            else:
+                pending.append(index)
+
+        # Only wait for the model if something actually needs it
+        if pending and not self.classifier:
+            METRICS.increment("errors_total", len(pending), type="model_not_loaded")
+            for index in pending:
+                results[index] = {"error": "Command parser model is not loaded."}
+            return results
+
+        # Classify in chunks so memory stays bounded for very long replay lists
+        chunk_size = max(batch_size, config.PARSER_CHUNK_SIZE)
+        for chunk_start in range(0, len(pending), chunk_size):
+            chunk = pending[chunk_start:chunk_start + chunk_size]
+            texts = [user_inputs[index] for index in chunk]
+            try:
+                with METRICS.stage("classify"):
+                    classifications = self._classify(texts, batch_size=batch_size)
+            except Exception as e:
+                # One bad input fails the whole batch; retry one by one so errors stay per item
+                logger.warning("Batched parsing failed (%s); retrying commands individually.", e)
+                for index in chunk:
+                    results[index] = self.parse_command(user_inputs[index])
+                continue
+
+            for index, classification in zip(chunk, classifications):
+                try:
+                    results[index] = self._interpret(user_inputs[index], classification)
+                except Exception as e:
+                    logger.exception("Error during Hugging Face parsing")
+                    METRICS.increment("errors_total", type=type(e).__name__)
+                    results[index] = {"error": f"An error occurred during command parsing: {e}"}
+
+        return results
+
+    def parse_compound(self, user_input: str) -> List[Dict[str, Any]]:
+        """
+        Parse an utterance that may hold several commands.
+
+        Args:
+            user_input (str): The natural language command from the user
+
+        Returns:
+            list: One structured command or error dictionary per clause, in spoken order
+        """
+        return self.parse_compound_commands([user_input])[0]
+
+    def parse_compound_commands(self, user_inputs: List[str],
+                                batch_size: Optional[int] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Split each utterance into clauses and parse every clause in one batched call.
+
+        Each clause is interpreted on its own text, so parameters such as a
+        temperature or a "by N" amount come from the clause they belong to.
+
+        Args:
+            user_inputs (list): The natural language commands to parse
+            batch_size (int): Pairs per forward pass (default: config.PARSER_BATCH_SIZE)
+
+        Returns:
+            list: For each input, the list of its parsed clauses in order
+        """
+        clauses: List[str] = []
+        counts: List[int] = []
+        for user_input in user_inputs:
+            parts = split_clauses(user_input) if isinstance(user_input, str) else []
+            if len(parts) <= 1:
+                # Single commands are classified exactly as typed
+                parts = [user_input]
+            clauses.extend(parts)
+            counts.append(len(parts))
+
+        parsed = self.parse_commands(clauses, batch_size=batch_size)
+        grouped = []
+        position = 0
+        for count in counts:
+            grouped.append(parsed[position:position + count])
+            position += count
+        return grouped
+
+    def _try_fast_path(self, user_input: str) -> Optional[Dict[str, Any]]:
+        """
+        Resolve a command through the fast-path grammar when enabled.
+
+        Args:
+            user_input (str): The natural language command from the user
+
+        Returns:
+            dict: Structured command or error dictionary, or None if the model must classify it
+        """
+        if not self.fast_path_enabled:
+            return None
+        with METRICS.stage("fast_path"):
+            label = self.fast_path.match(user_input)
+        METRICS.set_gauge("fast_path_hit_rate", self.fast_path.hit_rate)
+        if label is None:
+            return None
+        return self._interpret(user_input, {"labels": [label], "scores": [1.0]}, source="Fast-path")
+
+    def _run_classifier(self, texts: List[str], labels: List[str], batch_size: Optional[int] = None,
+                        classifier=None) -> List[Dict[str, Any]]:
+        """
+        Score texts against candidate labels, always returning one result per text.
+
+        Args:
+            texts (list): Utterances to classify
+            labels (list): Candidate hypothesis labels
+            batch_size (int): Pairs per forward pass, or None for the pipeline default
+            classifier (callable): Classifier to run (default: the main classifier)
+
+        Returns:
+            list: Pipeline outputs with 'labels' and 'scores' sorted by score
+        """
+        classifier = classifier or self.classifier
+        kwargs = {"multi_label": False}
+        if batch_size:
+            kwargs["batch_size"] = batch_size
+        passes_per_input = getattr(classifier, "passes_per_input", None) or len(labels)
+        self.forward_passes += len(texts) * passes_per_input
+        with METRICS.stage("inference"):
+            classifications = classifier(texts, labels, **kwargs)
+        if isinstance(classifications, dict):
+            classifications = [classifications]
+        return classifications
+
+    @property
+    def mode(self) -> str:
+        """Classification mode, "flat" or "hierarchical"."""
+        return self._mode
+
+    @mode.setter
+    def mode(self, value: str):
+        self._mode = value
+        # Cached classifications are only valid for the mode that produced them
+        if self.cache is not None:
+            self.cache.fingerprint = self._cache_fingerprint()
+
+    def _cache_fingerprint(self) -> str:
+        """Hash of everything that determines a classification besides the input."""
+        identity = "\n".join([self.backend, self.model_name, str(self.optimized), self.mode]
+                             + [f"{stage['name']}@{stage['threshold']}" for stage in self.cascade]
+                             + self.all_possible_labels)
+        return hashlib.sha1(identity.encode("utf-8")).hexdigest()[:16]
+
+    def _classify(self, texts: List[str], batch_size: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Classify texts, serving repeated phrasings from the classification cache.
+
+        Inputs that normalize to the same key are classified once per call.
+
+        Args:
+            texts (list): Utterances to classify
+            batch_size (int): Pairs per forward pass, or None for the pipeline default
+
+        Returns:
+            list: One classification per text, labelled with entries of all_possible_labels
+        """
+        if self.cache is None:
+            return self._classify_uncached(texts, batch_size)
+
+        classifications: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+        # Normalized key -> indices of the texts waiting on it
+        missing: Dict[str, List[int]] = {}
+        for index, text in enumerate(texts):
+            key = normalize_utterance(text)
+            if key in missing:
+                missing[key].append(index)
+                continue
+            cached = self.cache.get(text)
+            if cached is not None:
+                classifications[index] = cached
+            else:
+                missing[key] = [index]
+
+        if missing:
+            groups = list(missing.values())
+            results = self._classify_uncached([texts[group[0]] for group in groups], batch_size)
+            for group, result in zip(groups, results):
+                for index in group:
+                    classifications[index] = result
+            # One write (and one SQLite commit) for all the new entries
+            self.cache.put_many([(texts[group[0]], result) for group, result in zip(groups, results)])
+
+        return classifications
+
+    def _classify_uncached(self, texts: List[str], batch_size: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Classify texts against the action labels, through the cascade stages and then
+        the main classifier in the configured parser mode.
+
+        Args:
+            texts (list): Utterances to classify
+            batch_size (int): Pairs per forward pass, or None for the pipeline default
+
+        Returns:
+            list: One classification per text, labelled with entries of all_possible_labels
+        """
+        if not self.cascade:
+            return self._classify_model(texts, batch_size)
+
+        classifications: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+        pending = list(range(len(texts)))
+        for stage in self.cascade:
+            if not pending:
+                break
+            with METRICS.stage(f"cascade:{stage['name']}"):
+                results = self._run_classifier([texts[index] for index in pending], self.all_possible_labels,
+                                               batch_size, classifier=stage["classifier"])
+            # A stage never accepts what the final check would reject; such commands escalate instead
+            threshold = max(stage["threshold"], config.CLASSIFICATION_THRESHOLD)
+            escalated = []
+            for index, result in zip(pending, results):
+                if result["scores"][0] >= threshold:
+                    classifications[index] = result
+                else:
+                    escalated.append(index)
+            stage["classified"] += len(pending)
+            stage["accepted"] += len(pending) - len(escalated)
+            METRICS.increment("cascade_total", len(pending) - len(escalated), stage=stage["name"], outcome="accepted")
+            METRICS.increment("cascade_total", len(escalated), stage=stage["name"], outcome="escalated")
+            pending = escalated
+
+        if pending:
+            results = self._classify_model([texts[index] for index in pending], batch_size)
+            self.cascade_escalated += len(pending)
+            for index, result in zip(pending, results):
+                classifications[index] = result
+        return classifications
+
+    def _classify_model(self, texts: List[str], batch_size: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Classify texts with the main classifier in the configured parser mode."""
+        if self.mode == "hierarchical":
+            return self._classify_hierarchical(texts, batch_size)
+        return self._run_classifier(texts, self.all_possible_labels, batch_size)
+
+    def _classify_hierarchical(self, texts: List[str], batch_size: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Two-stage classification: pick the device first, then score only its actions.
+
+        Utterances whose top device score is below config.HIERARCHICAL_DEVICE_THRESHOLD
+        are ambiguous and fall back to scoring the flat label list.
+
+        Args:
+            texts (list): Utterances to classify
+            batch_size (int): Pairs per forward pass, or None for the pipeline default
+
+        Returns:
+            list: One classification per text, labelled with entries of all_possible_labels
+        """
+        label_to_device = {label: device for device, label in self.device_labels.items()}
+        device_results = self._run_classifier(texts, list(self.device_labels.values()), batch_size)
+
+        classifications: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+        # Group utterances by predicted device so each group is scored in one batch
+        groups: Dict[Optional[str], List[int]] = {}
+        for index, device_result in enumerate(device_results):
+            device = label_to_device[device_result['labels'][0]]
+            device_score = device_result['scores'][0]
+            if device_score < config.HIERARCHICAL_DEVICE_THRESHOLD:
+                groups.setdefault(None, []).append(index)
+            else:
+                groups.setdefault(device, []).append(index)
+
+        for device, indices in groups.items():
+            if device is None:
+                labels = self.all_possible_labels
+            elif device == "all":
+                labels = self.all_device_actions
+            else:
+                labels = self.device_actions[device]
+            results = self._run_classifier([texts[index] for index in indices], labels, batch_size)
+            for index, result in zip(indices, results):
+                classifications[index] = result
+
+        return classifications
+
+    def _interpret(self, user_input: str, classification: Dict[str, Any], source: str = "HF") -> Dict[str, Any]:
+        """
+        Map a classification to a structured command, recording it in the metrics.
+
+        Args:
+            user_input (str): The original command, used for parameter extraction
+            classification (dict): Pipeline output with 'labels' and 'scores' sorted by score
+            source (str): Which route produced the classification, for logging
+
+        Returns:
+            dict: Structured command with device, action, and parameters, or an error dictionary.
+        """
+        METRICS.increment("commands_total", source=source)
+        with METRICS.stage("interpret"):
+            return self._map_classification(user_input, classification, source)
+
+    def _map_classification(self, user_input: str, classification: Dict[str, Any],
+                            source: str = "HF") -> Dict[str, Any]:
+        """
+        Map a zero-shot classification result to a structured command.
+
+        Args:
+            user_input (str): The original command, used for parameter extraction
+            classification (dict): Pipeline output with 'labels' and 'scores' sorted by score
+            source (str): Which route produced the classification, for logging
+
+        Returns:
+            dict: Structured command with device, action, and parameters, or an error dictionary.
+        """
+        # Get the highest probability label
+        best_label = classification['labels'][0]
+        best_score = classification['scores'][0]
+
+        logger.debug("%s Classification: Label='%s', Score=%.4f", source, best_label, best_score)
+        METRICS.observe("classification_score", best_score, buckets=SCORE_BUCKETS, source=source)
+
+        # Confidence threshold from config
+        CONFIDENCE_THRESHOLD = config.CLASSIFICATION_THRESHOLD
+        if best_score < CONFIDENCE_THRESHOLD:
+             logger.info("Confidence score %.4f below threshold %s.", best_score, CONFIDENCE_THRESHOLD)
+             METRICS.increment("below_threshold_total", source=source)
+             return {"error": f"Could not confidently understand the command (Score: {best_score:.2f}). Please rephrase.",
+                     "score": float(best_score)}
+
+        result = {
+            "device": None,
+            "action": None,
+            "parameters": {},
+            "is_query": False,
+            "score": float(best_score)
+        }
+
+        # Map the best label back to device and action
+        if best_label == self.all_devices_label:
+            result["device"] = "all"
+            result["action"] = "status"
+            result["is_query"] = True
+            page_match = PAGE_PATTERN.search(user_input)
+            if page_match:
+                result["parameters"]["page"] = int(page_match.group(1))
+        elif best_label == self.all_devices_off_label:
+            result["device"] = "all"
+            result["action"] = "turn_off"
+        else:
+            # Find which device this action belongs to
+            for device, actions in self.device_actions.items():
+                if best_label in actions:
+                    result["device"] = device
+                    # Extract action type from the label
+                    parts = best_label.split()
+                    if parts[0] == "get":
+                        result["action"] = "status"
+                        result["is_query"] = True
+                    elif parts[0] == "turn":
+                        result["action"] = f"turn_{parts[1]}"
+                    elif parts[0] == "set":
+                        if "speed" in best_label:
+                            result["action"] = "set_speed"
+                            result["parameters"]["speed_level"] = parts[-1].upper()
+                        elif "temperature" in best_label:
+                            result["action"] = "set_temperature"
+                            # Use regex to extract temperature from original input
+                            temp_match = TEMPERATURE_PATTERN.search(user_input)
+                            if temp_match:
+                                result["parameters"]["temp"] = float(temp_match.group(1))
+                            else:
+                                 # If keyword matched but value didn't, ask for value
+                                 METRICS.increment("errors_total", type="missing_parameter")
+                                 return {"error": f"Please specify the temperature value (e.g., 'set temperature to 22')."}
+                    elif parts[0] in ["increase", "decrease"]:
+                        result["action"] = f"{parts[0]}_temperature"
+                        # Use regex to extract amount from original input if specified
+                        # Use constant for default amount check if needed, though controller handles default
+                        amount_match = AMOUNT_PATTERN.search(user_input)
+                        if amount_match:
+                            result["parameters"]["amount"] = float(amount_match.group(1))
+                    break # Stop searching once device/action is found
+
+        # Error if mapping fails (shouldn't happen with current logic)
+        if result["device"] is None or result["action"] is None:
+             logger.error("Could not map label '%s' to a device/action.", best_label)
+             METRICS.increment("errors_total", type="unmapped_label")
+             return {"error": f"Internal error processing action: {best_label}"}
+
+        if result["device"] != "all":
+            result["target"] = self._resolve_target(user_input)
+
+        return result
+
+    def _resolve_target(self, user_input: str) -> Dict[str, Any]:
+        """
+        Work out which devices a command refers to, e.g. "the bedroom fan" or "all kitchen lights".
+
+        Args:
+            user_input (str): The natural language command from the user
+
+        Returns:
+            dict: {'name', 'room', 'all', 'unresolved'} target selector for DeviceRegistry.select
+        """
+        return resolve_target(self.registry, user_input)
@@ -1,9 +1,67 @@
 # --- config.py ---
 
+import os
+
 # NLP Model Configuration
 MODEL_NAME = 'MoritzLaurer/mDeBERTa-v3-base-mnli-xnli'
 CLASSIFICATION_THRESHOLD = 0.6
 
+# Classifier backend: "zero-shot" runs one NLI pass per label with MODEL_NAME,
+# "embedding" compares one encoder pass against precomputed label embeddings
+CLASSIFIER_BACKEND = "zero-shot"
+EMBEDDING_MODEL_NAME = 'sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2'
+# Softmax temperature for embedding similarities; lower values give sharper scores.
+# None fits it when the model loads, by minimising the negative log-likelihood of the
+# labelled commands in calibration.py, so CLASSIFICATION_THRESHOLD applies to the scores
+EMBEDDING_TEMPERATURE = None
+
+# CPU-optimized inference: int8 dynamic quantization of linear layers, run under
+# torch.inference_mode with TORCH_NUM_THREADS intra-op threads (None uses all cores)
+CPU_OPTIMIZED = False
+TORCH_NUM_THREADS = None
+# Directory holding quantized weights (per model revision) so later runs skip re-quantizing;
+# an absolute path, so the cache does not depend on the working directory
+OPTIMIZED_MODEL_DIR = os.path.join(os.path.expanduser("~"), ".cache", "smart_home", "quantized")
+
+# Load the model on a background thread so the CLI prompt is usable immediately
+BACKGROUND_MODEL_LOADING = True
+# Dummy command run once after loading to warm up the model
+WARMUP_UTTERANCE = "turn on the light"
+
+# Inference worker processes forked after the model loads (1 runs inference in-process);
+# with more than 1 the model loads in the foreground, since workers are forked from the main thread
+INFERENCE_WORKERS = 1
+# torch intra-op threads per worker (None divides the cores evenly between workers)
+INFERENCE_THREADS_PER_WORKER = None
+
+# Batched parsing (CommandParser.parse_commands)
+# Number of (utterance, hypothesis) pairs sent through the model per forward pass
+PARSER_BATCH_SIZE = 32
+# Number of utterances handed to the pipeline at once, bounding memory for long replays
+PARSER_CHUNK_SIZE = 256
+
+# Classification mode: "flat" scores every action label, "hierarchical" picks
+# the device first and then scores only that device's actions
+PARSER_MODE = "flat"
+# Hierarchical mode falls back to flat scoring below this device confidence
+HIERARCHICAL_DEVICE_THRESHOLD = 0.5
+
+# Confidence cascade: cheaper classifiers tried in order before CLASSIFIER_BACKEND.
+# A stage keeps a command when its top score reaches the stage threshold (and
+# CLASSIFICATION_THRESHOLD); the rest escalate to the next stage, and the final
+# stage applies CLASSIFICATION_THRESHOLD as usual. [] disables the cascade.
+# Each stage: {"backend": "embedding" or "zero-shot", "model": name (optional), "threshold": score}
+# e.g. [{"backend": "embedding", "threshold": 0.9}] tries EMBEDDING_MODEL_NAME first
+CASCADE_STAGES = []
+
+# Resolve common phrasings with the deterministic fast-path grammar before the model
+FAST_PATH_ENABLED = True
+
+# Classification cache keyed on normalized commands (0 disables it)
+CLASSIFICATION_CACHE_SIZE = 1024
+# Optional SQLite file that persists the cache across restarts (None keeps it in memory)
+CLASSIFICATION_CACHE_PATH = None
+
 # Device Types (used as keys)
 DEVICE_LIGHT = "light"
 DEVICE_FAN = "fan"
@@ -14,6 +72,43 @@ SUPPORTED_DEVICES = [DEVICE_LIGHT, DEVICE_FAN, DEVICE_THERMOSTAT]
 DEFAULT_LIGHT_NAME = "Living Room Light"
 DEFAULT_FAN_NAME = "Living Room Fan"
 DEFAULT_THERMOSTAT_NAME = "Living Room Thermostat"
+DEFAULT_ROOM = "Living Room"
+
+# Optional JSON inventory of devices ([{"type", "name", "room", "id"}, ...]);
+# None creates the three default devices above
+DEVICE_INVENTORY_PATH = None
+# Status lines per page when listing many devices
+STATUS_PAGE_SIZE = 20
+# Initial number of device slots in the columnar state store (grows by doubling)
+STATE_STORE_INITIAL_CAPACITY = 64
+
+# Durable device state (journal.py): directory for the state journal and snapshots
+# (None keeps state in memory only)
+STATE_JOURNAL_DIR = None
+# Group commit: fsync once this many frames are pending, or after this many milliseconds
+JOURNAL_GROUP_COMMIT_SIZE = 64
+JOURNAL_FSYNC_INTERVAL_MS = 10
+# Slot records journaled before a snapshot compacts the log
+JOURNAL_SNAPSHOT_RECORDS = 200000
+
+# State history (history.py): transitions kept per device in its ring buffer
+# (memory is about 14 bytes x this value per device; 0 disables history)
+HISTORY_CAPACITY_PER_DEVICE = 1024
+
+# Rules (rules.py): limits on rules triggering rules after one change
+RULES_MAX_CASCADE_DEPTH = 8
+RULES_MAX_FIRINGS_PER_EVENT = 100
+
+# Thermal simulation (simulation.py): defaults for every simulated room
+SIM_STEP_SECONDS = 60
+SIM_OUTDOOR_TEMP = 10.0
+# Fraction of the indoor-outdoor difference lost per second (about a 4 hour time constant)
+SIM_HEAT_LOSS_RATE = 1 / (4 * 3600)
+# Largest HVAC heating/cooling rate (°C per second), and output per °C below/above the setpoint
+SIM_HVAC_RATE = 0.005
+SIM_HVAC_GAIN = 0.005
+# Extra HVAC effect with the room's fan at HIGH (0.5 = +50%)
+SIM_FAN_BOOST = 0.5
 
 # Device Specific Settings
 THERMOSTAT_MIN_TEMP = 18
@@ -25,5 +120,29 @@ THERMOSTAT_DEFAULT_ADJUST_AMOUNT = 1
 # FAN_SPEED_OFF = "OFF" ... etc.
 
 
+# Command server (server.py): address is HOST:PORT or unix:/path/to/socket
+SERVER_ADDRESS = "127.0.0.1:8765"
+# Micro-batching: commands per batch and how long to wait for a batch to fill
+SERVER_MAX_BATCH_SIZE = 32
+SERVER_MAX_WAIT_MS = 5
+
+# Streaming mode (main.py --stream): commands parsed per batched call
+STREAM_BATCH_SIZE = 64
+
+# Logging: level for the application's loggers (DEBUG shows every classification)
+LOG_LEVEL = "WARNING"
+
+# Metrics (metrics.py): off by default; when on, stage timings, counters and score
+# histograms are recorded and exported every METRICS_EXPORT_INTERVAL seconds
+METRICS_ENABLED = False
+METRICS_EXPORT_INTERVAL = 60
+# Prometheus text-format file, rewritten on every export (None to disable)
+METRICS_PROMETHEUS_PATH = None
+# Port for a /metrics HTTP endpoint on 127.0.0.1 (None to disable)
+METRICS_HTTP_PORT = None
+
 # Exit commands for main loop
 EXIT_COMMANDS = ['exit', 'quit', 'bye', 'goodbye'] 
+
+# Commands that print model startup timings
+TIMING_COMMANDS = ['timings', 'startup']
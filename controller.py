@@ -5,50 +5,305 @@ The the main controller for the smart home application is implemented,
 connecting the command parser with the device classes and handling command execution.
 """
 
-from devices import Light, Fan, Thermostat
+import logging
+import threading
+import time
+
+from devices import Light, Fan, Thermostat, Param
 from command_parser import CommandParser
+from command_engine import CommandEngine, ALL_DEVICES
+from registry import DeviceRegistry, DEVICE_CLASSES, load_inventory
+from state_store import KIND_CODES
+from journal import StateJournal
+from history import StateHistory
+from scheduler import Scheduler, parse_schedule
+from rules import RuleEngine, parse_rule, resolve_subject
+import rules
+import scheduler
 
 # Import shared constants
 import config
 
+logger = logging.getLogger(__name__)
+
 class SmartHomeController:
     """
     Main controller for the smart home application.
     Manages devices and executes commands parsed from natural language input.
     """
     
-    def __init__(self):
-        """Initialize the controller with default devices using names from config."""
-        # Initialize devices using constants for keys and default names
-        self.devices = {
-            config.DEVICE_LIGHT: Light(name=config.DEFAULT_LIGHT_NAME),
-            config.DEVICE_FAN: Fan(name=config.DEFAULT_FAN_NAME),
-            config.DEVICE_THERMOSTAT: Thermostat(name=config.DEFAULT_THERMOSTAT_NAME)
-        }
-        
-        # Initialize command parser
-        self.command_parser = CommandParser()
+    def __init__(self, registry=None, classifier=None, clock=time.time, cascade=None):
+        """
+        Initialize the controller with a device registry.
+        
+        Args:
+            registry (DeviceRegistry): Devices to control; by default they are loaded from
+                                       config.DEVICE_INVENTORY_PATH, or the three default
+                                       devices are created using names from config
+            classifier (callable): Ready classifier for the command parser, instead of
+                                   loading the configured model
+            clock (callable): Time source for state history and schedules (injectable for
+                              simulated time)
+            cascade (list): (classifier, threshold) stages for the parser's confidence
+                            cascade, instead of config.CASCADE_STAGES
+        """
+        if registry is None:
+            if config.DEVICE_INVENTORY_PATH:
+                registry = load_inventory(config.DEVICE_INVENTORY_PATH)
+            else:
+                registry = DeviceRegistry()
+                registry.add(Light(name=config.DEFAULT_LIGHT_NAME, room=config.DEFAULT_ROOM))
+                registry.add(Fan(name=config.DEFAULT_FAN_NAME, room=config.DEFAULT_ROOM))
+                registry.add(Thermostat(name=config.DEFAULT_THERMOSTAT_NAME, room=config.DEFAULT_ROOM))
+        self.devices = registry
+        
+        # Initialize command parser; it resolves device names and rooms through the registry
+        self.command_parser = CommandParser(registry=self.devices, classifier=classifier, cascade=cascade)
+        
+        # Dispatch table for parsed commands; device actions come from the device classes
+        self.engine = CommandEngine(self.devices, status_page_size=config.STATUS_PAGE_SIZE)
+        self.engine.register_action(ALL_DEVICES, "status", self.get_all_devices_status,
+                                    params=[Param("page", int, 1)], query=True)
+        self.engine.register_action(ALL_DEVICES, "turn_off", self.turn_off_all_devices)
+        
+        # Durable state: restore the last saved state, then journal every change
+        self.journal = None
+        if config.STATE_JOURNAL_DIR:
+            self.journal = StateJournal(config.STATE_JOURNAL_DIR, self.devices.store)
+            self.journal.recover()
+            self.engine.add_mutation_listener(self.journal.on_mutation)
+        
+        # Bounded per-device history of state transitions, for duration and average queries
+        self.history = None
+        if config.HISTORY_CAPACITY_PER_DEVICE > 0:
+            self.history = StateHistory(self.devices.store, clock=clock)
+            self.engine.add_mutation_listener(self.history.on_mutation)
+        
+        # Scheduled automations; scheduler.start() runs them in the background, and the
+        # lock keeps them from interleaving with commands being executed
+        self._execution_lock = threading.RLock()
+        self.scheduler = Scheduler(self._run_schedule, clock=clock)
+        
+        # Reactive rules ("when the light turns off, turn off the fan"), checked on every change
+        self.rules = RuleEngine(self.devices.store, self._run_rule)
+        self.engine.add_mutation_listener(self.rules.on_mutation)
+        
+        # Front ends showing schedule and rule firings to the user
+        self._automation_listeners = []
     
     def process_command(self, user_input):
         """
         Process a natural language command from the user.
         
+        Compound commands ("turn on the light and set the fan to high") are
+        split into clauses and executed atomically: either every clause is
+        applied, or none is. Commands with a time of day ("turn off the light
+        at 23:00", "every weekday at 6:30 set thermostat to 21") are scheduled
+        instead of executed; "schedules" lists them and "cancel schedule N"
+        removes one. Likewise "if/when <trigger> <action>" adds a rule ("when
+        the light turns off, turn off the fan"), listed with "rules" and
+        removed with "delete rule N".
+        
+        Args:
+            user_input (str): The natural language command
+            
+        Returns:
+            str: Response message to the user
+        """
+        return self.process_commands([user_input])[0]
+
+    def process_commands(self, user_inputs, batch_size=None):
+        """
+        Process many natural language commands with batched parsing.
+
+        The clauses of all commands are classified together and then executed
+        in input order, so the resulting device state matches processing them
+        one by one.
+
+        Args:
+            user_inputs (list): The natural language commands
+            batch_size (int): Pairs per forward pass (default: config.PARSER_BATCH_SIZE)
+
+        Returns:
+            list: Response message for each command, in input order
+        """
+        routes = self.route_commands(user_inputs, batch_size=batch_size)
+        return [self.dispatch(text, *routed) for text, routed in zip(user_inputs, routes)]
+
+    def route_commands(self, user_inputs, batch_size=None):
+        """
+        Work out how each command is handled, parsing every command that needs it in one batch.
+
+        Listing and removing schedules and rules needs no parsing; for a rule
+        the action is parsed, for a schedule the command part, and otherwise
+        the whole command.
+
+        Args:
+            user_inputs (list): The natural language commands
+            batch_size (int): Pairs per forward pass (default: config.PARSER_BATCH_SIZE)
+
+        Returns:
+            list: (route, spec, clauses) for each command, in input order; route is
+                  "manage", "rule", "schedule" or "execute", spec the RuleSpec or
+                  ScheduleSpec (else None) and clauses the parsed clauses (None
+                  for "manage")
+        """
+        managed = [self._is_management(text) for text in user_inputs]
+        rule_specs = [None if is_managed else parse_rule(text) for text, is_managed in zip(user_inputs, managed)]
+        specs = [None if is_managed or rule_spec else parse_schedule(text)
+                 for text, is_managed, rule_spec in zip(user_inputs, managed, rule_specs)]
+        texts = [rule_spec.action if rule_spec else spec.command if spec else text
+                 for text, is_managed, rule_spec, spec in zip(user_inputs, managed, rule_specs, specs)
+                 if not is_managed]
+        parsed = iter(self.command_parser.parse_compound_commands(texts, batch_size=batch_size))
+
+        routes = []
+        for is_managed, rule_spec, spec in zip(managed, rule_specs, specs):
+            if is_managed:
+                routes.append(("manage", None, None))
+            elif rule_spec is not None:
+                routes.append(("rule", rule_spec, next(parsed)))
+            elif spec is not None:
+                routes.append(("schedule", spec, next(parsed)))
+            else:
+                routes.append(("execute", None, next(parsed)))
+        return routes
+
+    def dispatch(self, user_input, route, spec, clauses):
+        """
+        Handle one routed command: manage schedules or rules, add a rule or schedule, or execute it.
+
         Args:
             user_input (str): The natural language command
+            route (str), spec, clauses (list): As returned by route_commands
+
+        Returns:
+            str: Response message to the user
+        """
+        if route == "manage":
+            return self._manage(user_input)
+        if route == "rule":
+            return self.add_rule(spec, clauses)
+        if route == "schedule":
+            return self.schedule_clauses(spec, clauses)
+        return self.execute_clauses(clauses)
+
+    def execute_clauses(self, clauses):
+        """
+        Execute the parsed clauses of one command; several clauses run atomically.
+        
+        Args:
+            clauses (list): Parsed clauses from CommandParser.parse_compound_commands
             
         Returns:
             str: Response message to the user
         """
-        # Parse the command
-        parsed_command = self.command_parser.parse_command(user_input)
+        if len(clauses) == 1:
+            return self.execute_command(clauses[0])
+        with self._execution_lock:
+            return "\n".join(self.engine.execute_atomic(clauses))
+
+    def schedule_clauses(self, spec, clauses):
+        """
+        Schedule the parsed clauses of one command instead of executing them now.
         
-        # Check for parsing errors
-        if "error" in parsed_command:
-            return parsed_command["error"]
+        Args:
+            spec (ScheduleSpec): When to run, from scheduler.parse_schedule
+            clauses (list): Parsed clauses of the command part
+            
+        Returns:
+            str: Response message to the user
+        """
+        for clause in clauses:
+            if "error" in clause:
+                return clause["error"]
+        schedule = self.scheduler.add(clauses, spec.hour, spec.minute, spec.days, text=spec.command)
+        return f"Scheduled {schedule.describe()}"
+
+    def add_rule(self, spec, clauses):
+        """
+        Add a reactive rule whose action is the parsed clauses.
         
-        # Execute the command
-        return self.execute_command(parsed_command)
-    
+        Args:
+            spec (RuleSpec): Trigger and action text, from rules.parse_rule
+            clauses (list): Parsed clauses of the action
+            
+        Returns:
+            str: Response message to the user
+        """
+        for clause in clauses:
+            if "error" in clause:
+                return clause["error"]
+        device_type, slots = resolve_subject(self.devices, spec.subject)
+        if len(slots) == 0:
+            return f"No device matches '{spec.subject}'."
+        if spec.attribute == "temperature" and device_type != config.DEVICE_THERMOSTAT:
+            return f"Only thermostats have a temperature to watch, not '{spec.subject}'."
+        if spec.attribute == "speed" and device_type != config.DEVICE_FAN:
+            return f"Only fans have a speed to watch, not '{spec.subject}'."
+        # The trigger indexes are read by on_mutation, which runs under the execution lock
+        with self._execution_lock:
+            rule = self.rules.add(slots, spec.attribute, spec.operator, spec.value, clauses, text=spec.describe())
+        return f"Added rule {rule.describe()}"
+
+    def add_automation_listener(self, listener):
+        """
+        Call listener(message) whenever a schedule runs or a rule fires.
+        
+        Schedules run on the scheduler thread, so the listener may be called
+        from it while a command is being entered.
+        
+        Args:
+            listener (callable): Receives a message naming the schedule or rule and its response
+        """
+        self._automation_listeners.append(listener)
+
+    def _notify_automation(self, message):
+        """Log an automation firing and pass it to the automation listeners."""
+        logger.info("%s", message)
+        for listener in self._automation_listeners:
+            listener(message)
+
+    def _run_schedule(self, schedule):
+        """Scheduler callback: execute a schedule's clauses."""
+        response = self.execute_clauses(schedule.commands)
+        self._notify_automation(f"Schedule #{schedule.id} ran: {response}")
+
+    def _run_rule(self, rule):
+        """Rule engine callback: execute a fired rule's clauses."""
+        response = self.execute_clauses(rule.commands)
+        self._notify_automation(f"Rule #{rule.id} fired: {response}")
+
+    @staticmethod
+    def _is_management(user_input):
+        """True for "schedules", "cancel schedule N", "rules" and "delete rule N"."""
+        return isinstance(user_input, str) and any(
+            pattern.match(user_input) for pattern in (scheduler.LIST_PATTERN, scheduler.CANCEL_PATTERN,
+                                                      rules.LIST_PATTERN, rules.DELETE_PATTERN))
+
+    def _manage(self, user_input):
+        """Answer a schedule or rule management input (see _is_management)."""
+        if scheduler.LIST_PATTERN.match(user_input):
+            schedules = self.scheduler.pending()
+            if not schedules:
+                return "No schedules."
+            return "Schedules:\n" + "\n".join(schedule.describe() for schedule in schedules)
+        if rules.LIST_PATTERN.match(user_input):
+            if not len(self.rules):
+                return "No rules."
+            return "Rules:\n" + "\n".join(rule.describe() for rule in self.rules.rules.values())
+        cancel = scheduler.CANCEL_PATTERN.match(user_input)
+        if cancel:
+            schedule_id = int(cancel.group(1))
+            if self.scheduler.cancel(schedule_id):
+                return f"Schedule #{schedule_id} cancelled."
+            return f"No schedule #{schedule_id}."
+        rule_id = int(rules.DELETE_PATTERN.match(user_input).group(1))
+        with self._execution_lock:
+            if self.rules.remove(rule_id):
+                return f"Rule #{rule_id} deleted."
+        return f"No rule #{rule_id}."
+
     def execute_command(self, parsed_command):
         """
         Execute a parsed command on the appropriate device.
@@ -59,69 +314,68 @@ class SmartHomeController:
         Returns:
             str: Response message to the user
         """
-        device_name = parsed_command["device"]
-        action = parsed_command["action"]
-        parameters = parsed_command["parameters"]
-        
-        # Handle "all devices" status query
-        if device_name == "all" and action == "status":
-            return self.get_all_devices_status()
-        
-        # Get the target device
-        device = self.devices.get(device_name)
-        if not device:
-            return f"Device '{device_name}' not found."
-        
-        # Execute the appropriate action on the device
-        try:
-            # Use constants for device name comparison
-            if device_name == config.DEVICE_LIGHT:
-                if action == "turn_on":
-                    return device.turn_on()
-                elif action == "turn_off":
-                    return device.turn_off()
-                elif action == "status":
-                    return device.get_status()
-            
-            elif device_name == config.DEVICE_FAN:
-                if action == "turn_on":
-                    return device.turn_on()
-                elif action == "turn_off":
-                    return device.turn_off()
-                elif action == "set_speed":
-                    speed_level = parameters.get("speed_level", "LOW")
-                    return device.set_speed(speed_level)
-                elif action == "status":
-                    return device.get_status()
-            
-            elif device_name == config.DEVICE_THERMOSTAT:
-                if action == "set_temperature":
-                    # Use constant for default temperature
-                    temp = parameters.get("temp", config.THERMOSTAT_DEFAULT_TEMP)
-                    return device.set_temperature(temp)
-                elif action == "increase_temperature":
-                    # Use constant for default amount
-                    amount = parameters.get("amount", config.THERMOSTAT_DEFAULT_ADJUST_AMOUNT)
-                    return device.increase_temperature(amount)
-                elif action == "decrease_temperature":
-                    # Use constant for default amount
-                    amount = parameters.get("amount", config.THERMOSTAT_DEFAULT_ADJUST_AMOUNT)
-                    return device.decrease_temperature(amount)
-                elif action == "status":
-                    return device.get_status()
+        with self._execution_lock:
+            return self.engine.execute(parsed_command)
+    
+    def execute_commands(self, parsed_commands):
+        """
+        Execute a sequence of parsed commands in one call.
+        
+        Args:
+            parsed_commands (list): Parsed command structures (parser errors are passed through)
             
-            # This case should be less likely if command parser maps correctly
-            return f"Action '{action}' not supported for {device_name}."
+        Returns:
+            list: Response message for each command, in order
+        """
+        with self._execution_lock:
+            return self.engine.execute_batch(parsed_commands)
+    
+    def turn_off_all_devices(self):
+        """
+        Turn off every device that can be switched off, one array operation per device type.
         
-        except Exception as e:
-            return f"Error executing command: {str(e)}"
+        Returns:
+            str: Response message to the user
+        """
+        store = self.devices.store
+        for device_type, device_class in DEVICE_CLASSES.items():
+            bulk_turn_off = getattr(device_class, "bulk_turn_off", None)
+            if bulk_turn_off is not None:
+                bulk_turn_off(store, store.indices(KIND_CODES[device_type]))
+        return "All devices are now OFF."
+    
+    def close(self):
+        """Make all journaled state changes durable and stop background work and inference workers."""
+        self.scheduler.stop()
+        if self.journal is not None:
+            self.journal.close()
+        self.command_parser.close()
     
-    def get_all_devices_status(self):
+    def startup_report(self):
+        """
+        Describe how long the command parser's model took to start.
+
+        Returns:
+            str: Startup timings, or a note that the model is still loading
+        """
+        return self.command_parser.startup_report()
+
+    def get_all_devices_status(self, page=1, page_size=config.STATUS_PAGE_SIZE):
         """
-        Get the status of all devices.
+        Get the status of all devices, one page at a time.
+        
+        Args:
+            page (int): Page to return, starting at 1
+            page_size (int): Devices per page
         
         Returns:
-            str: Status of all devices
+            str: Status of the devices on the page
         """
-        status_lines = [device.get_status() for device in self.devices.values()]
-        return "Current Status:\n" + "\n".join(status_lines)
+        status_lines = self.devices.status_page(page, page_size)
+        if not status_lines:
+            return f"No devices on page {page}."
+        total_pages = max(1, -(-len(self.devices) // page_size))
+        header = "Current Status:"
+        if total_pages > 1:
+            header = f"Current Status (page {page} of {total_pages}):"
+        return header + "\n" + "\n".join(status_lines)
@@ -5,21 +5,174 @@ This file contains classes to simulate various smart home devices:
 - Light: Can be turned ON/OFF
 - Fan: Can be turned ON/OFF and set to low, medium, or high speed
 - Thermostat: Can adjust temperature between 18°C and 30°C
+
+Device objects are lightweight handles: their state lives in a slot of a
+DeviceStateStore (state_store.py), so group commands can update many
+devices at once through the bulk_* class methods.
+
+Each device class declares the actions it supports in ACTIONS, which the
+command engine (command_engine.py) compiles into its dispatch table.
 """
 
+import numpy as np
+
 # Import shared constants
 import config
+from state_store import DeviceStateStore, KIND_CODES
+
+
+class Param:
+    """One parameter of an action: its name, converter and default value."""
+    
+    __slots__ = ("name", "convert", "default")
+    
+    def __init__(self, name, convert=str, default=None):
+        """
+        Args:
+            name (str): Key in the parsed command's parameters
+            convert (callable): Converts the supplied value (e.g. float); raises
+                                ValueError with a user-facing message when it is invalid
+            default: Value used when the parameter is missing or None
+        """
+        self.name = name
+        self.convert = convert
+        self.default = default
+    
+    def bind(self, parameters):
+        """Converted value of the parameter in parameters, or the default."""
+        value = parameters.get(self.name)
+        if value is None:
+            return self.default
+        return self.convert(value)
+
+
+class Action:
+    """
+    Declaration of an action a device class supports.
+    
+    The engine calls `method` on a single device and the `bulk` class method
+    on a group of state store slots; without a bulk method, groups fall back
+    to calling `method` on each device.
+    """
+    
+    __slots__ = ("method", "params", "bulk", "query")
+    
+    def __init__(self, method, *params, bulk=None, query=False):
+        """
+        Args:
+            method (str): Device method performing the action
+            *params (Param): Parameters passed to the method, in order
+            bulk (str): Class method for groups (default: "bulk_" + method, if defined)
+            query (bool): The action only reads state, so groups list each device's result
+        """
+        self.method = method
+        self.params = params
+        self.bulk = bulk if bulk is not None else f"bulk_{method}"
+        self.query = query
+
+
+def _speed_level(value):
+    """Fan speed parameter: an upper-cased speed level other than OFF."""
+    speed_level = str(value).upper()
+    if speed_level not in Fan.SPEEDS[1:]:
+        raise ValueError(f"Invalid speed level. Choose from: {', '.join(Fan.SPEEDS[1:])}")
+    return speed_level
+
 
-class Light:
+def _temperature(value):
+    """Thermostat temperature or amount parameter, in Celsius."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError("Please provide a valid temperature value.") from None
+
+
+class DeviceHandle:
+    """Base for devices whose state lives in a DeviceStateStore slot."""
+    
+    __slots__ = ("name", "room", "device_id", "_store", "_index")
+    
+    DEVICE_TYPE = None
+    
+    # Action name -> Action declaration
+    ACTIONS = {}
+    
+    def __init__(self, name, room=None, device_id=None, store=None, temperature=0.0):
+        """
+        Allocate a state slot for the device.
+        
+        Args:
+            name (str): Name of the device
+            room (str): Room the device is in, if any
+            device_id (str): Unique id; assigned by the registry when None
+            store (DeviceStateStore): Store holding the state; a private one-slot
+                                      store is created when None
+            temperature (float): Initial setpoint stored in the slot
+        """
+        self.name = name
+        self.room = room
+        self.device_id = device_id
+        self._store = store if store is not None else DeviceStateStore(capacity=1)
+        self._index = self._store.allocate(KIND_CODES[self.DEVICE_TYPE], temperature=temperature)
+    
+    @property
+    def index(self):
+        """Slot index of the device in its state store."""
+        return self._index
+    
+    def attach(self, store, room_code=0):
+        """
+        Move the device's state into another store, releasing its old slot.
+        
+        Args:
+            store (DeviceStateStore): Destination store
+            room_code (int): Room code recorded in the destination slot
+        """
+        old_store, old_index = self._store, self._index
+        index = store.allocate(KIND_CODES[self.DEVICE_TYPE], room=room_code)
+        store.power[index] = old_store.power[old_index]
+        store.speed[index] = old_store.speed[old_index]
+        store.temperature[index] = old_store.temperature[old_index]
+        old_store.release(old_index)
+        self._store, self._index = store, index
+
+
+class Light(DeviceHandle):
     """Simulates a smart light that can be turned ON/OFF."""
     
+    __slots__ = ()
+    
+    DEVICE_TYPE = config.DEVICE_LIGHT
+    
+    ACTIONS = {
+        "turn_on": Action("turn_on"),
+        "turn_off": Action("turn_off"),
+        "status": Action("get_status", query=True),
+    }
+    
     STATE_ON = "ON"
     STATE_OFF = "OFF"
     
-    def __init__(self, name=config.DEFAULT_LIGHT_NAME):
-        """Initialize a light with a default name and OFF state."""
-        self.name = name
-        self.state = self.STATE_OFF
+    def __init__(self, name=config.DEFAULT_LIGHT_NAME, room=None, device_id=None, store=None):
+        """
+        Initialize a light with a default name and OFF state.
+        
+        Args:
+            name (str): Name of the light
+            room (str): Room the light is in, if any
+            device_id (str): Unique id; assigned by the registry when None
+            store (DeviceStateStore): Store holding the state (default: a private store)
+        """
+        super().__init__(name, room, device_id, store)
+    
+    @property
+    def state(self):
+        """ON or OFF."""
+        return self.STATE_ON if self._store.power[self._index] else self.STATE_OFF
+    
+    @state.setter
+    def state(self, value):
+        self._store.power[self._index] = value == self.STATE_ON
     
     def turn_on(self):
         """Turn the light ON."""
@@ -34,11 +187,25 @@ class Light:
     def get_status(self):
         """Return the current status of the light."""
         return f"{self.name}: {self.state}"
+    
+    @classmethod
+    def bulk_turn_on(cls, store, indices):
+        """Turn ON every light in indices with one array operation."""
+        store.set_power(indices, True)
+    
+    @classmethod
+    def bulk_turn_off(cls, store, indices):
+        """Turn OFF every light in indices with one array operation."""
+        store.set_power(indices, False)
 
 
-class Fan:
+class Fan(DeviceHandle):
     """Simulates a smart fan that can be turned ON/OFF and set to different speeds."""
     
+    __slots__ = ()
+    
+    DEVICE_TYPE = config.DEVICE_FAN
+    
     # Keep Fan speeds here as they are specific to the Fan's internal logic
     SPEED_OFF = "OFF"
     SPEED_LOW = "LOW"
@@ -56,11 +223,42 @@ class Fan:
     SPEED_INDEX_MEDIUM = 2
     SPEED_INDEX_HIGH = 3
     
-    def __init__(self, name=config.DEFAULT_FAN_NAME):
-        """Initialize a fan with a default name, OFF state, and speed level 0."""
-        self.name = name
-        self.state = self.STATE_OFF
-        self.speed = self.SPEED_INDEX_OFF
+    ACTIONS = {
+        "turn_on": Action("turn_on"),
+        "turn_off": Action("turn_off"),
+        "set_speed": Action("set_speed", Param("speed_level", _speed_level, SPEED_LOW)),
+        "status": Action("get_status", query=True),
+    }
+    
+    def __init__(self, name=config.DEFAULT_FAN_NAME, room=None, device_id=None, store=None):
+        """
+        Initialize a fan with a default name, OFF state, and speed level 0.
+        
+        Args:
+            name (str): Name of the fan
+            room (str): Room the fan is in, if any
+            device_id (str): Unique id; assigned by the registry when None
+            store (DeviceStateStore): Store holding the state (default: a private store)
+        """
+        super().__init__(name, room, device_id, store)
+    
+    @property
+    def state(self):
+        """ON or OFF."""
+        return self.STATE_ON if self._store.power[self._index] else self.STATE_OFF
+    
+    @state.setter
+    def state(self, value):
+        self._store.power[self._index] = value == self.STATE_ON
+    
+    @property
+    def speed(self):
+        """Speed index into SPEEDS."""
+        return int(self._store.speed[self._index])
+    
+    @speed.setter
+    def speed(self, value):
+        self._store.speed[self._index] = value
     
     def turn_on(self):
         """Turn the fan ON at the lowest speed."""
@@ -106,26 +304,84 @@ class Fan:
         if self.state == self.STATE_OFF:
             return f"{self.name}: {self.state}"
         return f"{self.name}: {self.state} (Speed: {self.SPEEDS[self.speed]})"
+    
+    @classmethod
+    def bulk_turn_on(cls, store, indices):
+        """Turn ON every fan in indices; fans that were OFF start at the lowest speed."""
+        indices = np.asarray(indices)
+        was_off = ~store.power[indices]
+        store.speed[indices[was_off]] = cls.SPEED_INDEX_LOW
+        store.set_power(indices, True)
+    
+    @classmethod
+    def bulk_turn_off(cls, store, indices):
+        """Turn OFF every fan in indices and reset their speed."""
+        store.set_speed(indices, cls.SPEED_INDEX_OFF)
+    
+    @classmethod
+    def bulk_set_speed(cls, store, indices, speed_level):
+        """
+        Set the speed of every fan in indices.
+        
+        Args:
+            store (DeviceStateStore): Store holding the fans
+            indices (array-like): Slots to update
+            speed_level (str): The desired speed level ("LOW", "MEDIUM", "HIGH")
+        
+        Returns:
+            str: Error message if the speed level is invalid, otherwise None
+        """
+        speed_level = speed_level.upper()
+        if speed_level not in cls.SPEEDS[1:]:
+            return f"Invalid speed level. Choose from: {', '.join(cls.SPEEDS[1:])}"
+        store.set_speed(indices, cls.SPEEDS.index(speed_level))
+        return None
 
 
-class Thermostat:
+class Thermostat(DeviceHandle):
     """Simulates a smart thermostat that can adjust temperature."""
     
+    __slots__ = ()
+    
+    DEVICE_TYPE = config.DEVICE_THERMOSTAT
+    
+    ACTIONS = {
+        "set_temperature": Action("set_temperature", Param("temp", _temperature, config.THERMOSTAT_DEFAULT_TEMP)),
+        "increase_temperature": Action("increase_temperature",
+                                       Param("amount", _temperature, config.THERMOSTAT_DEFAULT_ADJUST_AMOUNT)),
+        "decrease_temperature": Action("decrease_temperature",
+                                       Param("amount", _temperature, config.THERMOSTAT_DEFAULT_ADJUST_AMOUNT)),
+        "status": Action("get_status", query=True),
+    }
+    
     # Use constants from config
     MIN_TEMP = config.THERMOSTAT_MIN_TEMP
     MAX_TEMP = config.THERMOSTAT_MAX_TEMP
     DEFAULT_ADJUST_AMOUNT = config.THERMOSTAT_DEFAULT_ADJUST_AMOUNT
     
-    def __init__(self, name=config.DEFAULT_THERMOSTAT_NAME, initial_temp=config.THERMOSTAT_DEFAULT_TEMP):
+    def __init__(self, name=config.DEFAULT_THERMOSTAT_NAME, initial_temp=config.THERMOSTAT_DEFAULT_TEMP,
+                 room=None, device_id=None, store=None):
         """
         Initialize a thermostat with a default name and temperature.
         
         Args:
             name (str): Name of the thermostat
             initial_temp (int): Initial temperature in Celsius (default: 22°C)
+            room (str): Room the thermostat is in, if any
+            device_id (str): Unique id; assigned by the registry when None
+            store (DeviceStateStore): Store holding the state (default: a private store)
         """
-        self.name = name
-        self.temperature = max(min(initial_temp, self.MAX_TEMP), self.MIN_TEMP)
+        super().__init__(name, room, device_id, store,
+                         temperature=max(min(initial_temp, self.MAX_TEMP), self.MIN_TEMP))
+    
+    @property
+    def temperature(self):
+        """Current setpoint in Celsius."""
+        return float(self._store.temperature[self._index])
+    
+    @temperature.setter
+    def temperature(self, value):
+        self._store.temperature[self._index] = value
     
     def set_temperature(self, temp):
         """
@@ -178,3 +434,18 @@ class Thermostat:
     def get_status(self):
         """Return the current status of the thermostat."""
         return f"{self.name}: {self.temperature}°C"
+    
+    @classmethod
+    def bulk_set_temperature(cls, store, indices, temp):
+        """Set every thermostat in indices to temp, clamped to the allowed range array-wide."""
+        store.set_temperature(indices, float(temp))
+    
+    @classmethod
+    def bulk_increase_temperature(cls, store, indices, amount=DEFAULT_ADJUST_AMOUNT):
+        """Raise every thermostat in indices by amount, clamped array-wide."""
+        store.adjust_temperature(indices, float(amount))
+    
+    @classmethod
+    def bulk_decrease_temperature(cls, store, indices, amount=DEFAULT_ADJUST_AMOUNT):
+        """Lower every thermostat in indices by amount, clamped array-wide."""
+        store.adjust_temperature(indices, -float(amount))
@@ -0,0 +1,147 @@
+"""
+Fast-Path Command Grammar
+
+A compiled rule matcher for the common, unambiguous phrasings of smart home
+commands ("turn on the light", "set fan to high", "set temperature to 22").
+Matches resolve straight to one of the parser's action labels so the
+transformer model is skipped; anything else falls through to the model.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Import shared constants
+import config
+
+# Words that may be spoken to refer to each device
+DEVICE_WORDS = {
+    config.DEVICE_LIGHT: ["light", "lights", "lamp"],
+    config.DEVICE_FAN: ["fan", "fans"],
+    config.DEVICE_THERMOSTAT: ["thermostat", "thermostats", "temperature", "heat", "heating"],
+}
+
+# Conjunctions signal compound commands, which are never fast-pathed
+_CONJUNCTIONS = ["and", "then", "or", "but"]
+# Question words must not be mistaken for qualifiers ("is the light on")
+_QUESTION_WORDS = ["is", "are", "was", "what", "whats", "how", "does", "do", "can", "could", "would"]
+
+_POLITE = r"(?:(?:please|can you|could you|would you)\s+)?"
+_PLEASE = r"(?:\s+please)?"
+_NUMBER = r"\d+(?:\.\d+)?(?:\s*°?c|\s*degrees)?"
+
+
+def _qualifier():
+    """Optional article plus up to two qualifier words such as a room name ("the living room", "all kitchen")."""
+    reserved = [word for words in DEVICE_WORDS.values() for word in words] + _CONJUNCTIONS + _QUESTION_WORDS
+    word = rf"(?!(?:{'|'.join(reserved)})\b)[a-z]+"
+    return rf"(?:the\s+|my\s+)?(?:{word}\s+){{0,2}}"
+
+
+def _device(device):
+    """Alternation of the words referring to a device."""
+    return rf"(?:{'|'.join(DEVICE_WORDS[device])})"
+
+
+def _normalize(user_input):
+    """Lowercase, collapse whitespace and drop trailing punctuation."""
+    text = " ".join(user_input.lower().split())
+    return text.rstrip(" .!?")
+
+
+class FastPathMatcher:
+    """
+    Resolves unambiguous commands to action labels without running the model.
+
+    Each rule is a compiled, fully anchored regex mapped to a label from the
+    parser's label set. An input is a hit only if every matching rule agrees
+    on a single label; no match or conflicting matches fall through.
+    """
+
+    def __init__(self, device_actions: Dict[str, List[str]], all_devices_label: str,
+                 all_devices_off_label: Optional[str] = None):
+        """
+        Compile the grammar for the parser's labels.
+
+        Args:
+            device_actions (dict): Device type -> action labels, as in CommandParser
+            all_devices_label (str): Label for the "status of all devices" query
+            all_devices_off_label (str): Label for "turn off all devices", if supported
+        """
+        self.rules = self._compile_rules(device_actions, all_devices_label, all_devices_off_label)
+        self.hits = 0
+        self.misses = 0
+
+    def _compile_rules(self, device_actions, all_devices_label, all_devices_off_label) -> List[Tuple[re.Pattern, str]]:
+        """Build the (pattern, label) rule list for the supported devices."""
+        q = _qualifier()
+        rules = []
+
+        # Power commands for devices with on/off actions
+        for device, actions in device_actions.items():
+            dev = _device(device)
+            for state in ("on", "off"):
+                label = f"turn {state} {device}"
+                if label not in actions:
+                    continue
+                rules.append((rf"{_POLITE}(?:turn|switch)\s+{state}\s+{q}{dev}{_PLEASE}", label))
+                rules.append((rf"{_POLITE}(?:turn|switch)\s+{q}{dev}\s+{state}{_PLEASE}", label))
+                rules.append((rf"{q}{dev}\s+{state}{_PLEASE}", label))
+
+            status_label = f"get {device} status"
+            if status_label in actions:
+                rules.append((rf"{_POLITE}(?:get|show|check)\s+{q}{dev}\s+status{_PLEASE}", status_label))
+                rules.append((rf"what(?:'s|\s+is)\s+{q}{dev}\s+status", status_label))
+                rules.append((rf"what(?:'s|\s+is)\s+the\s+status\s+of\s+{q}{dev}", status_label))
+
+        # Fan speed
+        fan = _device(config.DEVICE_FAN)
+        for level in ("low", "medium", "high"):
+            label = f"set {config.DEVICE_FAN} speed {level}"
+            if label not in device_actions.get(config.DEVICE_FAN, []):
+                continue
+            rules.append((rf"{_POLITE}set\s+{q}{fan}(?:\s+speed)?\s+(?:to\s+)?{level}(?:\s+speed)?{_PLEASE}", label))
+            rules.append((rf"{_POLITE}(?:turn|put)\s+{q}{fan}\s+(?:to|on)\s+{level}(?:\s+speed)?{_PLEASE}", label))
+
+        # Thermostat setpoint and adjustments; "by N" is extracted later by the parser
+        thermostat = _device(config.DEVICE_THERMOSTAT)
+        rules.append((rf"what(?:'s|\s+is)\s+{q}{thermostat}", f"get {config.DEVICE_THERMOSTAT} status"))
+        rules.append((rf"{_POLITE}set\s+{q}{thermostat}\s+to\s+{_NUMBER}{_PLEASE}",
+                      f"set {config.DEVICE_THERMOSTAT} temperature"))
+        for verb, label in (("increase|raise", f"increase {config.DEVICE_THERMOSTAT} temperature"),
+                            ("decrease|lower", f"decrease {config.DEVICE_THERMOSTAT} temperature")):
+            rules.append((rf"{_POLITE}(?:{verb})\s+{q}{thermostat}(?:\s+by\s+{_NUMBER})?{_PLEASE}", label))
+
+        # Status of everything
+        rules.append((r"(?:what(?:'s|\s+is)|get|show)\s+the\s+status\s+of\s+(?:all\s+(?:the\s+)?devices|everything)(?:\s+page\s+\d+)?",
+                      all_devices_label))
+        if all_devices_off_label:
+            rules.append((rf"{_POLITE}(?:turn|switch)\s+off\s+(?:everything|all\s+(?:the\s+)?devices){_PLEASE}",
+                          all_devices_off_label))
+            rules.append((rf"{_POLITE}(?:turn|switch)\s+(?:everything|all\s+(?:the\s+)?devices)\s+off{_PLEASE}",
+                          all_devices_off_label))
+
+        return [(re.compile(pattern), label) for pattern, label in rules]
+
+    def match(self, user_input: str) -> Optional[str]:
+        """
+        Resolve a command to an action label if the grammar matches it unambiguously.
+
+        Args:
+            user_input (str): The natural language command from the user
+
+        Returns:
+            str: The matched action label, or None if the model should classify it
+        """
+        text = _normalize(user_input)
+        labels = {label for pattern, label in self.rules if pattern.fullmatch(text)}
+        if len(labels) == 1:
+            self.hits += 1
+            return labels.pop()
+        self.misses += 1
+        return None
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of inputs resolved by the fast path."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
@@ -0,0 +1,246 @@
+"""
+Device State History
+
+Records timestamped state transitions per state store slot in fixed-size
+ring buffers: 2-D NumPy arrays with one row per slot and
+HISTORY_CAPACITY_PER_DEVICE columns, so memory is bounded by
+slots x capacity no matter how long the system runs. Once a row is full the
+oldest transitions are overwritten.
+
+Queries treat each device's history as a step function (a state holds until
+the next transition) and are computed with array operations over the
+buffers:
+    durations        time spent in each state, e.g. seconds the fan ran on HIGH today
+    average          time-weighted mean, e.g. the thermostat setpoint this week
+    average_many     the same for many devices at once
+    series           time-weighted averages downsampled into fixed-width bins
+Time before a device's oldest retained transition is unknown and not counted.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Import shared constants
+import config
+from state_store import KIND_CODES
+
+COLUMNS = ("power", "speed", "temperature")
+
+# Column queried by default for each device kind
+_DEFAULT_COLUMNS = {
+    KIND_CODES[config.DEVICE_LIGHT]: "power",
+    KIND_CODES[config.DEVICE_FAN]: "speed",
+    KIND_CODES[config.DEVICE_THERMOSTAT]: "temperature",
+}
+
+
+class StateHistory:
+    """Bounded per-device transition history for one DeviceStateStore."""
+
+    def __init__(self, store, capacity: int = config.HISTORY_CAPACITY_PER_DEVICE,
+                 clock: Callable[[], float] = time.time):
+        """
+        Allocate the ring buffers and record every occupied slot's current state.
+
+        Args:
+            store (DeviceStateStore): Store whose changes are recorded
+            capacity (int): Transitions kept per device
+            clock (callable): Returns the current time in seconds (injectable for tests and replays)
+        """
+        self.store = store
+        self.capacity = capacity
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._allocate(store.capacity)
+        self.record(store.indices())
+
+    def _allocate(self, slots: int):
+        """Create or grow the buffers to cover `slots` rows, keeping existing history."""
+        old = getattr(self, "times", None)
+        times = np.zeros((slots, self.capacity), dtype=np.float64)
+        power = np.zeros((slots, self.capacity), dtype=np.uint8)
+        speed = np.zeros((slots, self.capacity), dtype=np.uint8)
+        temperature = np.zeros((slots, self.capacity), dtype=np.float32)
+        # Transitions written per slot; the next write goes to column writes % capacity
+        writes = np.zeros(slots, dtype=np.int64)
+        if old is not None:
+            rows = len(old)
+            times[:rows], power[:rows], speed[:rows] = self.times, self.power, self.speed
+            temperature[:rows], writes[:rows] = self.temperature, self.writes
+        self.times, self.power, self.speed, self.temperature, self.writes = times, power, speed, temperature, writes
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the ring buffers."""
+        return sum(array.nbytes for array in (self.times, self.power, self.speed, self.temperature, self.writes))
+
+    def record(self, indices, timestamp: Optional[float] = None) -> int:
+        """
+        Append the current state of the given slots where it differs from their last recorded state.
+
+        Args:
+            indices (array-like): Slots that may have changed
+            timestamp (float): Time of the change (default: now)
+
+        Returns:
+            int: Number of transitions recorded
+        """
+        indices = np.unique(np.asarray(indices, dtype=np.intp))
+        if len(indices) == 0:
+            return 0
+        timestamp = self.clock() if timestamp is None else timestamp
+        with self._lock:
+            if self.store.capacity > len(self.times):
+                self._allocate(self.store.capacity)
+
+            power = self.store.power[indices].astype(np.uint8)
+            speed = self.store.speed[indices]
+            temperature = self.store.temperature[indices].astype(np.float32)
+
+            # Only transitions are stored: skip slots whose state matches their latest entry
+            writes = self.writes[indices]
+            last = (writes - 1) % self.capacity
+            changed = ((writes == 0)
+                       | (self.power[indices, last] != power)
+                       | (self.speed[indices, last] != speed)
+                       | (self.temperature[indices, last] != temperature))
+            indices, columns = indices[changed], (writes % self.capacity)[changed]
+            self.times[indices, columns] = timestamp
+            self.power[indices, columns] = power[changed]
+            self.speed[indices, columns] = speed[changed]
+            self.temperature[indices, columns] = temperature[changed]
+            self.writes[indices] += 1
+        return len(indices)
+
+    def on_mutation(self, parsed_command, indices):
+        """CommandEngine mutation listener: record the slots a command changed."""
+        self.record(indices)
+
+    # ----- queries -----
+
+    def _slot_and_column(self, device, column: Optional[str]) -> Tuple[int, str]:
+        """Resolve a device handle or slot index, and the column to query."""
+        slot = device if isinstance(device, (int, np.integer)) else device.index
+        if column is None:
+            column = _DEFAULT_COLUMNS.get(int(self.store.kind[slot]), "power")
+        if column not in COLUMNS:
+            raise ValueError(f"Unknown history column '{column}'. Choose from: {', '.join(COLUMNS)}")
+        return int(slot), column
+
+    def _segments(self, slots: np.ndarray, column: str, start: float,
+                  end: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Chronological step segments of many slots, clipped to [start, end).
+
+        Returns:
+            tuple: (times, values, durations), each of shape (len(slots), capacity);
+                   entries beyond a slot's retained history have zero duration
+        """
+        with self._lock:
+            writes = self.writes[slots]
+            counts = np.minimum(writes, self.capacity)
+            offsets = np.arange(self.capacity)
+            # Column of each slot's k-th oldest retained transition
+            order = (writes[:, None] - counts[:, None] + offsets[None, :]) % self.capacity
+            valid = offsets[None, :] < counts[:, None]
+            times = np.where(valid, self.times[slots[:, None], order], np.inf)
+            values = getattr(self, column)[slots[:, None], order].astype(np.float64)
+
+        # Each state holds until the next transition; the latest one holds until `end`
+        following = np.concatenate([times[:, 1:], np.full((len(slots), 1), np.inf)], axis=1)
+        with np.errstate(invalid="ignore"):
+            durations = np.clip(following, start, end) - np.clip(times, start, end)
+        durations[~valid] = 0.0
+        return times, values, durations
+
+    def _window(self, start: float, end: Optional[float]) -> Tuple[float, float]:
+        """Clamp a query window so it never extends past now."""
+        now = self.clock()
+        end = now if end is None else min(end, now)
+        return start, max(start, end)
+
+    def durations(self, device, start: float, end: Optional[float] = None,
+                  column: Optional[str] = None) -> Dict[float, float]:
+        """
+        Seconds spent in each state between start and end.
+
+        Args:
+            device: Device handle or state store slot
+            start (float): Window start (same clock as recording)
+            end (float): Window end (default: now)
+            column (str): "power", "speed" or "temperature" (default: by device kind)
+
+        Returns:
+            dict: State value -> seconds (e.g. {0: 3600.0, 3: 1800.0} for fan speed indices)
+        """
+        slot, column = self._slot_and_column(device, column)
+        start, end = self._window(start, end)
+        _, values, durations = self._segments(np.array([slot]), column, start, end)
+        states, inverse = np.unique(values[0], return_inverse=True)
+        totals = np.bincount(inverse, weights=durations[0], minlength=len(states))
+        convert = float if column == "temperature" else int
+        return {convert(state): total for state, total in zip(states, totals.tolist()) if total > 0}
+
+    def average_many(self, slots: Sequence[int], start: float, end: Optional[float] = None,
+                     column: str = "temperature") -> np.ndarray:
+        """
+        Time-weighted average of a column for many slots at once.
+
+        Returns:
+            np.ndarray: One average per slot (NaN where no history covers the window)
+        """
+        start, end = self._window(start, end)
+        _, values, durations = self._segments(np.asarray(slots, dtype=np.intp), column, start, end)
+        covered = durations.sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(covered > 0, (values * durations).sum(axis=1) / covered, np.nan)
+
+    def average(self, device, start: float, end: Optional[float] = None,
+                column: Optional[str] = None) -> float:
+        """Time-weighted average of a device's state between start and end (NaN without history)."""
+        slot, column = self._slot_and_column(device, column)
+        return float(self.average_many([slot], start, end, column)[0])
+
+    def series(self, device, start: float, end: Optional[float] = None, interval: float = 3600.0,
+               column: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Downsample a device's history into time-weighted averages over fixed-width bins.
+
+        Args:
+            device: Device handle or state store slot
+            start (float): Start of the first bin
+            end (float): End of the last bin (default: now)
+            interval (float): Bin width in seconds
+            column (str): Column to average (default: by device kind)
+
+        Returns:
+            tuple: (bin start times, averages); bins without history are NaN
+        """
+        slot, column = self._slot_and_column(device, column)
+        start, end = self._window(start, end)
+        # The last bin is cut short at `end`
+        edges = np.append(np.arange(start, end, interval), end)
+        times, values, _ = self._segments(np.array([slot]), column, -np.inf, np.inf)
+        times, values = times[0], values[0]
+        retained = np.isfinite(times)
+        times, values = times[retained], values[retained]
+        if len(times) == 0 or len(edges) < 2:
+            return edges[:-1], np.full(max(len(edges) - 1, 0), np.nan)
+
+        # Integrals of the step function (value, and covered time) at each transition ...
+        spans = np.diff(times)
+        value_integral = np.concatenate([[0.0], np.cumsum(values[:-1] * spans)])
+        time_integral = np.concatenate([[0.0], np.cumsum(spans)])
+        # ... evaluated at the bin edges; edges before the first transition have no coverage
+        clipped = np.maximum(edges, times[0])
+        segment = np.searchsorted(times, clipped, side="right") - 1
+        elapsed = clipped - times[segment]
+        value_at = value_integral[segment] + values[segment] * elapsed
+        time_at = time_integral[segment] + elapsed
+        covered = np.diff(time_at)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            averages = np.where(covered > 0, np.diff(value_at) / covered, np.nan)
+        return edges[:-1], averages
@@ -0,0 +1,175 @@
+"""
+Multi-Process Inference Pool
+
+Runs a loaded classifier in several forked worker processes so batched
+classification can use every core. Workers are forked after the model is
+loaded, so the weight tensors are inherited copy-on-write instead of being
+loaded again per worker; inference only reads them, so the pages stay shared.
+The pool must be created from the main thread before any other thread is
+started: a fork copies only the forking thread, so a lock held by another
+thread at that moment would stay locked forever in the workers.
+
+The pool follows the classifier calling convention from classifiers.py, so
+the parser uses it exactly like a single classifier. Only classification
+runs in the workers; parsing and device state stay in the parent process.
+"""
+
+import gc
+import logging
+import multiprocessing
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _worker_loop(conn, classifier, threads):
+    """Serve classification requests from the parent until told to stop."""
+    import torch
+    torch.set_num_threads(threads)
+
+    while True:
+        task = conn.recv()
+        if task is None:
+            break
+        texts, labels, kwargs = task
+        try:
+            conn.send(("ok", classifier(texts, labels, **kwargs)))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+    conn.close()
+
+
+def _memory_kb(pid: int) -> Dict[str, Optional[int]]:
+    """Resident and proportional set size of a process in KiB, from /proc (Linux only)."""
+    usage: Dict[str, Optional[int]] = {"rss_kb": None, "pss_kb": None}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("Rss", "Pss"):
+                    usage[f"{key.lower()}_kb"] = int(value.split()[0])
+    except OSError:
+        pass
+    return usage
+
+
+class InferencePool:
+    """
+    Shards classification requests across forked worker processes.
+
+    Each worker limits torch to its share of the cores, so N workers
+    together do not oversubscribe the machine.
+    """
+
+    def __init__(self, classifier, workers: int, threads_per_worker: Optional[int] = None):
+        """
+        Fork the worker processes.
+
+        Args:
+            classifier (callable): Loaded classifier to share with the workers
+            workers (int): Number of worker processes
+            threads_per_worker (int): torch intra-op threads per worker
+                                      (default: cores divided evenly between workers)
+
+        Raises:
+            RuntimeError: If called from a thread other than the main thread
+        """
+        if threading.current_thread() is not threading.main_thread():
+            raise RuntimeError("InferencePool must be created from the main thread, before other threads start.")
+        others = [thread.name for thread in threading.enumerate() if thread is not threading.current_thread()]
+        if others:
+            logger.warning("Forking inference workers while other threads are running (%s); "
+                           "create the pool before starting them.", ", ".join(others))
+        self.classifier = classifier
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+        self._lock = threading.Lock()
+        self._connections = []
+        self._processes = []
+
+        # Move every existing object to the permanent generation so the garbage
+        # collector does not write to (and un-share) the inherited pages
+        gc.freeze()
+        context = multiprocessing.get_context("fork")
+        for _ in range(workers):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(target=_worker_loop,
+                                      args=(child_conn, classifier, self.threads_per_worker),
+                                      daemon=True)
+            process.start()
+            child_conn.close()
+            self._connections.append(parent_conn)
+            self._processes.append(process)
+
+    def __getattr__(self, name):
+        # Expose attributes of the wrapped classifier, e.g. passes_per_input
+        if name == "classifier":
+            raise AttributeError(name)
+        return getattr(self.classifier, name)
+
+    def __call__(self, sequences, candidate_labels: List[str], multi_label: bool = False,
+                 batch_size: Optional[int] = None):
+        """
+        Classify sequences, splitting them evenly across the workers.
+
+        Args:
+            sequences (str or list): Text or texts to classify
+            candidate_labels (list): Labels to score
+            multi_label (bool): Passed through to the classifier
+            batch_size (int): Passed through to the classifier
+
+        Returns:
+            dict or list: Pipeline-shaped result(s), in input order
+        """
+        single = isinstance(sequences, str)
+        texts = [sequences] if single else list(sequences)
+        if not texts:
+            return []
+        kwargs: Dict[str, Any] = {"multi_label": multi_label}
+        if batch_size:
+            kwargs["batch_size"] = batch_size
+
+        # Contiguous shards keep results in input order when concatenated
+        shard_size = -(-len(texts) // self.workers)
+        shards = [texts[start:start + shard_size] for start in range(0, len(texts), shard_size)]
+
+        with self._lock:
+            for conn, shard in zip(self._connections, shards):
+                conn.send((shard, candidate_labels, kwargs))
+            replies = [conn.recv() for conn, _ in zip(self._connections, shards)]
+
+        results = []
+        for status, payload in replies:
+            if status == "error":
+                raise RuntimeError(f"Inference worker failed: {payload}")
+            results.extend([payload] if isinstance(payload, dict) else payload)
+        return results[0] if single else results
+
+    def memory_report(self) -> List[Dict[str, Optional[int]]]:
+        """
+        Memory used by each worker.
+
+        Rss counts shared weight pages in full for every worker; Pss splits
+        shared pages between the processes that map them, so it shows what
+        each worker really adds.
+
+        Returns:
+            list: One {'pid', 'rss_kb', 'pss_kb'} dict per worker
+        """
+        return [{"pid": process.pid, **_memory_kb(process.pid)} for process in self._processes]
+
+    def close(self):
+        """Stop the worker processes."""
+        with self._lock:
+            for conn in self._connections:
+                try:
+                    conn.send(None)
+                    conn.close()
+                except OSError:
+                    pass
+            for process in self._processes:
+                process.join(timeout=5)
+            self._connections = []
+            self._processes = []
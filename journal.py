@@ -0,0 +1,291 @@
+"""
+Durable Device State Journal
+
+Persists the state store (state_store.py) across restarts. Each successful
+state change is appended to a binary journal as one frame holding the new
+(power, speed, temperature) of every slot it touched. Frames are written as
+packed NumPy records, and fsync is group-committed: the file is synced once
+JOURNAL_GROUP_COMMIT_SIZE frames are pending or JOURNAL_FSYNC_INTERVAL_MS has
+passed, whichever comes first, instead of once per command.
+
+Every JOURNAL_SNAPSHOT_RECORDS slot records the state columns are written to a
+snapshot (.npy) and a new journal segment is started, so the log never holds
+more than one snapshot interval of history. Recovery memory-maps the latest
+snapshot, copies it into the store and replays only the journal tail, which
+keeps both recovery time and append cost independent of total history.
+
+Files in the journal directory:
+    snapshot-<seq>.npy   structured array of the state columns after frame <seq>
+    journal-<seq>.log    frames starting after <seq>
+
+Frame layout: header (magic u32, record count u32, sequence u64, unix time
+f64), `count` packed records (slot u32, power u8, speed u8, temperature f64),
+then a CRC32 of header and records. A torn or corrupt frame at the end of the
+log (e.g. after a crash mid-write) ends replay and is truncated away.
+"""
+
+import glob
+import logging
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+from typing import List, Optional
+
+import numpy as np
+
+# Import shared constants
+import config
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = 0x534A524E  # "SJRN"
+_HEADER = struct.Struct("<IIQd")
+_CRC = struct.Struct("<I")
+RECORD_DTYPE = np.dtype([("slot", "<u4"), ("power", "u1"), ("speed", "u1"), ("temperature", "<f8")])
+SNAPSHOT_DTYPE = np.dtype([("kind", "u1"), ("power", "u1"), ("speed", "u1"), ("temperature", "<f8")])
+
+_SEQ_PATTERN = re.compile(r"-(\d+)\.(?:npy|log)$")
+
+
+def _sequence(path: str) -> int:
+    """Sequence number embedded in a snapshot or segment file name."""
+    return int(_SEQ_PATTERN.search(path).group(1))
+
+
+class StateJournal:
+    """
+    Append-only journal plus snapshots for one DeviceStateStore.
+
+    Slots are identified by their index, so the registry must be rebuilt in
+    the same order (same inventory) before recover() is called.
+    """
+
+    def __init__(self, directory: str, store, group_commit_size: int = config.JOURNAL_GROUP_COMMIT_SIZE,
+                 fsync_interval_ms: float = config.JOURNAL_FSYNC_INTERVAL_MS,
+                 snapshot_records: int = config.JOURNAL_SNAPSHOT_RECORDS):
+        """
+        Open (creating if needed) the journal directory; call recover() before appending.
+
+        Args:
+            directory (str): Directory holding snapshots and journal segments
+            store (DeviceStateStore): Store whose state is persisted
+            group_commit_size (int): Pending frames that force an immediate fsync
+            fsync_interval_ms (float): Longest time a frame waits for its fsync
+            snapshot_records (int): Slot records after which a snapshot compacts the log
+        """
+        self.directory = directory
+        self.store = store
+        self.group_commit_size = group_commit_size
+        self.fsync_interval = fsync_interval_ms / 1000
+        self.snapshot_records = snapshot_records
+        os.makedirs(directory, exist_ok=True)
+
+        self.sequence = 0
+        self.records_since_snapshot = 0
+        self.fsyncs = 0
+        self._file = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+    # ----- recovery -----
+
+    def recover(self) -> int:
+        """
+        Restore the store from the latest snapshot and the journal tail, then open the log for appends.
+
+        Returns:
+            int: Number of journal frames replayed
+        """
+        snapshots = sorted(glob.glob(os.path.join(self.directory, "snapshot-*.npy")), key=_sequence)
+        snapshot_seq = 0
+        if snapshots:
+            snapshot_seq = _sequence(snapshots[-1])
+            self._load_snapshot(snapshots[-1])
+
+        replayed = 0
+        self.sequence = snapshot_seq
+        # Normally only the segment started by the latest snapshot exists; older ones are
+        # left behind only by a crash during compaction, and their frames are skipped
+        segments = sorted(glob.glob(os.path.join(self.directory, "journal-*.log")), key=_sequence)
+        for segment in segments:
+            replayed += self._replay(segment, snapshot_seq)
+
+        current = segments[-1] if segments and _sequence(segments[-1]) >= snapshot_seq else None
+        self._open_segment(current)
+        logger.info("Recovered device state: snapshot %d, %d journal frames replayed.", snapshot_seq, replayed)
+        return replayed
+
+    def _load_snapshot(self, path: str):
+        """Copy a memory-mapped snapshot into the store, for slots whose kind still matches."""
+        snapshot = np.load(path, mmap_mode="r")
+        size = min(len(snapshot), self.store.size)
+        kinds = np.asarray(snapshot["kind"][:size])
+        match = np.flatnonzero(kinds == self.store.kind[:size])
+        if len(match) < np.count_nonzero(kinds):
+            logger.warning("Snapshot %s does not match the device inventory for %d slots; they keep their defaults.",
+                           path, np.count_nonzero(kinds) - len(match))
+        self.store.power[match] = snapshot["power"][match].astype(bool)
+        self.store.speed[match] = snapshot["speed"][match]
+        self.store.temperature[match] = snapshot["temperature"][match]
+
+    def _replay(self, path: str, after_seq: int) -> int:
+        """Apply the frames of one segment with sequence > after_seq; truncate a torn tail."""
+        with open(path, "rb") as f:
+            data = f.read()
+        view = memoryview(data)
+        payloads: List[memoryview] = []
+        offset = 0
+        frames = 0
+        while offset + _HEADER.size <= len(data):
+            magic, count, sequence, _ = _HEADER.unpack_from(view, offset)
+            end = offset + _HEADER.size + count * RECORD_DTYPE.itemsize
+            if magic != _MAGIC or end + _CRC.size > len(data):
+                break
+            (crc,) = _CRC.unpack_from(view, end)
+            if crc != zlib.crc32(view[offset:end]):
+                break
+            if sequence > after_seq:
+                payloads.append(view[offset + _HEADER.size:end])
+                self.sequence = sequence
+                frames += 1
+            offset = end + _CRC.size
+
+        if offset < len(data):
+            logger.warning("Truncating %d bytes of incomplete journal data in %s.", len(data) - offset, path)
+            with open(path, "r+b") as f:
+                f.truncate(offset)
+
+        if payloads:
+            records = np.frombuffer(b"".join(payloads), dtype=RECORD_DTYPE)
+            self._apply(records)
+            self.records_since_snapshot += len(records)
+        return frames
+
+    def _apply(self, records: np.ndarray):
+        """Write records into the store; when a slot appears more than once, the latest record wins."""
+        slots = records["slot"][::-1]
+        _, first = np.unique(slots, return_index=True)
+        latest = records[::-1][first]
+        latest = latest[latest["slot"] < self.store.size]
+        slots = latest["slot"].astype(np.intp)
+        self.store.power[slots] = latest["power"].astype(bool)
+        self.store.speed[slots] = latest["speed"]
+        self.store.temperature[slots] = latest["temperature"]
+
+    # ----- appending -----
+
+    def _open_segment(self, path: Optional[str] = None):
+        """Open a segment for appending (a new one after the current sequence by default)."""
+        if self._file is not None:
+            self._file.close()
+        if path is None:
+            path = os.path.join(self.directory, f"journal-{self.sequence:020d}.log")
+        self._file = open(path, "ab")
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_periodically, name="journal-fsync", daemon=True)
+            self._flusher.start()
+
+    def append(self, indices) -> int:
+        """
+        Journal the current state of the given slots as one frame.
+
+        Args:
+            indices (array-like): State store slots changed by a command
+
+        Returns:
+            int: Sequence number of the frame
+        """
+        indices = np.asarray(indices, dtype=np.intp)
+        records = np.empty(len(indices), dtype=RECORD_DTYPE)
+        records["slot"] = indices
+        records["power"] = self.store.power[indices]
+        records["speed"] = self.store.speed[indices]
+        records["temperature"] = self.store.temperature[indices]
+
+        with self._lock:
+            self.sequence += 1
+            header = _HEADER.pack(_MAGIC, len(records), self.sequence, time.time())
+            body = records.tobytes()
+            crc = zlib.crc32(body, zlib.crc32(header))
+            self._file.write(header + body + _CRC.pack(crc))
+            self._pending += 1
+            self.records_since_snapshot += len(records)
+            if self._pending >= self.group_commit_size:
+                self._sync()
+            sequence = self.sequence
+            if self.records_since_snapshot >= self.snapshot_records:
+                self._snapshot()
+        return sequence
+
+    def on_mutation(self, parsed_command, indices):
+        """CommandEngine mutation listener: journal the slots a command changed."""
+        self.append(indices)
+
+    def _sync(self):
+        """Flush and fsync pending frames (caller holds the lock)."""
+        if self._pending:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._pending = 0
+            self.fsyncs += 1
+
+    def _flush_periodically(self):
+        """Background group commit: fsync whatever is pending every fsync interval."""
+        while not self._stopped.wait(self.fsync_interval):
+            with self._lock:
+                if self._file is not None:
+                    self._sync()
+
+    def flush(self):
+        """Make every appended frame durable now."""
+        with self._lock:
+            self._sync()
+
+    # ----- snapshots -----
+
+    def snapshot(self):
+        """Write a snapshot of the current state and start a new journal segment."""
+        with self._lock:
+            self._sync()
+            self._snapshot()
+
+    def _snapshot(self):
+        """Snapshot, rotate the log and delete what the snapshot supersedes (caller holds the lock)."""
+        self._sync()
+        size = self.store.size
+        columns = np.empty(size, dtype=SNAPSHOT_DTYPE)
+        columns["kind"] = self.store.kind[:size]
+        columns["power"] = self.store.power[:size]
+        columns["speed"] = self.store.speed[:size]
+        columns["temperature"] = self.store.temperature[:size]
+
+        path = os.path.join(self.directory, f"snapshot-{self.sequence:020d}.npy")
+        with open(path + ".tmp", "wb") as f:
+            np.save(f, columns)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+
+        old_files = [p for p in glob.glob(os.path.join(self.directory, "snapshot-*.npy"))
+                     + glob.glob(os.path.join(self.directory, "journal-*.log")) if p != path]
+        self._open_segment()
+        for old in old_files:
+            if old != self._file.name:
+                os.remove(old)
+        self.records_since_snapshot = 0
+
+    def close(self):
+        """Stop the fsync thread and make everything durable."""
+        self._stopped.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        with self._lock:
+            if self._file is not None:
+                self._sync()
+                self._file.close()
+                self._file = None
@@ -4,9 +4,14 @@ Smart Home Application CLI
 A command-line interface for interacting with the smart home system.
 """
 
+import argparse
+import contextlib
 import sys
 import time
 from controller import SmartHomeController
+from client import SmartHomeClient
+from streaming import stream_commands
+from metrics import configure_logging, start_reporting
 
 # Import shared constants
 import config
@@ -25,18 +30,110 @@ def display_welcome():
     print("  - 'Set the fan speed to high'")
     print("  - 'What is the current temperature?'")
     print("  - 'What is the status of all devices?'")
+    print("  - 'Every weekday at 6:30 set the thermostat to 21' ('Schedules' lists them)")
+    print("  - 'When the light turns off, turn off the fan' ('Rules' lists them)")
+    print("  - 'Timings' to show model startup timings")
     print("  - 'Exit' or 'Quit' to end the program")
     print("\n" + "-"*60)
 
+@contextlib.contextmanager
+def metrics_reporting():
+    """
+    Export metrics periodically while the block runs, when config.METRICS_ENABLED is set.
+
+    Enter it only once the controller exists: with INFERENCE_WORKERS > 1 the
+    controller forks the inference workers, which must happen before any
+    background thread is started.
+    """
+    reporter = start_reporting()
+    try:
+        yield
+    finally:
+        if reporter is not None:
+            reporter.stop()
+
+def run_stream(path, batch_size):
+    """
+    Process commands from a file or stdin without prompts, writing JSON lines to stdout.
+    
+    Args:
+        path (str): Input file, or "-" for stdin
+        batch_size (int): Commands per batched parse
+    """
+    output = sys.stdout
+    # Status messages go to stderr so stdout carries only JSON results
+    with contextlib.redirect_stdout(sys.stderr):
+        controller = SmartHomeController()
+        # Rules fired by the streamed commands are reported with the other status messages
+        controller.add_automation_listener(lambda message: print(f"Automation: {message}", file=sys.stderr))
+        # Wait for the model up front so the first batch's parse timing is not a load time
+        controller.command_parser.wait_until_ready()
+        try:
+            with metrics_reporting():
+                if path == "-":
+                    stream_commands(sys.stdin, controller, output, batch_size)
+                else:
+                    with open(path, encoding="utf-8") as lines:
+                        stream_commands(lines, controller, output, batch_size)
+        finally:
+            controller.close()
+
 def main():
     """Main function to run the smart home application."""
-    # Initialize the controller
-    controller = SmartHomeController()
+    parser = argparse.ArgumentParser(description="Smart home assistant CLI.")
+    parser.add_argument("--connect", nargs="?", const=config.SERVER_ADDRESS, metavar="ADDRESS",
+                        help="Send commands to a running server.py (HOST:PORT or unix:/path) "
+                             "instead of loading the model locally")
+    parser.add_argument("--stream", nargs="?", const="-", metavar="PATH",
+                        help="Non-interactive mode: read commands (plain lines or JSONL) from PATH "
+                             "or stdin and print one JSON result per line")
+    parser.add_argument("--batch-size", type=int, default=config.STREAM_BATCH_SIZE,
+                        help="Commands per batched parse in streaming mode")
+    args = parser.parse_args()
+    if args.stream and args.connect:
+        parser.error("--stream runs the model locally and cannot be combined with --connect")
+
+    configure_logging()
+    if args.stream:
+        run_stream(args.stream, args.batch_size)
+    else:
+        run_interactive(args.connect)
+
+def run_interactive(connect):
+    """
+    Run the interactive prompt loop.
     
-    # Display welcome message
-    display_welcome()
+    Args:
+        connect (str): Server address to send commands to, or None to load the model locally
+    """
+    if connect:
+        # Thin client: the server owns the model and device state
+        controller = SmartHomeClient(connect)
+    else:
+        # Initialize the controller (the model keeps loading in the background)
+        controller = SmartHomeController()
+        # Show schedule and rule firings, which otherwise only reach the INFO log
+        controller.add_automation_listener(show_automation)
     
-    # Main interaction loop
+    try:
+        with metrics_reporting():
+            if not connect:
+                # Run scheduled automations ("turn off the light at 23:00") while the prompt is open
+                controller.scheduler.start()
+            
+            # Display welcome message
+            display_welcome()
+            
+            interaction_loop(controller)
+    finally:
+        controller.close()
+
+def show_automation(message):
+    """Print a schedule or rule firing below the prompt."""
+    print(f"\n[Automation] {message}", flush=True)
+
+def interaction_loop(controller):
+    """Prompt for commands until the user exits."""
     while True:
         # Get user input
         user_input = input("\n> Enter a command: ").strip()
@@ -49,6 +146,11 @@ def main():
         # Skip empty input
         if not user_input:
             continue
+
+        # Report startup timings on request
+        if user_input.lower() in config.TIMING_COMMANDS:
+            print(f"\n{controller.startup_report()}")
+            continue
         
         # Process the command
         print("\nProcessing command...")
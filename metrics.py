@@ -0,0 +1,317 @@
+"""
+Instrumentation and Metrics Export
+
+A small in-process metrics registry: per-stage timers, labelled counters,
+gauges and histograms, with pluggable exporters (Prometheus text format to a file or an
+HTTP endpoint, and a periodic summary in the log).
+
+The shared METRICS instance is disabled unless config.METRICS_ENABLED is set.
+While disabled, stage() returns a shared no-op context manager and the
+recording methods return after a single attribute check, so instrumented
+hot paths cost next to nothing.
+
+    with METRICS.stage("classify"):
+        ...
+    METRICS.increment("errors_total", type="ValueError")
+    METRICS.observe("classification_score", score, buckets=SCORE_BUCKETS)
+"""
+
+import bisect
+import contextlib
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Import shared constants
+import config
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) for stage duration histograms
+STAGE_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+# Upper bounds for classification score histograms
+SCORE_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+
+_NULL_TIMER = contextlib.nullcontext()
+
+
+class Histogram:
+    """Fixed-bucket histogram with a running sum and count."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        # One count per bucket plus the +Inf bucket
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (an estimate from bucket counts)."""
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            seen += count
+            if seen >= rank and count:
+                return bound
+        return float("nan")
+
+
+class _StageTimer:
+    """Context manager recording its duration into the stage histogram."""
+
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe("stage_seconds", time.perf_counter() - self.start, stage=self.name)
+        return False
+
+
+class Metrics:
+    """
+    Thread-safe registry of counters, gauges and histograms, keyed by name and label values.
+    """
+
+    def __init__(self, enabled: bool = False, prefix: str = "smarthome"):
+        """
+        Args:
+            enabled (bool): Record anything at all
+            prefix (str): Prepended to metric names on export
+        """
+        self.enabled = enabled
+        self.prefix = prefix
+        self.counters: Dict[Tuple[str, Tuple], float] = {}
+        self.gauges: Dict[Tuple[str, Tuple], float] = {}
+        self.histograms: Dict[Tuple[str, Tuple], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def stage(self, name: str):
+        """Context manager timing one pipeline stage (e.g. "classify", "execute")."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _StageTimer(self, name)
+
+    def increment(self, name: str, amount: float = 1, **labels):
+        """Add amount to a counter."""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def set_gauge(self, name: str, value: float, **labels):
+        """Set a gauge to its current value."""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.gauges[key] = value
+
+    def observe(self, name: str, value: float, buckets: Sequence[float] = STAGE_BUCKETS, **labels):
+        """Record a value in a histogram; buckets apply when the histogram is first created."""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def reset(self):
+        """Drop every recorded value."""
+        with self._lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+
+    def counter_total(self, name: str) -> float:
+        """Sum of a counter over all label values."""
+        with self._lock:
+            return sum(value for (counter, _), value in self.counters.items() if counter == name)
+
+    def render_prometheus(self) -> str:
+        """Current values in the Prometheus text exposition format."""
+        lines: List[str] = []
+        with self._lock:
+            typed = set()
+            for (name, labels), value in sorted(self.counters.items()):
+                metric = f"{self.prefix}_{name}"
+                if metric not in typed:
+                    lines.append(f"# TYPE {metric} counter")
+                    typed.add(metric)
+                lines.append(f"{metric}{_format_labels(labels)} {value:g}")
+            for (name, labels), value in sorted(self.gauges.items()):
+                metric = f"{self.prefix}_{name}"
+                if metric not in typed:
+                    lines.append(f"# TYPE {metric} gauge")
+                    typed.add(metric)
+                lines.append(f"{metric}{_format_labels(labels)} {value:g}")
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                metric = f"{self.prefix}_{name}"
+                if metric not in typed:
+                    lines.append(f"# TYPE {metric} histogram")
+                    typed.add(metric)
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                    lines.append(f"{metric}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{metric}_sum{_format_labels(labels)} {histogram.sum:g}")
+                lines.append(f"{metric}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        """One-line human-readable summary: command counts, fast-path hit rate and mean/p99 per stage."""
+        parts = [f"commands={self.counter_total('commands_total'):g}",
+                 f"rejected={self.counter_total('below_threshold_total'):g}",
+                 f"errors={self.counter_total('errors_total'):g}"]
+        with self._lock:
+            hit_rate = self.gauges.get(("fast_path_hit_rate", ()))
+            if hit_rate is not None:
+                parts.append(f"fast_path_hit_rate={hit_rate:.1%}")
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                if name == "stage_seconds" and histogram.count:
+                    stage = dict(labels)["stage"]
+                    parts.append(f"{stage}: mean {1000 * histogram.sum / histogram.count:.2f}ms "
+                                 f"p99<={1000 * histogram.quantile(0.99):g}ms")
+        return ", ".join(parts)
+
+
+def _format_labels(labels: Tuple) -> str:
+    """Render label pairs as {key="value",...} (empty when there are none)."""
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"') for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+
+class PrometheusFileExporter:
+    """Writes the Prometheus text format to a file (e.g. for node_exporter's textfile collector)."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, metrics: Metrics):
+        # Write then rename, so scrapers never read a partial file
+        with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(metrics.render_prometheus())
+        os.replace(self.path + ".tmp", self.path)
+
+
+class LogSummaryExporter:
+    """Logs Metrics.summary() at the given level."""
+
+    def __init__(self, level: int = logging.INFO):
+        self.level = level
+
+    def export(self, metrics: Metrics):
+        logger.log(self.level, "Metrics: %s", metrics.summary())
+
+
+class MetricsReporter:
+    """Background thread that runs every exporter each interval, and once more on stop()."""
+
+    def __init__(self, metrics: Metrics, exporters: List, interval: float):
+        """
+        Args:
+            metrics (Metrics): Registry to export
+            exporters (list): Objects with an export(metrics) method
+            interval (float): Seconds between exports
+        """
+        self.metrics = metrics
+        self.exporters = exporters
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-reporter", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.export()
+
+    def export(self):
+        """Run every exporter now; a failing exporter is logged and does not stop the others."""
+        for exporter in self.exporters:
+            try:
+                exporter.export(self.metrics)
+            except Exception:
+                logger.exception("Metrics exporter %s failed", type(exporter).__name__)
+
+    def stop(self):
+        """Stop the thread after a final export."""
+        self._stopped.set()
+        self._thread.join()
+        self.export()
+
+
+def start_http_exporter(metrics: Metrics, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """
+    Serve GET /metrics in the Prometheus text format from a daemon thread.
+
+    Returns:
+        ThreadingHTTPServer: The running server (call shutdown() to stop it)
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug("metrics endpoint: " + format, *args)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def start_reporting(metrics: Optional["Metrics"] = None) -> Optional[MetricsReporter]:
+    """
+    Start the exporters configured in config.py, if metrics are enabled.
+
+    Returns:
+        MetricsReporter: The periodic reporter, or None when metrics are disabled
+    """
+    metrics = metrics or METRICS
+    if not metrics.enabled:
+        return None
+    if config.METRICS_HTTP_PORT:
+        start_http_exporter(metrics, config.METRICS_HTTP_PORT)
+    exporters = [LogSummaryExporter()]
+    if config.METRICS_PROMETHEUS_PATH:
+        exporters.append(PrometheusFileExporter(config.METRICS_PROMETHEUS_PATH))
+    return MetricsReporter(metrics, exporters, config.METRICS_EXPORT_INTERVAL)
+
+
+def configure_logging():
+    """Set up the root logger at config.LOG_LEVEL, writing to stderr."""
+    logging.basicConfig(level=getattr(logging, str(config.LOG_LEVEL).upper(), logging.WARNING),
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+
+# Shared registry used by the parser, engine and classifiers
+METRICS = Metrics(enabled=config.METRICS_ENABLED)
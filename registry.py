@@ -0,0 +1,269 @@
+"""
+Device Registry
+
+Holds any number of device instances and indexes them by id, type, room and
+normalized name, so lookups and target resolution are dictionary hits rather
+than scans over every device.
+"""
+
+import json
+import re
+from itertools import islice
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from devices import Light, Fan, Thermostat
+from state_store import DeviceStateStore, KIND_CODES, register_kind
+
+# Import shared constants
+import config
+
+# Device type -> class, used when building devices from an inventory
+DEVICE_CLASSES = {
+    config.DEVICE_LIGHT: Light,
+    config.DEVICE_FAN: Fan,
+    config.DEVICE_THERMOSTAT: Thermostat,
+}
+
+
+def register_device_class(device_class) -> None:
+    """
+    Make a device class available to inventories and the state store.
+
+    Args:
+        device_class: DeviceHandle subclass with a unique DEVICE_TYPE
+    """
+    register_kind(device_class.DEVICE_TYPE)
+    DEVICE_CLASSES[device_class.DEVICE_TYPE] = device_class
+
+
+_NON_WORD_PATTERN = re.compile(r"[^\w]+")
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase a device or room name and collapse punctuation and whitespace."""
+    return " ".join(_NON_WORD_PATTERN.sub(" ", name.lower()).split())
+
+
+class DeviceRegistry:
+    """
+    Device instances with O(1) indexes by id, type, room and normalized name.
+
+    The type, room and name indexes map to insertion-ordered dicts of
+    id -> device, so adding and removing devices is O(1) and iteration
+    order is stable. Registered devices keep their state in the registry's
+    DeviceStateStore, where group targets resolve to slot index arrays.
+    """
+
+    def __init__(self, store: Optional[DeviceStateStore] = None):
+        """
+        Args:
+            store (DeviceStateStore): Store for the devices' state (default: a new store)
+        """
+        self.store = store if store is not None else DeviceStateStore()
+        self._by_id: Dict[str, object] = {}
+        self._by_index: Dict[int, object] = {}
+        # Normalized room -> code stored in each device's state slot (0 means no room)
+        self._room_codes: Dict[str, int] = {}
+        self._by_type: Dict[str, Dict[str, object]] = {}
+        self._by_room: Dict[str, Dict[str, object]] = {}
+        self._by_name: Dict[str, Dict[str, object]] = {}
+        self._next_number: Dict[str, int] = {}
+        # Longest room/name in words, bounding the phrases tried during matching
+        self._max_phrase_words = 1
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __iter__(self) -> Iterator:
+        return iter(self._by_id.values())
+
+    def add(self, device):
+        """
+        Register a device, assigning an id like "light-3" if it has none.
+
+        Args:
+            device: Light, Fan or Thermostat instance
+
+        Returns:
+            The registered device
+        """
+        device_type = device.DEVICE_TYPE
+        if device.device_id is None:
+            number = self._next_number.get(device_type, 1)
+            while f"{device_type}-{number}" in self._by_id:
+                number += 1
+            self._next_number[device_type] = number + 1
+            device.device_id = f"{device_type}-{number}"
+        if device.device_id in self._by_id:
+            raise ValueError(f"Device id '{device.device_id}' is already registered.")
+
+        room_code = 0
+        if device.room:
+            room_code = self._room_codes.setdefault(normalize_name(device.room), len(self._room_codes) + 1)
+        device.attach(self.store, room_code)
+
+        self._by_id[device.device_id] = device
+        self._by_index[device.index] = device
+        self._by_type.setdefault(device_type, {})[device.device_id] = device
+        self._by_name.setdefault(normalize_name(device.name), {})[device.device_id] = device
+        if device.room:
+            self._by_room.setdefault(normalize_name(device.room), {})[device.device_id] = device
+        for phrase in (device.name, device.room or ""):
+            self._max_phrase_words = max(self._max_phrase_words, len(normalize_name(phrase).split()))
+        return device
+
+    def remove(self, device_id: str):
+        """Unregister a device by id and return it."""
+        device = self._by_id.pop(device_id)
+        del self._by_index[device.index]
+        # Move the state to a private store so the handle stays usable on its own
+        device.attach(DeviceStateStore(capacity=1))
+        for index, key in ((self._by_type, device.DEVICE_TYPE),
+                           (self._by_name, normalize_name(device.name)),
+                           (self._by_room, normalize_name(device.room or ""))):
+            members = index.get(key)
+            if members is not None:
+                members.pop(device_id, None)
+                if not members:
+                    del index[key]
+        return device
+
+    def get(self, device_id: str):
+        """Return the device with this id, or None."""
+        return self._by_id.get(device_id)
+
+    def by_index(self, index: int):
+        """Return the device occupying a state store slot, or None."""
+        return self._by_index.get(index)
+
+    def by_type(self, device_type: str) -> List:
+        """All devices of a type, in registration order."""
+        return list(self._by_type.get(device_type, {}).values())
+
+    def by_room(self, room: str) -> List:
+        """All devices in a room."""
+        return list(self._by_room.get(normalize_name(room), {}).values())
+
+    def by_name(self, name: str) -> List:
+        """All devices with this name (names are normally unique)."""
+        return list(self._by_name.get(normalize_name(name), {}).values())
+
+    def default(self, device_type: str):
+        """The first registered device of a type, used by commands that name no target."""
+        devices = self._by_type.get(device_type)
+        return next(iter(devices.values())) if devices else None
+
+    def select(self, device_type: str, target: Optional[Dict] = None) -> List:
+        """
+        Resolve a parsed target to devices of one type.
+
+        Args:
+            device_type (str): Device type the command applies to
+            target (dict): {'name', 'room', 'all', 'unresolved'} from the parser, or None
+
+        Returns:
+            list: Matching devices; a name picks that device, a room picks every
+                  device of the type in it, 'all' picks every device of the type,
+                  an 'unresolved' name or room picks none, and no target picks
+                  the type's default device
+        """
+        target = target or {}
+        if target.get("unresolved") and not (target.get("name") or target.get("room")):
+            return []
+        of_type = self._by_type.get(device_type, {})
+        if target.get("name"):
+            candidates = self._by_name.get(normalize_name(target["name"]), {})
+        elif target.get("room"):
+            candidates = self._by_room.get(normalize_name(target["room"]), {})
+        elif target.get("all"):
+            return list(of_type.values())
+        else:
+            default = self.default(device_type)
+            return [default] if default else []
+
+        # Intersect by walking the smaller side
+        if len(candidates) <= len(of_type):
+            return [device for device_id, device in candidates.items() if device_id in of_type]
+        return [device for device_id, device in of_type.items() if device_id in candidates]
+
+    def select_indices(self, device_type: str, target: Optional[Dict] = None) -> np.ndarray:
+        """
+        Resolve a parsed target to state store slots, for vectorized group commands.
+
+        Type and room filters run as one pass over the store's kind and room
+        arrays, so selecting thousands of devices creates no Python objects.
+
+        Args:
+            device_type (str): Device type the command applies to
+            target (dict): {'name', 'room', 'all', 'unresolved'} from the parser, or None
+
+        Returns:
+            np.ndarray: Slot indices of the matching devices (same rules as select)
+        """
+        target = target or {}
+        kind = KIND_CODES[device_type]
+        if target.get("unresolved") and not (target.get("name") or target.get("room")):
+            return np.empty(0, dtype=np.intp)
+        if target.get("room") and not target.get("name"):
+            room_code = self._room_codes.get(normalize_name(target["room"]))
+            if room_code is None:
+                return np.empty(0, dtype=np.intp)
+            return self.store.indices(kind, room_code)
+        if target.get("all") and not target.get("name"):
+            return self.store.indices(kind)
+        return np.array([device.index for device in self.select(device_type, target)], dtype=np.intp)
+
+    def _match_phrase(self, text: str, index: Dict) -> Optional[str]:
+        """Longest phrase of up to _max_phrase_words words in text that is a key of index."""
+        words = normalize_name(text).split()
+        for length in range(min(self._max_phrase_words, len(words)), 0, -1):
+            for start in range(len(words) - length + 1):
+                phrase = " ".join(words[start:start + length])
+                if phrase in index:
+                    return phrase
+        return None
+
+    def match_name(self, text: str) -> Optional[str]:
+        """Normalized device name mentioned in text, or None."""
+        return self._match_phrase(text, self._by_name)
+
+    def match_room(self, text: str) -> Optional[str]:
+        """Normalized room mentioned in text, or None."""
+        return self._match_phrase(text, self._by_room)
+
+    def iter_status(self) -> Iterator[str]:
+        """Yield the status line of every device, one at a time."""
+        for device in self._by_id.values():
+            yield device.get_status()
+
+    def status_page(self, page: int = 1, page_size: int = config.STATUS_PAGE_SIZE) -> List[str]:
+        """Status lines for one page of devices (pages start at 1)."""
+        start = (max(page, 1) - 1) * page_size
+        return list(islice(self.iter_status(), start, start + page_size))
+
+
+def load_inventory(path: str) -> DeviceRegistry:
+    """
+    Build a registry from a JSON inventory file.
+
+    The file holds a list of {"type", "name", "room", "id"} objects; "room"
+    and "id" are optional.
+
+    Args:
+        path (str): Path to the inventory file
+
+    Returns:
+        DeviceRegistry: Registry containing the listed devices
+    """
+    with open(path, encoding="utf-8") as f:
+        entries = json.load(f)
+
+    registry = DeviceRegistry()
+    for entry in entries:
+        device_class = DEVICE_CLASSES.get(entry["type"])
+        if device_class is None:
+            raise ValueError(f"Unknown device type '{entry['type']}' in {path}.")
+        registry.add(device_class(name=entry["name"], room=entry.get("room"), device_id=entry.get("id")))
+    return registry
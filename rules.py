@@ -0,0 +1,371 @@
+"""
+Event-Driven Rules
+
+Reactive automations such as "if the thermostat goes above 26 turn on the
+fan" or "when the light turns off, turn off the fan". A rule's action is
+parsed once, when the rule is created, into ordinary parsed commands.
+
+Rules are evaluated incrementally from the command engine's mutation
+listener: each notification compares the touched slots against the state
+last seen, and only slots that changed and are watched by some rule are
+looked up. Rules are indexed by (attribute, slot):
+    threshold rules   "goes above N" / "drops below N", kept sorted by
+                      threshold, so the rules crossed by a change from old
+                      to new are found with two binary searches
+    equality rules    "turns on/off", "is set to HIGH", keyed by value
+Rules fire on the transition into their condition, not while it holds.
+
+Rule actions run breadth-first after the change that triggered them. A chain
+of rules triggering rules is one cascade; within a cascade each rule fires at
+most once (which breaks cycles such as "when the light turns on turn off the
+fan" / "when the fan turns off turn on the light"), chains deeper than
+RULES_MAX_CASCADE_DEPTH are cut, and at most RULES_MAX_FIRINGS_PER_EVENT rules
+fire in total.
+"""
+
+import bisect
+import collections
+import itertools
+import logging
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Import shared constants
+import config
+from command_parser import resolve_target
+from devices import Fan
+from fast_path import DEVICE_WORDS
+
+logger = logging.getLogger(__name__)
+
+ABOVE, BELOW, EQUALS = "above", "below", "equals"
+ATTRIBUTES = ("power", "speed", "temperature")
+
+_SUBJECT = r'(?:if|when|whenever)\s+(?P<subject>.+?)\s+'
+_VALUE = r'(?P<value>\d+(?:\.\d+)?)(?:\s*°?c|\s*degrees)?'
+# Each pattern captures the trigger; the rest of the utterance is the action
+_TRIGGER_PATTERNS = [
+    (re.compile(_SUBJECT + r'(?:(?:goes|rises|climbs|gets|is|are)\s+(?:above|over|higher\s+than)|exceeds)\s+'
+                + _VALUE + r'\b', re.IGNORECASE), ABOVE),
+    (re.compile(_SUBJECT + r'(?:goes|drops|falls|gets|is|are)\s+(?:below|under|lower\s+than)\s+'
+                + _VALUE + r'\b', re.IGNORECASE), BELOW),
+    (re.compile(_SUBJECT + r'(?:turns|is\s+turned|are\s+turned|is\s+switched|switches|goes|is|are)\s+'
+                r'(?P<value>on|off)\b', re.IGNORECASE), "power"),
+    (re.compile(_SUBJECT + r'(?:is\s+set\s+to|goes\s+to|switches\s+to|changes\s+to|is|are)\s+'
+                r'(?P<value>low|medium|high)\b', re.IGNORECASE), "speed"),
+]
+LIST_PATTERN = re.compile(r'^\s*(?:list|show)?\s*(?:the\s+)?rules\s*$', re.IGNORECASE)
+DELETE_PATTERN = re.compile(r'^\s*(?:cancel|delete|remove)\s+rule\s+#?(\d+)\s*$', re.IGNORECASE)
+_ACTION_PREFIX = re.compile(r'^[\s,;]*(?:then\s+)?', re.IGNORECASE)
+_DEVICE_PATTERNS = {device_type: re.compile(r'\b(?:' + '|'.join(words) + r')\b', re.IGNORECASE)
+                    for device_type, words in DEVICE_WORDS.items()}
+
+
+class RuleSpec:
+    """A rule's trigger, and the action text left after it."""
+
+    __slots__ = ("subject", "attribute", "operator", "value", "action")
+
+    def __init__(self, subject: str, attribute: str, operator: str, value: float, action: str):
+        """
+        Args:
+            subject (str): Words naming the watched devices, e.g. "the bedroom thermostat"
+            attribute (str): State column watched: "power", "speed" or "temperature"
+            operator (str): ABOVE, BELOW or EQUALS
+            value (float): Threshold, or the value to equal (power 0/1, speed index)
+            action (str): Command text to run, e.g. "turn on the fan"
+        """
+        self.subject = subject
+        self.attribute = attribute
+        self.operator = operator
+        self.value = value
+        self.action = action
+
+    def describe(self) -> str:
+        """Normalized rule text, e.g. "when the thermostat goes above 26: turn on the fan"."""
+        if self.operator == EQUALS and self.attribute == "power":
+            condition = "turns on" if self.value else "turns off"
+        elif self.operator == EQUALS:
+            condition = f"is set to {Fan.SPEEDS[int(self.value)]}"
+        else:
+            condition = f"goes {self.operator} {self.value:g}"
+        return f"when {self.subject} {condition}: {self.action}"
+
+    def __repr__(self):
+        return f"RuleSpec({self.subject!r} {self.attribute} {self.operator} {self.value:g} -> {self.action!r})"
+
+
+def parse_rule(user_input) -> Optional[RuleSpec]:
+    """
+    Split an "if/when <trigger> <action>" utterance into its trigger and action.
+
+    Returns:
+        RuleSpec: The rule, or None when the utterance is not a rule
+    """
+    if not isinstance(user_input, str):
+        return None
+    for pattern, kind in _TRIGGER_PATTERNS:
+        match = pattern.match(user_input.strip())
+        if match is None:
+            continue
+        value = match.group("value").lower()
+        if kind == "power":
+            attribute, operator, value = "power", EQUALS, float(value == "on")
+        elif kind == "speed":
+            attribute, operator, value = "speed", EQUALS, float(Fan.SPEEDS.index(value.upper()))
+        else:
+            attribute, operator, value = "temperature", kind, float(value)
+        action = _ACTION_PREFIX.sub("", user_input.strip()[match.end():]).strip()
+        return RuleSpec(match.group("subject"), attribute, operator, value, action)
+    return None
+
+
+def resolve_subject(registry, subject: str) -> Tuple[Optional[str], np.ndarray]:
+    """
+    Resolve the devices a trigger refers to ("the thermostat", "kitchen lights", "Desk Lamp").
+
+    Returns:
+        tuple: (device type or None, state store slots)
+    """
+    name = registry.match_name(subject)
+    device_type = None
+    if name is not None:
+        devices = registry.by_name(name)
+        device_type = devices[0].DEVICE_TYPE if devices else None
+    if device_type is None:
+        device_type = next((device_type for device_type, pattern in _DEVICE_PATTERNS.items()
+                            if pattern.search(subject)), None)
+    if device_type is None:
+        return None, np.empty(0, dtype=np.intp)
+    return device_type, registry.select_indices(device_type, resolve_target(registry, subject))
+
+
+class Rule:
+    """A trigger on some slots' attribute, and the parsed commands it runs."""
+
+    __slots__ = ("id", "text", "slots", "attribute", "operator", "value", "commands", "fired")
+
+    def __init__(self, rule_id: int, text: str, slots: np.ndarray, attribute: str, operator: str,
+                 value: float, commands: List[Dict]):
+        self.id = rule_id
+        self.text = text
+        self.slots = slots
+        self.attribute = attribute
+        self.operator = operator
+        self.value = value
+        self.commands = commands
+        self.fired = 0
+
+    def describe(self) -> str:
+        """One-line description, e.g. "#2 (fired 3x): if the thermostat goes above 26 turn on the fan"."""
+        return f"#{self.id} (fired {self.fired}x): {self.text}"
+
+
+class RuleEngine:
+    """Indexed trigger matching over one DeviceStateStore, fed by CommandEngine mutation notifications."""
+
+    def __init__(self, store, execute: Callable[[Rule], object],
+                 max_cascade_depth: int = config.RULES_MAX_CASCADE_DEPTH,
+                 max_firings: int = config.RULES_MAX_FIRINGS_PER_EVENT):
+        """
+        Args:
+            store (DeviceStateStore): Store whose changes trigger rules
+            execute (callable): Runs a fired rule's commands
+            max_cascade_depth (int): Longest chain of rules triggering rules
+            max_firings (int): Most rules fired by one external change, cascade included
+        """
+        self.store = store
+        self.execute = execute
+        self.max_cascade_depth = max_cascade_depth
+        self.max_firings = max_firings
+        self.rules: Dict[int, Rule] = {}
+        self.suppressed = 0
+        self._ids = itertools.count(1)
+        # (attribute, slot) -> ([sorted thresholds], [rules in the same order])
+        self._thresholds = {ABOVE: {}, BELOW: {}}
+        # (attribute, slot) -> {value: [rules]}
+        self._equals: Dict[Tuple[str, int], Dict[float, List[Rule]]] = {}
+        self._queue = collections.deque()
+        self._depth = 0
+        self._draining = False
+        self._allocate(store.capacity)
+        self._previous_slots(np.arange(store.capacity))
+
+    def _allocate(self, slots: int):
+        """Create or grow the last-seen state and the watched masks to cover `slots`."""
+        old = getattr(self, "_watched", None)
+        watched = {attribute: np.zeros(slots, dtype=bool) for attribute in ATTRIBUTES}
+        previous = {attribute: np.zeros(slots, dtype=getattr(self.store, attribute).dtype) for attribute in ATTRIBUTES}
+        if old is not None:
+            for attribute in ATTRIBUTES:
+                rows = len(old[attribute])
+                watched[attribute][:rows] = old[attribute]
+                previous[attribute][:rows] = self._previous[attribute]
+        self._watched, self._previous = watched, previous
+
+    def _previous_slots(self, indices: np.ndarray):
+        """Remember the current state of the given slots as last seen."""
+        for attribute in ATTRIBUTES:
+            self._previous[attribute][indices] = getattr(self.store, attribute)[indices]
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    # ----- rule management -----
+
+    def add(self, slots, attribute: str, operator: str, value: float, commands: List[Dict],
+            text: str = "") -> Rule:
+        """
+        Add a rule watching an attribute of the given slots.
+
+        Args:
+            slots (array-like): State store slots to watch
+            attribute (str): "power", "speed" or "temperature"
+            operator (str): ABOVE, BELOW or EQUALS
+            value (float): Threshold or value
+            commands (list): Parsed clauses to execute when the rule fires
+            text (str): Rule text, for listings
+
+        Returns:
+            Rule: The new rule
+        """
+        if attribute not in ATTRIBUTES:
+            raise ValueError(f"Unknown rule attribute '{attribute}'. Choose from: {', '.join(ATTRIBUTES)}")
+        if operator not in (ABOVE, BELOW, EQUALS):
+            raise ValueError(f"Unknown rule operator '{operator}'.")
+        rule = Rule(next(self._ids), text, np.unique(np.asarray(slots, dtype=np.intp)), attribute, operator,
+                    float(value), commands)
+        if self.store.capacity > len(self._watched[attribute]):
+            self._allocate(self.store.capacity)
+        for slot in rule.slots.tolist():
+            key = (attribute, slot)
+            if operator == EQUALS:
+                self._equals.setdefault(key, {}).setdefault(rule.value, []).append(rule)
+            else:
+                thresholds, rules = self._thresholds[operator].setdefault(key, ([], []))
+                position = bisect.bisect_right(thresholds, rule.value)
+                thresholds.insert(position, rule.value)
+                rules.insert(position, rule)
+        self._watched[attribute][rule.slots] = True
+        self.rules[rule.id] = rule
+        return rule
+
+    def remove(self, rule_id: int) -> bool:
+        """
+        Delete a rule.
+
+        Returns:
+            bool: False when no such rule exists
+        """
+        rule = self.rules.pop(rule_id, None)
+        if rule is None:
+            return False
+        for slot in rule.slots.tolist():
+            key = (rule.attribute, slot)
+            if rule.operator == EQUALS:
+                by_value = self._equals[key]
+                by_value[rule.value].remove(rule)
+                if not by_value[rule.value]:
+                    del by_value[rule.value]
+                if not by_value:
+                    del self._equals[key]
+            else:
+                thresholds, rules = self._thresholds[rule.operator][key]
+                position = rules.index(rule)
+                del thresholds[position], rules[position]
+                if not rules:
+                    del self._thresholds[rule.operator][key]
+            if (key not in self._equals and key not in self._thresholds[ABOVE]
+                    and key not in self._thresholds[BELOW]):
+                self._watched[rule.attribute][slot] = False
+        return True
+
+    # ----- evaluation -----
+
+    def match(self, indices) -> List[Rule]:
+        """
+        Rules whose condition became true since the given slots were last seen, and remember their new state.
+
+        Args:
+            indices (array-like): Slots that may have changed
+
+        Returns:
+            list: Triggered rules, each once, in attribute then slot order
+        """
+        indices = np.unique(np.asarray(indices, dtype=np.intp))
+        if len(indices) == 0:
+            return []
+        if self.store.capacity > len(self._watched["power"]):
+            self._allocate(self.store.capacity)
+
+        triggered: List[Rule] = []
+        for attribute in ATTRIBUTES:
+            current = getattr(self.store, attribute)
+            old = self._previous[attribute][indices]
+            new = current[indices]
+            candidates = (old != new) & self._watched[attribute][indices]
+            if not candidates.any():
+                continue
+            for slot, before, after in zip(indices[candidates].tolist(), old[candidates].tolist(),
+                                           new[candidates].tolist()):
+                self._match_slot(attribute, slot, float(before), float(after), triggered)
+        self._previous_slots(indices)
+
+        # A rule watching several slots fires once per change
+        seen = set()
+        return [rule for rule in triggered if not (rule.id in seen or seen.add(rule.id))]
+
+    def _match_slot(self, attribute: str, slot: int, before: float, after: float, triggered: List[Rule]):
+        """Append the rules of one slot crossed by a change from before to after."""
+        key = (attribute, slot)
+        by_value = self._equals.get(key)
+        if by_value is not None:
+            triggered.extend(by_value.get(after, ()))
+        if after > before:
+            # Above t became true: before <= t < after
+            entry = self._thresholds[ABOVE].get(key)
+            if entry is not None:
+                thresholds, rules = entry
+                triggered.extend(rules[bisect.bisect_left(thresholds, before):bisect.bisect_left(thresholds, after)])
+        else:
+            # Below t became true: after < t <= before
+            entry = self._thresholds[BELOW].get(key)
+            if entry is not None:
+                thresholds, rules = entry
+                triggered.extend(rules[bisect.bisect_right(thresholds, after):bisect.bisect_right(thresholds, before)])
+
+    def on_mutation(self, parsed_command, indices):
+        """CommandEngine mutation listener: fire the rules the change triggers, and any cascade they cause."""
+        triggered = self.match(indices)
+        self._queue.extend((rule, self._depth + 1) for rule in triggered)
+        if self._draining:
+            # Inside a rule's action: the outer call runs these after the current level
+            return
+
+        self._draining = True
+        fired = set()
+        try:
+            while self._queue:
+                rule, depth = self._queue.popleft()
+                if rule.id not in self.rules:
+                    continue
+                if rule.id in fired or depth > self.max_cascade_depth or len(fired) >= self.max_firings:
+                    self.suppressed += 1
+                    logger.warning("Rule #%d suppressed (%s).", rule.id,
+                                   "already fired in this cascade" if rule.id in fired else
+                                   f"cascade deeper than {self.max_cascade_depth}" if depth > self.max_cascade_depth
+                                   else f"more than {self.max_firings} rules fired")
+                    continue
+                fired.add(rule.id)
+                rule.fired += 1
+                self._depth = depth
+                try:
+                    self.execute(rule)
+                except Exception:
+                    logger.exception("Rule #%d failed", rule.id)
+        finally:
+            self._queue.clear()
+            self._depth = 0
+            self._draining = False
@@ -0,0 +1,312 @@
+"""
+Scheduled Automations
+
+Turns utterances with a time of day ("turn off the light at 23:00", "every
+weekday at 6:30 set thermostat to 21") into schedules whose command part is
+parsed once, when the schedule is created, into the same parsed-command
+structures execute_command consumes.
+
+Due times live in a binary heap of (due time, sequence, schedule) entries:
+adding a schedule and firing one are both O(log n). A background thread
+sleeps on a condition until the earliest due time (it is woken early when a
+sooner schedule is added), so nothing polls. Cancelled schedules stay in the
+heap and are skipped when they surface; the heap is rebuilt once they make
+up most of it.
+
+The clock is injectable: with a simulated clock, call run_due() instead of
+start() to fire whatever is due at the simulated time.
+"""
+
+import heapq
+import itertools
+import logging
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_DAY_NAMES = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+# Days (datetime.weekday() values) each recurrence word stands for
+RECURRENCES = {
+    "day": frozenset(range(7)),
+    "daily": frozenset(range(7)),
+    "weekday": frozenset(range(5)),
+    "weekend": frozenset((5, 6)),
+    **{name: frozenset((day,)) for day, name in enumerate(_DAY_NAMES)},
+}
+
+# A time of day needs minutes or am/pm, so "set the thermostat at 22" stays a plain command
+TIME_PATTERN = re.compile(r'\bat\s+(\d{1,2})(?::(\d{2})\s*(am|pm)?|\s*(am|pm))\b', re.IGNORECASE)
+RECURRENCE_PATTERN = re.compile(
+    r'\b(?:(?:every|each|on)\s+(day|weekday|weekend|' + '|'.join(_DAY_NAMES) + r')s?|(daily))\b', re.IGNORECASE)
+LIST_PATTERN = re.compile(r'^\s*(?:list|show)?\s*(?:the\s+)?schedules?\s*$', re.IGNORECASE)
+CANCEL_PATTERN = re.compile(r'^\s*(?:cancel|delete|remove)\s+schedule\s+#?(\d+)\s*$', re.IGNORECASE)
+_LEFTOVER_PATTERN = re.compile(r'^[\s,;]*(?:and\s+|then\s+)?|[\s,;]*$', re.IGNORECASE)
+
+
+class ScheduleSpec:
+    """When a scheduled utterance runs, and the command text left once the time words are removed."""
+
+    __slots__ = ("command", "hour", "minute", "days")
+
+    def __init__(self, command: str, hour: int, minute: int, days: Optional[FrozenSet[int]] = None):
+        """
+        Args:
+            command (str): Command text to parse, e.g. "set thermostat to 21"
+            hour (int): Hour of day (0-23)
+            minute (int): Minute (0-59)
+            days (frozenset): Weekdays to repeat on (0 = Monday), or None to run once
+        """
+        self.command = command
+        self.hour = hour
+        self.minute = minute
+        self.days = days
+
+    def __repr__(self):
+        days = None if self.days is None else sorted(self.days)
+        return f"ScheduleSpec({self.command!r}, {self.hour:02d}:{self.minute:02d}, days={days})"
+
+
+def parse_schedule(user_input) -> Optional[ScheduleSpec]:
+    """
+    Split an utterance into its schedule and command text.
+
+    Args:
+        user_input (str): e.g. "every weekday at 6:30 set thermostat to 21"
+
+    Returns:
+        ScheduleSpec: The schedule, or None when the utterance has no time of day
+    """
+    if not isinstance(user_input, str):
+        return None
+    match = TIME_PATTERN.search(user_input)
+    if match is None:
+        return None
+    hour, minute = int(match.group(1)), int(match.group(2) or 0)
+    meridiem = (match.group(3) or match.group(4) or "").lower()
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if meridiem == "pm" else 0)
+    if hour > 23 or minute > 59:
+        return None
+
+    command = user_input[:match.start()] + " " + user_input[match.end():]
+    days = None
+    recurrence = RECURRENCE_PATTERN.search(command)
+    if recurrence is not None:
+        days = RECURRENCES[(recurrence.group(1) or recurrence.group(2)).lower()]
+        command = command[:recurrence.start()] + " " + command[recurrence.end():]
+    command = _LEFTOVER_PATTERN.sub("", " ".join(command.split()))
+    return ScheduleSpec(command, hour, minute, days)
+
+
+def next_occurrence(after: float, hour: int, minute: int, days: Optional[FrozenSet[int]] = None) -> float:
+    """
+    First local time strictly after `after` at hour:minute on one of `days` (any day when None).
+
+    Returns:
+        float: Unix timestamp
+    """
+    start = datetime.fromtimestamp(after)
+    candidate = start.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if candidate <= start:
+        candidate += timedelta(days=1)
+    while days is not None and candidate.weekday() not in days:
+        candidate += timedelta(days=1)
+    return candidate.timestamp()
+
+
+class Schedule:
+    """A scheduled command: its parsed clauses and when it next runs."""
+
+    __slots__ = ("id", "text", "commands", "hour", "minute", "days", "next_run", "cancelled")
+
+    def __init__(self, schedule_id: int, text: str, commands: List[Dict], hour: int, minute: int,
+                 days: Optional[FrozenSet[int]], next_run: float):
+        self.id = schedule_id
+        self.text = text
+        self.commands = commands
+        self.hour = hour
+        self.minute = minute
+        self.days = days
+        self.next_run = next_run
+        self.cancelled = False
+
+    def describe(self) -> str:
+        """One-line description, e.g. "#3 every weekday at 06:30: set thermostat to 21"."""
+        if self.days is None:
+            when = "once"
+        elif len(self.days) == 7:
+            when = "every day"
+        else:
+            names = {RECURRENCES[name]: name for name in ("weekday", "weekend")}
+            when = "every " + names.get(self.days, ", ".join(_DAY_NAMES[day] for day in sorted(self.days)))
+        due = datetime.fromtimestamp(self.next_run).strftime("%a %Y-%m-%d %H:%M")
+        return f"#{self.id} {when} at {self.hour:02d}:{self.minute:02d}: {self.text} (next: {due})"
+
+
+class Scheduler:
+    """Heap-based timer queue that runs schedules when they come due."""
+
+    def __init__(self, execute: Callable[[Schedule], object], clock: Callable[[], float] = time.time):
+        """
+        Args:
+            execute (callable): Called with each schedule when it fires
+            clock (callable): Returns the current time in seconds (injectable for simulated time)
+        """
+        self.execute = execute
+        self.clock = clock
+        self.schedules: Dict[int, Schedule] = {}
+        self._heap: List[Tuple[float, int, Schedule]] = []
+        self._ids = itertools.count(1)
+        self._sequence = itertools.count()
+        self._cancelled = 0
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+
+    def __len__(self) -> int:
+        return len(self.schedules)
+
+    def add(self, commands: List[Dict], hour: int, minute: int, days: Optional[FrozenSet[int]] = None,
+            text: str = "") -> Schedule:
+        """
+        Schedule parsed commands at hour:minute, once or on the given weekdays.
+
+        Args:
+            commands (list): Parsed clauses to execute together
+            hour (int): Hour of day (0-23)
+            minute (int): Minute (0-59)
+            days (frozenset): Weekdays to repeat on (0 = Monday), or None to run once
+            text (str): Command text, for listings
+
+        Returns:
+            Schedule: The new schedule
+        """
+        with self._condition:
+            schedule = Schedule(next(self._ids), text, commands, hour, minute, days,
+                                next_occurrence(self.clock(), hour, minute, days))
+            self.schedules[schedule.id] = schedule
+            self._push(schedule)
+        return schedule
+
+    def _push(self, schedule: Schedule):
+        """Queue a schedule at its next_run, waking the thread if it is now the earliest (caller holds the lock)."""
+        heapq.heappush(self._heap, (schedule.next_run, next(self._sequence), schedule))
+        if self._heap[0][2] is schedule:
+            self._condition.notify()
+
+    def cancel(self, schedule_id: int) -> bool:
+        """
+        Cancel a schedule.
+
+        Returns:
+            bool: False when no such schedule exists
+        """
+        with self._condition:
+            schedule = self.schedules.pop(schedule_id, None)
+            if schedule is None:
+                return False
+            schedule.cancelled = True
+            self._cancelled += 1
+            # Drop dead entries once they outnumber live ones, keeping the heap O(live schedules)
+            if self._cancelled > 64 and self._cancelled * 2 > len(self._heap):
+                self._heap = [entry for entry in self._heap if not entry[2].cancelled]
+                heapq.heapify(self._heap)
+                self._cancelled = 0
+            return True
+
+    def pending(self) -> List[Schedule]:
+        """Live schedules, soonest first."""
+        with self._condition:
+            return sorted(self.schedules.values(), key=lambda schedule: schedule.next_run)
+
+    def next_due(self) -> Optional[float]:
+        """Due time of the earliest live schedule, or None when nothing is scheduled."""
+        with self._condition:
+            self._discard_cancelled()
+            return self._heap[0][0] if self._heap else None
+
+    def _discard_cancelled(self):
+        """Pop cancelled entries off the top of the heap (caller holds the lock)."""
+        while self._heap and self._heap[0][2].cancelled:
+            heapq.heappop(self._heap)
+            self._cancelled -= 1
+
+    def run_due(self, now: Optional[float] = None) -> int:
+        """
+        Fire every schedule due at or before now, in due order.
+
+        A recurring schedule is queued again at its next occurrence after now,
+        so occurrences missed while the process was suspended fire only once.
+
+        Args:
+            now (float): Current time (default: the clock)
+
+        Returns:
+            int: Number of schedules fired
+        """
+        now = self.clock() if now is None else now
+        due: List[Schedule] = []
+        with self._condition:
+            self._discard_cancelled()
+            while self._heap and self._heap[0][0] <= now:
+                _, _, schedule = heapq.heappop(self._heap)
+                if schedule.cancelled:
+                    self._cancelled -= 1
+                    continue
+                due.append(schedule)
+                if schedule.days is None:
+                    del self.schedules[schedule.id]
+                else:
+                    schedule.next_run = next_occurrence(now, schedule.hour, schedule.minute, schedule.days)
+                    self._push(schedule)
+                self._discard_cancelled()
+
+        # Execute outside the lock so commands may add or cancel schedules
+        for schedule in due:
+            try:
+                self.execute(schedule)
+            except Exception:
+                logger.exception("Schedule #%d failed", schedule.id)
+        return len(due)
+
+    # ----- background thread -----
+
+    def start(self):
+        """Run due schedules from a daemon thread until stop() (no-op when already running)."""
+        with self._condition:
+            if self._thread is not None:
+                return
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name="scheduler", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        """Sleep until the earliest due time, fire what is due, repeat."""
+        while True:
+            with self._condition:
+                if self._stopped:
+                    return
+                self._discard_cancelled()
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+                delay = self._heap[0][0] - self.clock()
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+            self.run_due()
+
+    def stop(self):
+        """Stop the background thread."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
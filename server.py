@@ -0,0 +1,169 @@
+"""
+Smart Home Command Server
+
+Loads the SmartHomeController once and serves commands over a local TCP or
+Unix socket, so the model is not reloaded for every session and several
+clients can share it.
+
+Protocol: one JSON object per line in each direction.
+    request:  {"command": "turn on the light"}
+              {"op": "startup_report"}
+    response: {"response": "The Living Room Light is now ON."}
+
+Concurrent requests are coalesced into micro-batches (up to
+SERVER_MAX_BATCH_SIZE commands, waiting at most SERVER_MAX_WAIT_MS for a
+batch to fill) and parsed with one batched inference. Batches are executed
+one at a time in arrival order, so device mutations are applied in the
+order the server received the commands.
+
+    python server.py [--address HOST:PORT | --address unix:/path/to/socket]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from client import parse_address
+from controller import SmartHomeController
+from metrics import configure_logging, start_reporting
+
+# Import shared constants
+import config
+
+
+class CommandServer:
+    """Asyncio front end that micro-batches commands for a single controller."""
+
+    def __init__(self, controller, max_batch_size=config.SERVER_MAX_BATCH_SIZE,
+                 max_wait_ms=config.SERVER_MAX_WAIT_MS):
+        """
+        Args:
+            controller (SmartHomeController): Controller owning the model and device state
+            max_batch_size (int): Maximum commands per micro-batch
+            max_wait_ms (float): Maximum time to wait for a micro-batch to fill
+        """
+        self.controller = controller
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue = None
+        # A single worker thread runs batches, keeping inference off the event loop
+        # and guaranteeing batches never overlap
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="command-batch")
+
+    async def submit(self, command):
+        """Queue a command and wait for its response."""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((command, future))
+        return await future
+
+    async def _batcher(self):
+        """Collect queued commands into micro-batches and process them in arrival order."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            commands = [command for command, _ in batch]
+            try:
+                responses = await loop.run_in_executor(self.executor, self.controller.process_commands, commands)
+            except Exception as e:
+                responses = [f"Error processing command: {e}"] * len(batch)
+            for (_, future), response in zip(batch, responses):
+                if not future.done():
+                    future.set_result(response)
+
+    async def _handle_client(self, reader, writer):
+        """Serve one connection: read JSON lines and answer each in turn."""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    # Malformed JSON or undecodable bytes
+                    reply = {"error": "Invalid JSON request."}
+                else:
+                    if not isinstance(request, dict):
+                        reply = {"error": "Request must be a JSON object."}
+                    elif request.get("op") == "startup_report":
+                        reply = {"response": self.controller.startup_report()}
+                    else:
+                        reply = {"response": await self.submit(str(request.get("command", "")))}
+                writer.write(json.dumps(reply).encode("utf-8") + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, address):
+        """
+        Listen on an address until cancelled.
+
+        Args:
+            address (str): "HOST:PORT" or "unix:/path"
+        """
+        self.queue = asyncio.Queue()
+        batcher = asyncio.create_task(self._batcher())
+
+        transport, location = parse_address(address)
+        if transport == "unix":
+            if os.path.exists(location):
+                os.unlink(location)
+            server = await asyncio.start_unix_server(self._handle_client, path=location)
+        else:
+            server = await asyncio.start_server(self._handle_client, *location)
+
+        print(f"Smart Home server listening on {address}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+            self.executor.shutdown(wait=False)
+
+
+def main():
+    """Start the command server."""
+    parser = argparse.ArgumentParser(description="Serve smart home commands over a local socket.")
+    parser.add_argument("--address", default=config.SERVER_ADDRESS,
+                        help="HOST:PORT or unix:/path/to/socket (default: %(default)s)")
+    parser.add_argument("--max-batch-size", type=int, default=config.SERVER_MAX_BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=config.SERVER_MAX_WAIT_MS)
+    args = parser.parse_args()
+
+    configure_logging()
+    # The controller comes before any background thread: with INFERENCE_WORKERS > 1
+    # it forks the inference workers
+    controller = SmartHomeController()
+    # Periodic metrics export, when config.METRICS_ENABLED is set
+    reporter = start_reporting()
+    try:
+        controller.scheduler.start()
+        server = CommandServer(controller, args.max_batch_size, args.max_wait_ms)
+        asyncio.run(server.serve(args.address))
+    finally:
+        controller.close()
+        if reporter is not None:
+            reporter.stop()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\nServer stopped.")
+        sys.exit(0)
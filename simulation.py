@@ -0,0 +1,165 @@
+"""
+Thermal Simulation
+
+Models how the room temperature behind each thermostat evolves, so
+automations and schedules can be load-tested against realistic behaviour
+instead of setpoints that take effect instantly. Every thermostat slot in
+the state store is one zone, and all zones step together as NumPy array
+updates:
+
+    dT/dt = -loss_rate * (T - outdoor) + hvac
+
+where hvac is the HVAC output driven by the setpoint (proportional to the
+gap between setpoint and room temperature, capped at hvac_rate) and boosted
+by the airflow of the fastest fan in the same room. With hvac held
+constant over a step, the equation is solved exactly, so steps of minutes
+stay stable. Setpoints and fan speeds are read from the store on every
+step, so commands take effect on the next step.
+
+The simulation keeps its own clock (`now`), which can be passed as the
+clock of a Scheduler or SmartHomeController to drive them at simulated
+speed. With `thresholds`, crossings of those room temperatures are reported
+to a callback after each step.
+"""
+
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Import shared constants
+import config
+from state_store import KIND_CODES
+
+# Fan speed index (0-3) as a fraction of full airflow
+_AIRFLOW_PER_SPEED = 1 / 3
+
+
+class ThermalSimulation:
+    """Vectorized room temperature model for every thermostat in a DeviceStateStore."""
+
+    def __init__(self, store, start_time: float = 0.0, step_seconds: float = config.SIM_STEP_SECONDS,
+                 outdoor=config.SIM_OUTDOOR_TEMP, loss_rate=config.SIM_HEAT_LOSS_RATE,
+                 hvac_rate=config.SIM_HVAC_RATE, hvac_gain=config.SIM_HVAC_GAIN,
+                 fan_boost=config.SIM_FAN_BOOST, initial=None,
+                 thresholds: Sequence[float] = (),
+                 on_cross: Optional[Callable[[List[Tuple[int, float, bool, float]]], None]] = None):
+        """
+        Args:
+            store (DeviceStateStore): Store holding the thermostats (setpoints) and fans
+            start_time (float): Simulated time of the first step, in seconds
+            step_seconds (float): Simulated seconds per step
+            outdoor (float or np.ndarray): Outdoor temperature, for all zones or one per zone
+            loss_rate (float or np.ndarray): Heat loss to outdoors, per second; 0 for a
+                                             perfectly insulated zone
+            hvac_rate (float or np.ndarray): Largest HVAC heating/cooling rate, in °C per second
+            hvac_gain (float): HVAC output per °C between setpoint and room, per second
+            fan_boost (float): Extra HVAC effect at full fan airflow (0.5 = +50%)
+            initial (float or np.ndarray): Starting room temperatures (default: the setpoints)
+            thresholds (sequence): Room temperatures whose crossings are reported
+            on_cross (callable): Called after a step with (slot, threshold, rising, time) per crossing
+
+        Raises:
+            ValueError: If a loss rate is negative
+        """
+        self.store = store
+        self.now = float(start_time)
+        self.step_seconds = step_seconds
+        self.hvac_gain = hvac_gain
+        self.fan_boost = fan_boost
+        self.thresholds = np.sort(np.asarray(thresholds, dtype=np.float64))
+        self.on_cross = on_cross
+        self.steps = 0
+        self.refresh()
+
+        zones = len(self.zones)
+        self.outdoor = np.broadcast_to(np.asarray(outdoor, dtype=np.float64), zones).copy()
+        self.loss_rate = np.broadcast_to(np.asarray(loss_rate, dtype=np.float64), zones).copy()
+        if np.any(self.loss_rate < 0):
+            raise ValueError("Heat loss rates must not be negative.")
+        self.hvac_rate = np.broadcast_to(np.asarray(hvac_rate, dtype=np.float64), zones).copy()
+        if initial is None:
+            self.temperature = self.store.temperature[self.zones].astype(np.float64)
+        else:
+            self.temperature = np.broadcast_to(np.asarray(initial, dtype=np.float64), zones).copy()
+
+    def refresh(self):
+        """Re-read which slots are thermostats and fans, and their rooms (after devices are added)."""
+        store = self.store
+        self.zones = store.indices(KIND_CODES[config.DEVICE_THERMOSTAT])
+        self.fans = store.indices(KIND_CODES[config.DEVICE_FAN])
+        self.zone_rooms = store.room[self.zones].astype(np.intp)
+        self.fan_rooms = store.room[self.fans].astype(np.intp)
+        self._room_count = int(max(self.zone_rooms.max(initial=0), self.fan_rooms.max(initial=0))) + 1
+
+    def airflow(self) -> np.ndarray:
+        """Airflow (0-1) reaching each zone: the fastest running fan in its room; zones without a room get none."""
+        by_room = np.zeros(self._room_count)
+        speeds = self.store.speed[self.fans] * self.store.power[self.fans] * _AIRFLOW_PER_SPEED
+        np.maximum.at(by_room, self.fan_rooms, speeds)
+        by_room[0] = 0.0
+        return by_room[self.zone_rooms]
+
+    def step(self, steps: int = 1) -> np.ndarray:
+        """
+        Advance every zone by `steps` steps.
+
+        Returns:
+            np.ndarray: Room temperature per zone (aligned with self.zones)
+        """
+        dt = self.step_seconds
+        decay = np.exp(-self.loss_rate * dt)
+        # (1 - decay) / loss_rate, whose limit for an insulated zone (loss_rate 0) is dt
+        relax = np.divide(-np.expm1(-self.loss_rate * dt), self.loss_rate,
+                          out=np.full(len(self.loss_rate), float(dt)), where=self.loss_rate > 0)
+        for _ in range(steps):
+            setpoints = self.store.temperature[self.zones]
+            hvac = np.clip(self.hvac_gain * (setpoints - self.temperature), -self.hvac_rate, self.hvac_rate)
+            if len(self.fans):
+                hvac *= 1.0 + self.fan_boost * self.airflow()
+            # Exact solution over the step: relax towards the equilibrium outdoor + hvac / loss_rate,
+            # written without the division so an insulated zone just gains hvac * dt
+            previous = self.temperature
+            self.temperature = previous * decay + (self.loss_rate * self.outdoor + hvac) * relax
+            self.now += dt
+            self.steps += 1
+            if self.on_cross is not None and len(self.thresholds):
+                self._report_crossings(previous)
+        return self.temperature
+
+    def _report_crossings(self, previous: np.ndarray):
+        """Pass the zones whose temperature crossed a threshold during the last step to on_cross."""
+        before = np.searchsorted(self.thresholds, previous, side="right")
+        after = np.searchsorted(self.thresholds, self.temperature, side="right")
+        changed = np.flatnonzero(before != after)
+        if len(changed) == 0:
+            return
+        events = []
+        for zone, low, high in zip(changed.tolist(), before[changed].tolist(), after[changed].tolist()):
+            rising = high > low
+            crossed = self.thresholds[low:high] if rising else self.thresholds[high:low][::-1]
+            slot = int(self.zones[zone])
+            events.extend((slot, float(threshold), rising, self.now) for threshold in crossed.tolist())
+        self.on_cross(events)
+
+    def run(self, seconds: float, scheduler=None) -> int:
+        """
+        Step through `seconds` of simulated time.
+
+        Args:
+            seconds (float): Simulated duration
+            scheduler (Scheduler): Fired at each step's simulated time, so schedules change
+                                   setpoints as the simulation runs
+
+        Returns:
+            int: Steps taken
+        """
+        steps = int(round(seconds / self.step_seconds))
+        for _ in range(steps):
+            self.step()
+            if scheduler is not None:
+                scheduler.run_due(self.now)
+        return steps
+
+    def clock(self) -> float:
+        """Current simulated time; pass as `clock=` to a Scheduler or SmartHomeController."""
+        return self.now
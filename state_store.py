@@ -0,0 +1,194 @@
+"""
+Columnar Device State Store
+
+Keeps the state of every device in typed NumPy arrays, one slot per device,
+instead of per-object attributes. Device objects in devices.py are thin
+handles onto a slot, and group commands ("turn off everything", "set all
+thermostats to 20") run as single vectorized operations over many slots.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+# Import shared constants
+import config
+
+# Device type -> kind code stored per slot (0 marks a free slot)
+KIND_FREE = 0
+KIND_CODES = {
+    config.DEVICE_LIGHT: 1,
+    config.DEVICE_FAN: 2,
+    config.DEVICE_THERMOSTAT: 3,
+}
+
+
+def register_kind(device_type: str) -> int:
+    """
+    Assign a kind code to a device type, for device classes added as plug-ins.
+
+    Args:
+        device_type (str): Device type name
+
+    Returns:
+        int: The type's kind code (existing codes are returned unchanged)
+    """
+    if device_type not in KIND_CODES:
+        code = max(KIND_CODES.values()) + 1
+        if code > np.iinfo(np.uint8).max:
+            raise ValueError("Too many device types for the uint8 kind column.")
+        KIND_CODES[device_type] = code
+    return KIND_CODES[device_type]
+
+
+# Fan speed index meaning "off", matching Fan.SPEED_INDEX_OFF in devices.py
+SPEED_OFF = 0
+
+
+class DeviceStateStore:
+    """
+    Struct-of-arrays storage for device state.
+
+    Per slot: kind (uint8), room code (uint32, 0 for none), power (bool),
+    fan speed index (uint8) and thermostat setpoint (float64). Arrays grow
+    by doubling; released slots are reused. Array attributes are replaced
+    when the store grows, so callers must not hold on to them.
+    """
+
+    def __init__(self, capacity: int = config.STATE_STORE_INITIAL_CAPACITY):
+        """
+        Args:
+            capacity (int): Number of slots to allocate up front
+        """
+        capacity = max(1, capacity)
+        self.kind = np.zeros(capacity, dtype=np.uint8)
+        self.room = np.zeros(capacity, dtype=np.uint32)
+        self.power = np.zeros(capacity, dtype=np.bool_)
+        self.speed = np.zeros(capacity, dtype=np.uint8)
+        self.temperature = np.zeros(capacity, dtype=np.float64)
+        # Slots in [0, size) have been handed out at some point
+        self.size = 0
+        self._free = []
+
+    @property
+    def capacity(self) -> int:
+        return len(self.kind)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the state arrays."""
+        return sum(array.nbytes for array in (self.kind, self.room, self.power, self.speed, self.temperature))
+
+    def _grow(self, needed: int):
+        """Reallocate every array to hold at least `needed` slots."""
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        for name in ("kind", "room", "power", "speed", "temperature"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def allocate(self, kind: int, room: int = 0, temperature: float = 0.0) -> int:
+        """
+        Reserve a slot for one device.
+
+        Args:
+            kind (int): Kind code from KIND_CODES
+            room (int): Room code, 0 for none
+            temperature (float): Initial setpoint (thermostats)
+
+        Returns:
+            int: Index of the slot
+        """
+        if self._free:
+            index = self._free.pop()
+        else:
+            if self.size == self.capacity:
+                self._grow(self.size + 1)
+            index = self.size
+            self.size += 1
+        self.kind[index] = kind
+        self.room[index] = room
+        self.power[index] = False
+        self.speed[index] = SPEED_OFF
+        self.temperature[index] = temperature
+        return index
+
+    def allocate_many(self, kind: int, count: int, room: int = 0, temperature: float = 0.0) -> np.ndarray:
+        """
+        Reserve `count` contiguous new slots at once, for bulk provisioning.
+
+        Args:
+            kind (int): Kind code from KIND_CODES
+            count (int): Number of slots
+            room (int or np.ndarray): Room code for all slots, or one per slot
+            temperature (float or np.ndarray): Initial setpoint for all slots, or one per slot
+
+        Returns:
+            np.ndarray: Indices of the slots
+        """
+        start = self.size
+        if start + count > self.capacity:
+            self._grow(start + count)
+        self.size += count
+        indices = np.arange(start, start + count)
+        self.kind[indices] = kind
+        self.room[indices] = room
+        self.temperature[indices] = temperature
+        return indices
+
+    def release(self, index: int):
+        """Free a slot for reuse."""
+        self.kind[index] = KIND_FREE
+        self._free.append(index)
+
+    def indices(self, kind: Optional[int] = None, room: Optional[int] = None) -> np.ndarray:
+        """
+        Indices of occupied slots, optionally filtered by kind and room, in one vectorized pass.
+
+        Args:
+            kind (int): Kind code to keep, or None for every kind
+            room (int): Room code to keep, or None for every room
+
+        Returns:
+            np.ndarray: Matching slot indices in ascending order
+        """
+        kinds = self.kind[:self.size]
+        mask = kinds != KIND_FREE if kind is None else kinds == kind
+        if room is not None:
+            mask &= self.room[:self.size] == room
+        return np.flatnonzero(mask)
+
+    def set_power(self, indices, on: bool):
+        """Switch every slot in indices on or off."""
+        self.power[indices] = on
+
+    def set_speed(self, indices, speed: int):
+        """Set the fan speed of every slot in indices; a non-zero speed also powers it on."""
+        self.speed[indices] = speed
+        self.power[indices] = speed != SPEED_OFF
+
+    def set_temperature(self, indices, temperature: float):
+        """Set the setpoint of every slot in indices, clamped to the thermostat range."""
+        self.temperature[indices] = np.clip(temperature, config.THERMOSTAT_MIN_TEMP, config.THERMOSTAT_MAX_TEMP)
+
+    def adjust_temperature(self, indices, delta: float):
+        """Shift the setpoint of every slot in indices by delta, clamped array-wide."""
+        self.temperature[indices] = np.clip(self.temperature[indices] + delta,
+                                            config.THERMOSTAT_MIN_TEMP, config.THERMOSTAT_MAX_TEMP)
+
+    def snapshot(self) -> dict:
+        """
+        Copy the state columns commands can change (power, speed, temperature).
+
+        Returns:
+            dict: Column name -> copy of the occupied part of the column
+        """
+        return {name: getattr(self, name)[:self.size].copy() for name in ("power", "speed", "temperature")}
+
+    def restore(self, snapshot: dict):
+        """Write back state columns saved by snapshot()."""
+        for name, values in snapshot.items():
+            getattr(self, name)[:len(values)] = values
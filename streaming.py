@@ -0,0 +1,154 @@
+"""
+Streaming Command Processing
+
+Runs commands from stdin or a file through a generator pipeline,
+read -> normalize -> batch-parse -> execute, and writes one JSON result per
+line. Each stage pulls from the previous one, so only one batch of commands
+is in memory at a time however long the input is, and the batcher keeps
+reading until a batch is full before the classifier runs (the last batch
+is flushed at end of input). Commands are routed by the controller as in
+the CLI, so a command with a time of day is scheduled rather than run, an
+"if/when <trigger> <action>" line adds a rule, and "schedules" / "cancel
+schedule N" and "rules" / "delete rule N" manage them.
+
+Input lines are either plain commands or JSON objects; for JSON lines the
+command is taken from the first of TEXT_FIELDS present (so a requests.jsonl
+style file with "request_id" and "body" works as is).
+"""
+
+import json
+import time
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO
+
+# Import shared constants
+import config
+
+# JSON fields holding the command text, in order of preference
+TEXT_FIELDS = ["command", "text", "utterance", "body"]
+# JSON fields holding a record id echoed in the output
+ID_FIELDS = ["request_id", "id"]
+
+
+def read_records(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Turn input lines into records, skipping blank lines.
+
+    Args:
+        lines (iterable): Lines of text, e.g. an open file or sys.stdin
+
+    Yields:
+        dict: {'line', 'id', 'text', 'timings'}; 'error' is set for unreadable JSON lines
+    """
+    for number, line in enumerate(lines, start=1):
+        start = time.perf_counter()
+        line = line.strip()
+        if not line:
+            continue
+        record = {"line": number, "id": None, "text": line, "timings": {}}
+        if line.startswith("{"):
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError as e:
+                record["error"] = f"Invalid JSON: {e}"
+            else:
+                record["id"] = next((data[field] for field in ID_FIELDS if field in data), None)
+                record["text"] = next((data[field] for field in TEXT_FIELDS if field in data), "")
+        record["timings"]["read"] = time.perf_counter() - start
+        yield record
+
+
+def normalize_records(records: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Collapse whitespace in each record's command text."""
+    for record in records:
+        start = time.perf_counter()
+        text = record["text"]
+        record["text"] = " ".join(text.split()) if isinstance(text, str) else ""
+        record["timings"]["normalize"] = time.perf_counter() - start
+        yield record
+
+
+def batch_records(records: Iterable[Dict[str, Any]], batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Group records into lists of batch_size (the last one may be shorter)."""
+    records = iter(records)
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def parse_batches(batches: Iterable[List[Dict[str, Any]]], controller,
+                  batch_size: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Route and parse each batch with one batched call and yield its records with 'route' set.
+
+    Routing is the controller's, so schedules, rules and their management
+    commands are handled as in the CLI.
+    The batch's parse time is split evenly across its records.
+    """
+    for batch in batches:
+        pending = [record for record in batch if "error" not in record]
+        start = time.perf_counter()
+        routes = controller.route_commands([record["text"] for record in pending], batch_size=batch_size)
+        per_record = (time.perf_counter() - start) / max(len(pending), 1)
+        for record, routed in zip(pending, routes):
+            record["route"] = routed
+            record["timings"]["parse"] = per_record
+        yield from batch
+
+
+def execute_records(records: Iterable[Dict[str, Any]], controller) -> Iterator[Dict[str, Any]]:
+    """
+    Handle each routed record in input order and yield its JSON-ready result.
+
+    Yields:
+        dict: {'line', 'id', 'input', 'parsed', 'response', 'score', 'timings_ms'}
+    """
+    for record in records:
+        start = time.perf_counter()
+        clauses = []
+        if "error" in record:
+            response = record["error"]
+        else:
+            response = controller.dispatch(record["text"], *record["route"])
+            clauses = record["route"][2] or []
+        record["timings"]["execute"] = time.perf_counter() - start
+
+        scores = [clause["score"] for clause in clauses if "score" in clause]
+        yield {
+            "line": record["line"],
+            "id": record["id"],
+            "input": record["text"],
+            "parsed": clauses,
+            "response": response,
+            # A compound command is only as certain as its weakest clause
+            "score": min(scores) if scores else None,
+            "timings_ms": {stage: round(seconds * 1000, 3) for stage, seconds in record["timings"].items()},
+        }
+
+
+def stream_commands(lines: Iterable[str], controller, output: TextIO,
+                    batch_size: int = config.STREAM_BATCH_SIZE) -> int:
+    """
+    Process commands from lines and write one JSON result per line to output.
+
+    Args:
+        lines (iterable): Input lines (plain commands or JSON objects)
+        controller (SmartHomeController): Controller that parses and executes the commands
+        output (file): Where results are written; flushed after every batch
+        batch_size (int): Commands per batched parse (default: config.STREAM_BATCH_SIZE)
+
+    Returns:
+        int: Number of results written
+    """
+    records = normalize_records(read_records(lines))
+    parsed = parse_batches(batch_records(records, batch_size), controller)
+    written = 0
+    for result in execute_records(parsed, controller):
+        output.write(json.dumps(result, ensure_ascii=False) + "\n")
+        written += 1
+        if written % batch_size == 0:
+            output.flush()
+    output.flush()
+    return written
@@ -0,0 +1,54 @@
+"""Tests for resolving the devices a command refers to."""
+
+import pytest
+
+import config
+from command_parser import unresolved_qualifier
+from controller import SmartHomeController
+
+
+class FixedClassifier:
+    """Always classifies as "turn on light", so only target resolution varies."""
+
+    model_name = "fixed-stub"
+    passes_per_input = 1
+
+    def __call__(self, sequences, candidate_labels, multi_label=False, batch_size=None):
+        top = f"turn on {config.DEVICE_LIGHT}"
+        labels = [top] + [label for label in candidate_labels if label != top]
+        result = {"labels": labels, "scores": [0.99] + [0.01 / len(labels)] * (len(labels) - 1)}
+        return result if isinstance(sequences, str) else [result for _ in sequences]
+
+
+@pytest.fixture
+def controller(monkeypatch):
+    monkeypatch.setattr(config, "FAST_PATH_ENABLED", False)
+    monkeypatch.setattr(config, "CLASSIFICATION_CACHE_SIZE", 0)
+    controller = SmartHomeController(classifier=FixedClassifier())
+    yield controller
+    controller.close()
+
+
+@pytest.mark.parametrize("command", [
+    "We need light",
+    "Give me more light",
+    "Could I get some light",
+    "I need some light in here",
+])
+def test_phrasing_around_device_word_uses_default_device(controller, command):
+    assert unresolved_qualifier(command) is None
+    assert controller.process_command(command) == "The Living Room Light is now ON."
+
+
+@pytest.mark.parametrize("command, qualifier", [
+    ("Turn on the garage light", "garage"),
+    ("Turn on my desk lamp", "desk"),
+    ("Turn on the light in the garage", "garage"),
+])
+def test_unregistered_room_or_name_is_not_found(controller, command, qualifier):
+    assert unresolved_qualifier(command) == qualifier
+    assert controller.process_command(command) == f"Device '{qualifier} light' not found."
+
+
+def test_registered_room_resolves(controller):
+    assert controller.process_command("Turn on the living room light") == "The Living Room Light is now ON."
@@ -0,0 +1,40 @@
+"""Tests for the thermal simulation."""
+
+import numpy as np
+import pytest
+
+import config
+from simulation import ThermalSimulation
+from state_store import DeviceStateStore, KIND_CODES
+
+
+def build_store(setpoints):
+    store = DeviceStateStore(capacity=len(setpoints))
+    store.allocate_many(KIND_CODES[config.DEVICE_THERMOSTAT], len(setpoints),
+                        room=np.arange(1, len(setpoints) + 1), temperature=np.asarray(setpoints))
+    return store
+
+
+def test_insulated_zone_gains_hvac_output_each_step():
+    store = build_store([22.0, 22.0])
+    simulation = ThermalSimulation(store, step_seconds=60, outdoor=5.0, loss_rate=np.array([0.0, 1e-4]),
+                                   hvac_rate=0.001, hvac_gain=1.0, fan_boost=0.0, initial=18.0)
+    with np.errstate(all="raise"):
+        temperatures = simulation.step(3)
+    assert np.all(np.isfinite(temperatures))
+    # Capped at hvac_rate, the insulated zone warms by hvac_rate * dt per step
+    assert temperatures[0] == pytest.approx(18.0 + 3 * 0.001 * 60)
+    # The leaky zone loses heat to the colder outdoors on top of that
+    assert temperatures[1] < temperatures[0]
+
+
+def test_insulated_zone_matches_small_loss_rate_limit():
+    store = build_store([21.0])
+    insulated = ThermalSimulation(store, step_seconds=60, loss_rate=0.0, initial=15.0)
+    nearly = ThermalSimulation(store, step_seconds=60, loss_rate=1e-12, initial=15.0)
+    assert insulated.step(100) == pytest.approx(nearly.step(100))
+
+
+def test_negative_loss_rate_is_rejected():
+    with pytest.raises(ValueError):
+        ThermalSimulation(build_store([21.0]), loss_rate=-0.1)
@@ -0,0 +1,17 @@
+"""Tests for splitting compound utterances into clauses."""
+
+from command_parser import split_clauses
+
+
+def test_splits_independent_commands():
+    assert split_clauses("turn on the light and set the fan to high, then make it warmer") == [
+        "turn on the light", "set the fan to high", "make it warmer"]
+
+
+def test_keeps_shared_action_together():
+    assert split_clauses("turn off the light and the fan") == ["turn off the light and the fan"]
+
+
+def test_status_question_is_not_split_into_a_command():
+    # "the fan off" must not become a clause of its own that turns the fan off
+    assert split_clauses("is the light on and the fan off?") == ["is the light on and the fan off"]